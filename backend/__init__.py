@@ -1,14 +1,18 @@
 import os
+from typing import Any, Dict, Optional
+
 from flask import Flask, jsonify
 from dotenv import load_dotenv
 
 from backend.extensions import db
 
 
-def create_app() -> Flask:
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """Build the app. ``config`` overrides defaults (e.g. a scratch database for benchmarks)."""
     # Force instance folder to live under backend/instance to match repo
     instance_path = os.path.join(os.path.dirname(__file__), "instance")
     app = Flask(__name__, instance_path=instance_path, instance_relative_config=True)
+    app.config.update(config or {})
 
     # Load environment from backend/.env for local dev
     load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=False)
@@ -18,7 +22,7 @@ def create_app() -> Flask:
 
     # Configure SQLite database stored in the instance folder
     db_path = os.path.join(app.instance_path, "database.db")
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{db_path}")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     # Allow use from background threads (SQLite)
     try:
@@ -43,6 +47,39 @@ def create_app() -> Flask:
     # Video downloads directory
     default_video_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "videos"))
     app.config.setdefault("VIDEO_DIR", os.environ.get("VIDEO_DIR", default_video_dir))
+    # Related-videos index (memory-mapped; needs numpy and scipy)
+    default_related_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "related-index"))
+    app.config.setdefault("RELATED_INDEX_DIR", os.environ.get("RELATED_INDEX_DIR", default_related_dir))
+    # Disk budget for pipeline artifacts in VIDEO_DIR/AUDIO_DIR (0 disables eviction)
+    app.config.setdefault("STORAGE_MAX_BYTES", int(os.environ.get("STORAGE_MAX_BYTES", 5 * 1024 ** 3)))
+    app.config.setdefault("STORAGE_SWEEP_SECONDS", int(os.environ.get("STORAGE_SWEEP_SECONDS", 600)))
+    app.config.setdefault("STORAGE_ORPHAN_GRACE_SECONDS", int(os.environ.get("STORAGE_ORPHAN_GRACE_SECONDS", 3600)))
+    # Also delete untracked pipeline files (named <youtube id>.*) no video refers to; off by default
+    app.config.setdefault("STORAGE_SWEEP_ORPHANS", os.environ.get("STORAGE_SWEEP_ORPHANS", "0") not in ("0", "false", "no", ""))
+    # Comma separated emails allowed to use /admin endpoints
+    app.config.setdefault("ADMIN_EMAILS", os.environ.get("ADMIN_EMAILS", ""))
+    # Prometheus scrape endpoint (opt-in); when METRICS_TOKEN is set it must be sent as a bearer token
+    app.config.setdefault("METRICS_ENABLED", os.environ.get("METRICS_ENABLED", "0") not in ("0", "false", "no", ""))
+    app.config.setdefault("METRICS_TOKEN", os.environ.get("METRICS_TOKEN", ""))
+    # Profile every request ('sql' or 'full'); admins can opt in per request with an X-Profile header
+    app.config.setdefault("PROFILE_REQUESTS", os.environ.get("PROFILE_REQUESTS", ""))
+    app.config.setdefault("PROFILE_SAMPLE_INTERVAL", float(os.environ.get("PROFILE_SAMPLE_INTERVAL", 0.005)))
+    # Compress JSON/text responses of at least this many bytes (-1 disables); brotli if installed
+    app.config.setdefault("COMPRESS_MIN_BYTES", int(os.environ.get("COMPRESS_MIN_BYTES", 1024)))
+    app.config.setdefault("COMPRESS_LEVEL", int(os.environ.get("COMPRESS_LEVEL", 1)))
+    # List endpoints stream their body above this many items
+    app.config.setdefault("STREAM_LIST_THRESHOLD", int(os.environ.get("STREAM_LIST_THRESHOLD", 200)))
+    # Append spans to this file as Chrome Trace Events (unset disables export)
+    app.config.setdefault("TRACE_FILE", os.environ.get("TRACE_FILE", ""))
+    # Daily digests are built once per day inside this local-time window, checked every DIGEST_CHECK_SECONDS
+    app.config.setdefault("DIGEST_WINDOW", os.environ.get("DIGEST_WINDOW", "02:00-05:00"))
+    app.config.setdefault("DIGEST_CHECK_SECONDS", int(os.environ.get("DIGEST_CHECK_SECONDS", 300)))
+    # 'thread': pipelines run on this process's scheduler; 'queue': they are queued for `python -m backend.worker`
+    app.config.setdefault("PIPELINE_MODE", os.environ.get("PIPELINE_MODE", "thread"))
+    # Storage sweeper, digest scheduler and resuming pending lookups; off for workers, CLI tools and benchmarks
+    app.config.setdefault("BACKGROUND_TASKS", os.environ.get("BACKGROUND_TASKS", "1") not in ("0", "false", "no", ""))
+    # Use a video's YouTube captions (with their cue timings) as its transcript when it has any; off by default
+    app.config.setdefault("PIPELINE_CAPTIONS", os.environ.get("PIPELINE_CAPTIONS", "0") not in ("0", "false", "no", ""))
 
     # Register blueprints
     from backend.routes.user import bp as user_bp
@@ -50,63 +87,55 @@ def create_app() -> Flask:
     from backend.routes.sources import bp as sources_bp
     from backend.routes.videos import bp as videos_bp
     from backend.routes.ai import bp as ai_bp
+    from backend.routes.feed import bp as feed_bp
+    from backend.routes.admin import bp as admin_bp
+    from backend.routes.export import bp as export_bp
     app.register_blueprint(user_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(sources_bp)
     app.register_blueprint(videos_bp)
     app.register_blueprint(ai_bp)
+    app.register_blueprint(feed_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(export_bp)
+    if app.config["METRICS_ENABLED"]:
+        from backend import metrics
+        from backend.routes.metrics import bp as metrics_bp
+        metrics.init_app(app)
+        app.register_blueprint(metrics_bp)
+        if not app.config.get("METRICS_TOKEN"):
+            app.logger.warning("/metrics is enabled without METRICS_TOKEN; restrict it at the proxy")
+
+    from backend import accounting, compression, json_provider, profiling, tracing
+    accounting.init_app(app)
+    json_provider.init_app(app)
+    profiling.init_app(app)
+    tracing.init_app(app)
+    compression.init_app(app)
+
+    # Create tables / run column migrations unless the schema version is current
+    from backend.schema import ensure_schema
+    ensure_schema(app)
+
+    if app.config["BACKGROUND_TASKS"]:
+        from backend.storage import start_sweeper
+        start_sweeper(app)
+
+        from backend.digest import start_scheduler
+        start_scheduler(app)
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        # Lightweight SQLite migration: add 'transcribe' column to 'videos' if missing
-        try:
-            from sqlalchemy import text
-            from sqlalchemy.engine import Connection
-            conn: Connection = db.engine.connect()
-            cols = conn.exec_driver_sql("PRAGMA table_info(videos)").fetchall()
-            col_names = {row[1] for row in cols} if cols else set()
-            if "transcribe" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcribe TEXT DEFAULT ''")
-                conn.exec_driver_sql("UPDATE videos SET transcribe='' WHERE transcribe IS NULL")
-            if "summary" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN summary TEXT DEFAULT ''")
-                conn.exec_driver_sql("UPDATE videos SET summary='' WHERE summary IS NULL")
-            if "audio_path" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN audio_path TEXT DEFAULT ''")
-                conn.exec_driver_sql("UPDATE videos SET audio_path='' WHERE audio_path IS NULL")
-            if "audio_status" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN audio_status TEXT DEFAULT ''")
-                conn.exec_driver_sql("UPDATE videos SET audio_status='' WHERE audio_status IS NULL")
-            if "transcribe_status" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcribe_status TEXT DEFAULT ''")
-                conn.exec_driver_sql("UPDATE videos SET transcribe_status='' WHERE transcribe_status IS NULL")
-            # YouTube metadata columns
-            if "channel_title" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN channel_title TEXT")
-            if "description" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN description TEXT")
-            if "view_count" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN view_count INTEGER")
-            if "like_count" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN like_count INTEGER")
-            if "dislike_count" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN dislike_count INTEGER")
-            if "comment_count" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN comment_count INTEGER")
-            if "published_at" not in col_names:
-                conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN published_at TEXT")
-            conn.close()
-        except Exception:
-            # Best-effort; skip if not SQLite or table not present yet
-            pass
+        # Pick up metadata lookups interrupted by a restart
+        from backend.enrichment import resume_pending
+        resume_pending(app)
 
     @app.after_request
     def add_cors_headers(resp):
         # Simple CORS for local dev (Vite default port)
         resp.headers.setdefault("Access-Control-Allow-Origin", "*")
-        resp.headers.setdefault("Access-Control-Allow-Headers", "Content-Type, Authorization")
+        resp.headers.setdefault("Access-Control-Allow-Headers", "Content-Type, Authorization, X-Profile, X-Request-ID")
         resp.headers.setdefault("Access-Control-Allow-Methods", "GET, POST, PUT, PATCH, DELETE, OPTIONS")
+        # Let the dev UI read the request ID and profiling results
+        resp.headers.setdefault("Access-Control-Expose-Headers", "X-Request-ID, X-Profile-Id, X-SQL-Count, X-SQL-Time-ms")
         return resp
 
     @app.route("/")
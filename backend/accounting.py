@@ -0,0 +1,251 @@
+"""Per-job cost and resource accounting.
+
+Work that should be billed to someone runs inside ``accounting.job(...)``
+(pipeline runs, enrichment lookups, digests). Code anywhere below it, in the
+same thread or in threads started through ``tracing.bind`` (transcode pool,
+summary workers), reports what it consumed with ``accounting.charge``:
+
+- ``audio_seconds``       audio sent to a transcription provider
+- ``tokens_in/out``       OpenAI ``usage`` of chat and transcription responses
+- ``youtube_units``       YouTube Data API quota, charged per request by ``http_client``
+- ``bytes_downloaded``    media fetched by yt-dlp
+- ``ffmpeg_cpu_seconds``  user + system CPU time of ffmpeg processes
+
+When the job ends one ``usage_records`` row is written with the totals, its
+wall time and the owning user. Charges made by a request handler outside any
+job (caption lookups, channel search, manual transcription) are recorded as
+one ``request`` row per request. ``report`` aggregates the table for
+``GET /admin/usage`` and ``GET /auth/me/usage``.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import desc, func, insert
+
+from backend.extensions import db
+from backend.models.source import Source
+from backend.models.usage_record import UsageRecord
+from backend.models.video import Video
+
+METRICS = ("audio_seconds", "tokens_in", "tokens_out", "youtube_units", "bytes_downloaded", "ffmpeg_cpu_seconds")
+
+# YouTube Data API v3 quota cost per request, by resource (read calls; unknown resources cost 1)
+QUOTA_COSTS = {"search": 100, "captions": 50, "videos": 1, "channels": 1, "playlistItems": 1, "playlists": 1}
+
+
+class Usage:
+    """Running totals of one job (thread-safe: charged from pool threads too)."""
+
+    def __init__(self, kind: str, *, detail: str = "", user_id: Optional[int] = None,
+                 video_id: Optional[int] = None, source_id: Optional[int] = None):
+        self.kind = kind
+        self.detail = detail
+        self.user_id = user_id
+        self.video_id = video_id
+        self.source_id = source_id
+        self.status = "ok"
+        self.started_at = datetime.utcnow()
+        self.started = time.monotonic()
+        self.totals: Dict[str, float] = {m: 0 for m in METRICS}
+        self._lock = threading.Lock()
+
+    def add(self, **amounts: float) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                if name not in self.totals:
+                    raise ValueError(f"Unknown usage metric '{name}'")
+                self.totals[name] += amount or 0
+
+    def charged(self) -> bool:
+        with self._lock:
+            return any(self.totals.values())
+
+
+_current: contextvars.ContextVar[Optional[Usage]] = contextvars.ContextVar("usage", default=None)
+
+
+def current() -> Optional[Usage]:
+    """The job being charged in this context, if any."""
+    usage = _current.get()
+    if usage is not None:
+        return usage
+    from flask import g, has_request_context
+
+    if has_request_context() and getattr(g, "current_user", None) is not None:
+        if getattr(g, "usage", None) is None:
+            from flask import request
+
+            g.usage = Usage("request", detail=request.endpoint or "", user_id=g.current_user.id)
+        return g.usage
+    return None
+
+
+def charge(**amounts: float) -> None:
+    """Add to the current job's totals (no-op outside a job or authenticated request)."""
+    usage = current()
+    if usage is not None:
+        usage.add(**amounts)
+
+
+def charge_http(url: str, resp) -> None:
+    """Quota of a YouTube Data API request (called by ``http_client`` for every response)."""
+    path = urlparse(url).path
+    marker = "/youtube/v3/"
+    if marker not in path:
+        return
+    resource = path.split(marker, 1)[1].strip("/").split("/", 1)[0]
+    charge(youtube_units=QUOTA_COSTS.get(resource, 1))
+
+
+def charge_openai_usage(body: Dict[str, Any]) -> None:
+    """Tokens from an OpenAI response's ``usage`` (chat and transcription field names)."""
+    usage = (body or {}).get("usage") or {}
+    tokens_in = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+    tokens_out = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    if tokens_in or tokens_out:
+        charge(tokens_in=tokens_in, tokens_out=tokens_out)
+
+
+def _owner(usage: Usage) -> Optional[int]:
+    if usage.user_id is not None:
+        return usage.user_id
+    if usage.video_id is not None:
+        return (
+            db.session.query(Source.user_id)
+            .join(Video, Video.source_id == Source.id)
+            .filter(Video.id == usage.video_id)
+            .scalar()
+        )
+    if usage.source_id is not None:
+        return db.session.query(Source.user_id).filter(Source.id == usage.source_id).scalar()
+    return None
+
+
+def record(usage: Usage) -> None:
+    """Write the job's row (needs an app context; uses its own transaction)."""
+    with usage._lock:
+        totals = {k: round(v, 6) if isinstance(v, float) else v for k, v in usage.totals.items()}
+    row = {
+        "kind": usage.kind,
+        "detail": (usage.detail or "")[:100],
+        "status": usage.status,
+        "user_id": _owner(usage),
+        "video_id": usage.video_id,
+        "started_at": usage.started_at,
+        "wall_seconds": round(time.monotonic() - usage.started, 3),
+        **totals,
+    }
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(UsageRecord).values(**row))
+    except Exception:
+        logging.getLogger(__name__).exception("Recording usage of %s job failed", usage.kind)
+
+
+@contextmanager
+def job(kind: str, *, app=None, detail: str = "", user_id: Optional[int] = None,
+        video_id: Optional[int] = None, source_id: Optional[int] = None) -> Iterator[Usage]:
+    """Charge everything inside the block to one job, recorded when it ends.
+
+    Inside another job the enclosing job is charged instead. ``app`` is
+    needed when the block runs outside an app context. The owner is taken
+    from ``user_id``, else from the video's or source's owner.
+    """
+    enclosing = _current.get()
+    if enclosing is not None:
+        yield enclosing
+        return
+    usage = Usage(kind, detail=detail, user_id=user_id, video_id=video_id, source_id=source_id)
+    token = _current.set(usage)
+    try:
+        yield usage
+    except BaseException:
+        usage.status = "failed"
+        raise
+    finally:
+        _current.reset(token)
+        if app is not None:
+            with app.app_context():
+                record(usage)
+        else:
+            record(usage)
+
+
+def init_app(app) -> None:
+    """Record the usage charged by request handlers outside a job."""
+    from flask import g
+
+    @app.teardown_request
+    def record_request_usage(exc):
+        usage = g.pop("usage", None)
+        if usage is not None and usage.charged():
+            if exc is not None:
+                usage.status = "failed"
+            record(usage)
+
+
+# ---------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------
+
+_GROUPS = {
+    "user": UsageRecord.user_id,
+    "kind": UsageRecord.kind,
+    "video": UsageRecord.video_id,
+    "day": func.date(UsageRecord.started_at),
+}
+
+
+def report(since: datetime, group_by: str = "user", order: str = "tokens_in", limit: int = 20,
+           user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Totals since ``since`` and the top ``limit`` groups by ``order`` (a metric, ``jobs`` or ``wall_seconds``)."""
+    if group_by not in _GROUPS:
+        raise ValueError(f"group must be one of {', '.join(_GROUPS)}")
+    sums = [func.count(UsageRecord.id).label("jobs"),
+            func.coalesce(func.sum(UsageRecord.wall_seconds), 0).label("wall_seconds")]
+    sums += [func.coalesce(func.sum(getattr(UsageRecord, m)), 0).label(m) for m in METRICS]
+    if order not in {c.name for c in sums}:
+        raise ValueError(f"order must be one of jobs, wall_seconds, {', '.join(METRICS)}")
+
+    q = db.session.query(*sums).filter(UsageRecord.started_at >= since)
+    if user_id is not None:
+        q = q.filter(UsageRecord.user_id == user_id)
+    totals = q.one()._asdict()
+
+    key = _GROUPS[group_by].label(group_by)
+    rows = (
+        q.add_columns(key)
+        .group_by(key)
+        .order_by(desc(order))
+        .limit(limit)
+        .all()
+    )
+    return {
+        "since": since.isoformat() + "Z",
+        "group": group_by,
+        "order": order,
+        "totals": _rounded(totals),
+        "groups": [_rounded(r._asdict()) for r in rows],
+    }
+
+
+def report_from_args(args, user_id: Optional[int] = None, default_group: str = "user") -> Dict[str, Any]:
+    """``report`` for query args ``days`` (default 7), ``group``, ``order`` and ``limit``; ValueError if invalid."""
+    try:
+        days = float(args.get("days", 7))
+        limit = max(1, min(int(args.get("limit", 20)), 500))
+    except ValueError:
+        raise ValueError("days and limit must be numbers") from None
+    since = datetime.utcnow() - timedelta(days=days)
+    return report(since, group_by=args.get("group", default_group), order=args.get("order", "tokens_in"),
+                  limit=limit, user_id=user_id)
+
+
+def _rounded(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()}
@@ -1,59 +1,333 @@
 import os
+import importlib.util
 import logging
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
 
-import requests
+from backend import accounting, http_client, tracing
+from backend.segments import Segment
 
 
-def summarize_markdown(transcript: str, *, instructions: str = "", model: Optional[str] = None) -> str:
-    transcript = (transcript or "").strip()
-    if not transcript:
-        return ""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return ""
-    model = (model or os.environ.get("OPENAI_MODEL") or "gpt-4o-mini").strip()
-    system = (
-        "You are an expert summarizer. Respond in clean Markdown. "
-        "Write a short intro paragraph followed by a bulleted list of 3–7 key points. "
-        "Use headings when helpful (e.g., '# Summary', '## Key Points') and **bold** for emphasis."
-    )
-    if instructions:
-        system += f" Additional instructions: {instructions}"
+SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert summarizer. Respond in clean Markdown. "
+    "Write a short intro paragraph followed by a bulleted list of 3–7 key points. "
+    "Use headings when helpful (e.g., '# Summary', '## Key Points') and **bold** for emphasis."
+)
+
+_CHUNK_SYSTEM_PROMPT = (
+    "You are summarizing one part of a longer transcript. "
+    "Write concise bullet-point notes of the facts, claims and conclusions in this part. "
+    "Do not add an introduction or conclusion."
+)
+
+_REDUCE_PREAMBLE = (
+    "The transcript was too long to summarize at once. "
+    "Below are notes on its consecutive parts; summarize the whole from them."
+)
+
+# Every prompt a summary can depend on (single call and map-reduce); part of the memo key
+SUMMARY_PROMPTS = (SUMMARY_SYSTEM_PROMPT, _CHUNK_SYSTEM_PROMPT, _REDUCE_PREAMBLE)
+
+
+def openai_url(path: str) -> str:
+    """OpenAI API endpoint; OPENAI_BASE_URL allows pointing at a compatible or stand-in server."""
+    base = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def _summary_chunk_tokens() -> int:
+    try:
+        return max(500, int(os.environ.get("OPENAI_SUMMARY_CHUNK_TOKENS", 6000)))
+    except ValueError:
+        return 6000
+
+
+def _summary_concurrency() -> int:
+    try:
+        return max(1, int(os.environ.get("OPENAI_SUMMARY_CONCURRENCY", 4)))
+    except ValueError:
+        return 4
+
+
+def resolve_summary_model(model: Optional[str] = None) -> str:
+    return (model or os.environ.get("OPENAI_MODEL") or "gpt-4o-mini").strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text or "") + 3) // 4
+
+
+def split_transcript(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most ``max_tokens``, preferring paragraph,
+    line and sentence boundaries over hard cuts."""
+    text = (text or "").strip()
+    if estimate_tokens(text) <= max_tokens:
+        return [text] if text else []
+    max_chars = max_tokens * 4
+
+    def pieces(block: str, seps: List[str]) -> List[str]:
+        if len(block) <= max_chars:
+            return [block]
+        if not seps:
+            return [block[i:i + max_chars] for i in range(0, len(block), max_chars)]
+        sep, rest = seps[0], seps[1:]
+        out: List[str] = []
+        for part in block.split(sep):
+            if part.strip():
+                out.extend(pieces(part.strip(), rest))
+        return out
+
+    chunks: List[str] = []
+    cur: List[str] = []
+    cur_len = 0
+    for piece in pieces(text, ["\n\n", "\n", ". ", " "]):
+        if cur and cur_len + len(piece) + 1 > max_chars:
+            chunks.append("\n".join(cur))
+            cur, cur_len = [], 0
+        cur.append(piece)
+        cur_len += len(piece) + 1
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+
+def _chat(api_key: str, model: str, system: str, user: str, max_tokens: int) -> str:
+    import requests
+
     payload = {
         "model": model,
         "messages": [
             {"role": "system", "content": system},
-            {"role": "user", "content": f"Transcript:\n{transcript}"},
+            {"role": "user", "content": user},
         ],
         "temperature": 0.2,
-        "max_tokens": 512,
+        "max_tokens": max_tokens,
     }
     try:
-        resp = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            json=payload,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            timeout=45,
-        )
+        with tracing.span("openai.chat", "summarize", model=model, input_tokens=estimate_tokens(user)):
+            resp = http_client.post(
+                openai_url("chat/completions"),
+                json=payload,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=45,
+            )
         logging.getLogger(__name__).info(
             "OpenAI summarize status=%s", resp.status_code
         )
         if not resp.ok:
             return ""
         data = resp.json()
+        accounting.charge_openai_usage(data)
         return (data.get("choices") or [{}])[0].get("message", {}).get("content", "").strip()
     except requests.RequestException:
         return ""
 
 
-def openai_transcribe(file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> str:
+def chat(system: str, user: str, *, max_tokens: int = 512, model: Optional[str] = None) -> str:
+    """One chat completion with the summary model; "" without OPENAI_API_KEY or on failure."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return ""
+    return _chat(api_key, resolve_summary_model(model), system, user, max_tokens)
+
+
+def summarize_markdown(transcript: str, *, instructions: str = "", model: Optional[str] = None) -> str:
+    """Summarize a transcript to Markdown.
+
+    Transcripts longer than ``OPENAI_SUMMARY_CHUNK_TOKENS`` are split into chunks
+    that are summarized concurrently (map) and merged in a final call (reduce).
+    """
+    transcript = (transcript or "").strip()
+    if not transcript:
+        return ""
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         return ""
+    model = resolve_summary_model(model)
+    system = SUMMARY_SYSTEM_PROMPT
+    if instructions:
+        system += f" Additional instructions: {instructions}"
+
+    chunk_tokens = _summary_chunk_tokens()
+    chunks = split_transcript(transcript, chunk_tokens)
+    if len(chunks) <= 1:
+        return _chat(api_key, model, system, f"Transcript:\n{transcript}", 512)
+
+    # Map: notes per chunk, then keep reducing until the notes fit in one request
+    notes = chunks
+    with ThreadPoolExecutor(max_workers=_summary_concurrency()) as pool:
+        while True:
+            total = len(notes)
+            results = list(pool.map(
+                tracing.bind(lambda item: _chat(
+                    api_key, model, _CHUNK_SYSTEM_PROMPT,
+                    f"Part {item[0] + 1} of {total}:\n{item[1]}", 400,
+                )),
+                enumerate(notes),
+            ))
+            notes = [n for n in results if n]
+            if not notes:
+                return ""
+            merged = "\n\n".join(notes)
+            if estimate_tokens(merged) <= chunk_tokens or len(notes) >= total:
+                break
+            notes = split_transcript(merged, chunk_tokens)
+
+    # Reduce: final summary from the ordered notes
+    return _chat(api_key, model, system, f"{_REDUCE_PREAMBLE}\n\n{merged}", 512)
+
+
+class TranscriptionProvider:
+    """Speech-to-text backend. Subclasses implement ``iter_segments`` and/or ``transcribe``."""
+
+    name = ""
+    # Largest file the provider accepts; the pipeline splits audio above this (None = no limit)
+    max_upload_bytes: Optional[int] = None
+
+    def unavailable(self) -> Optional[str]:
+        """Why the provider can't run in this process (missing package or key), None if it can."""
+        return None
+
+    def iter_segments(self, file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> Iterator[str]:
+        raise NotImplementedError
+
+    def transcribe(self, file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> str:
+        return " ".join(t for t in self.iter_segments(file_path, model=model, language=language) if t).strip()
+
+    def transcribe_timed(self, file_path: str, *, model: Optional[str] = None,
+                         language: Optional[str] = None) -> Tuple[str, List[Segment]]:
+        """Text plus timed segments (milliseconds from the start of the file).
+
+        Providers that can't report timings return no segments.
+        """
+        return self.transcribe(file_path, model=model, language=language), []
+
+
+class OpenAITranscriber(TranscriptionProvider):
+    """OpenAI audio transcription API (``whisper-1`` by default)."""
+
+    name = "openai"
+    max_upload_bytes = 24 * 1024 * 1024
+
+    def unavailable(self) -> Optional[str]:
+        return None if os.environ.get("OPENAI_API_KEY") else "OPENAI_API_KEY is not set"
+
+    def iter_segments(self, file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> Iterator[str]:
+        text = self.transcribe(file_path, model=model, language=language)
+        if text:
+            yield text
+
+    def transcribe(self, file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> str:
+        return _openai_transcribe_request(file_path, model=model, language=language)
+
+    def transcribe_timed(self, file_path: str, *, model: Optional[str] = None,
+                         language: Optional[str] = None) -> Tuple[str, List[Segment]]:
+        j = _openai_transcribe_json(file_path, model=model, language=language, timestamps=True)
+        segments = [
+            Segment(int(round(seg.get("start", 0) * 1000)), int(round(seg.get("end", 0) * 1000)),
+                    (seg.get("text") or "").strip())
+            for seg in j.get("segments") or []
+        ]
+        return (j.get("text") or "").strip(), segments
+
+
+class LocalWhisperTranscriber(TranscriptionProvider):
+    """Whisper on the local CPU via faster-whisper (CTranslate2, int8 quantized by default).
+
+    The model is loaded once per process and shared by all jobs.
+    """
+
+    name = "local"
+    max_upload_bytes = None
+
+    _models: Dict[tuple, Any] = {}
+    _lock = threading.Lock()
+
+    def unavailable(self) -> Optional[str]:
+        if importlib.util.find_spec("faster_whisper") is None:
+            return "faster-whisper is not installed (pip install faster-whisper)"
+        return None
+
+    @classmethod
+    def _load(cls, model_name: str):
+        compute_type = os.environ.get("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+        threads = int(os.environ.get("LOCAL_WHISPER_THREADS", 0) or 0)
+        key = (model_name, compute_type, threads)
+        with cls._lock:
+            if key not in cls._models:
+                from faster_whisper import WhisperModel
+
+                logging.getLogger(__name__).info(
+                    "Loading local Whisper model=%s compute_type=%s", model_name, compute_type
+                )
+                cls._models[key] = WhisperModel(
+                    model_name, device="cpu", compute_type=compute_type, cpu_threads=threads
+                )
+            return cls._models[key]
+
+    def _recognize(self, file_path: str, model: Optional[str], language: Optional[str]):
+        model_name = (model or os.environ.get("LOCAL_WHISPER_MODEL") or "base").strip()
+        whisper = self._load(model_name)
+        segments, _info = whisper.transcribe(file_path, language=language, beam_size=1, vad_filter=True)
+        # faster-whisper decodes lazily: segments stream out as they are recognized
+        return segments
+
+    def iter_segments(self, file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> Iterator[str]:
+        for seg in self._recognize(file_path, model, language):
+            yield (seg.text or "").strip()
+
+    def transcribe_timed(self, file_path: str, *, model: Optional[str] = None,
+                         language: Optional[str] = None) -> Tuple[str, List[Segment]]:
+        segments = [
+            Segment(int(round(seg.start * 1000)), int(round(seg.end * 1000)), (seg.text or "").strip())
+            for seg in self._recognize(file_path, model, language)
+        ]
+        return " ".join(s.text for s in segments if s.text).strip(), segments
+
+
+_PROVIDERS: Dict[str, Type[TranscriptionProvider]] = {
+    OpenAITranscriber.name: OpenAITranscriber,
+    LocalWhisperTranscriber.name: LocalWhisperTranscriber,
+}
+
+
+def transcription_providers() -> List[str]:
+    return sorted(_PROVIDERS)
+
+
+def get_transcriber(name: Optional[str] = None) -> TranscriptionProvider:
+    """Return the provider ``name``, or the deployment default from TRANSCRIBE_PROVIDER."""
+    name = (name or os.environ.get("TRANSCRIBE_PROVIDER") or "openai").strip().lower()
+    try:
+        return _PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown transcription provider: {name}") from None
+
+
+def openai_transcribe(file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> str:
+    return OpenAITranscriber().transcribe(file_path, model=model, language=language)
+
+
+def _openai_transcribe_request(file_path: str, *, model: Optional[str] = None, language: Optional[str] = None) -> str:
+    return (_openai_transcribe_json(file_path, model=model, language=language).get("text") or "").strip()
+
+
+def _openai_transcribe_json(file_path: str, *, model: Optional[str] = None, language: Optional[str] = None,
+                            timestamps: bool = False) -> Dict[str, Any]:
+    """Response body of the transcription API ({} on failure).
+
+    With ``timestamps`` and a Whisper model, ``verbose_json`` is requested so
+    the body carries ``segments`` with start/end seconds (other models only
+    return text).
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return {}
     model = (model or os.environ.get("OPENAI_TRANSCRIBE_MODEL") or "whisper-1").strip()
     try:
         logging.getLogger(__name__).info(
@@ -64,8 +338,10 @@ def openai_transcribe(file_path: str, *, model: Optional[str] = None, language:
             data = {"model": model}
             if language:
                 data["language"] = language
-            resp = requests.post(
-                "https://api.openai.com/v1/audio/transcriptions",
+            if timestamps and model.startswith("whisper"):
+                data["response_format"] = "verbose_json"
+            resp = http_client.post(
+                openai_url("audio/transcriptions"),
                 headers={"Authorization": f"Bearer {api_key}"},
                 data=data,
                 files=files,
@@ -75,9 +351,9 @@ def openai_transcribe(file_path: str, *, model: Optional[str] = None, language:
             "OpenAI transcribe response: status=%s", resp.status_code
         )
         if not resp.ok:
-            return ""
-        j = resp.json()
-        return (j.get("text") or "").strip()
+            return {}
+        body = resp.json() or {}
+        accounting.charge_openai_usage(body)
+        return body
     except Exception:
-        return ""
-
+        return {}
@@ -29,3 +29,20 @@ def auth_required(fn):
 
     return wrapper
 
+
+def is_admin(user) -> bool:
+    """Admins are configured by email via ADMIN_EMAILS (comma separated)."""
+    raw = current_app.config.get("ADMIN_EMAILS") or ""
+    admins = {e.strip().lower() for e in raw.split(",") if e.strip()}
+    return bool(user and (user.email or "").lower() in admins)
+
+
+def admin_required(fn):
+    @auth_required
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not is_admin(g.current_user):
+            return jsonify(error="Admin access required"), 403
+        return fn(*args, **kwargs)
+
+    return wrapper
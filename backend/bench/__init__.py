@@ -0,0 +1,28 @@
+"""Benchmarks and load tests (not imported by the app).
+
+- ``python -m backend.bench.pipeline`` — end-to-end pipeline throughput against local fakes
+- ``python -m backend.bench.seed`` / ``python -m backend.bench.load`` — HTTP load test on a seeded database
+- ``python -m backend.bench.startup`` — import and ``create_app()`` time in fresh interpreters
+"""
+import math
+from typing import Dict, Iterable, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def describe(values: Iterable[float]) -> Dict[str, float]:
+    values = list(values)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values) if values else 0.0,
+    }
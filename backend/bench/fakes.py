@@ -0,0 +1,228 @@
+"""Local stand-ins for the external services the pipeline calls.
+
+``FakeServices`` serves, on one local port:
+
+- the YouTube Data API (``/youtube/v3/videos|channels|search|captions``)
+- timedtext captions (``/api/timedtext``)
+- media files for yt-dlp (``/media/<id>.wav``, a generated tone)
+- OpenAI transcription and chat completions (``/v1/audio/transcriptions``, ``/v1/chat/completions``)
+
+Latency and error rate are configurable globally or per service
+(``youtube``, ``timedtext``, ``media``, ``openai``). ``env()`` returns the
+environment variables that point the app at the fakes.
+"""
+import io
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import wave
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+Setting = Union[float, Dict[str, float]]
+
+_WORDS = (
+    "market report interview analysis policy growth energy climate research data model "
+    "team product launch release update review season match result history future"
+).split()
+
+
+def make_wav(seconds: float, rate: int = 16000) -> bytes:
+    """Mono 16-bit PCM sine tone, small enough to generate per run."""
+    frames = int(seconds * rate)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / rate))) for i in range(frames)
+        ))
+    return buf.getvalue()
+
+
+def _words(n: int, rnd: random.Random) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(n))
+
+
+class FakeServices:
+    def __init__(
+        self,
+        latency: Setting = 0.0,
+        error_rate: Setting = 0.0,
+        media_seconds: float = 10.0,
+        transcript_words: int = 1500,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.transcript_words = transcript_words
+        self.media = make_wav(media_seconds)
+        self.media_seconds = media_seconds
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # -- settings -------------------------------------------------------
+    @staticmethod
+    def _for(setting: Setting, service: str) -> float:
+        if isinstance(setting, dict):
+            return float(setting.get(service, setting.get("default", 0.0)))
+        return float(setting or 0.0)
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rnd.random()
+
+    # -- lifecycle ------------------------------------------------------
+    def start(self) -> "FakeServices":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # keep benchmark output clean
+                pass
+
+            def do_GET(self):
+                fake._handle(self, "GET")
+
+            def do_HEAD(self):
+                fake._handle(self, "HEAD")
+
+            def do_POST(self):
+                fake._handle(self, "POST")
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                pass  # clients (yt-dlp) drop keep-alive connections; not a benchmark error
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "YOUTUBE_API_BASE_URL": f"{self.base_url}/youtube/v3",
+            "YOUTUBE_TIMEDTEXT_URL": f"{self.base_url}/api/timedtext",
+            "YOUTUBE_WATCH_URL": f"{self.base_url}/media/{{id}}.wav",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "OPENAI_API_KEY": "bench-key",
+            "YOUTUBE_API_KEY": "bench-key",
+        }
+
+    # -- request handling ----------------------------------------------
+    def _send(self, h: BaseHTTPRequestHandler, status: int, body: bytes, ctype: str, extra=None, head=False):
+        h.send_response(status)
+        h.send_header("Content-Type", ctype)
+        h.send_header("Content-Length", str(len(body)))
+        for k, v in (extra or {}).items():
+            h.send_header(k, v)
+        h.end_headers()
+        if not head:
+            h.wfile.write(body)
+
+    def _json(self, h, obj, status=200):
+        self._send(h, status, json.dumps(obj).encode(), "application/json")
+
+    def _handle(self, h: BaseHTTPRequestHandler, method: str) -> None:
+        u = urlparse(h.path)
+        path, qs = u.path, parse_qs(u.query)
+        if method == "POST":
+            length = int(h.headers.get("Content-Length") or 0)
+            if length:
+                h.rfile.read(length)
+        service = (
+            "openai" if path.startswith("/v1/")
+            else "youtube" if path.startswith("/youtube/")
+            else "timedtext" if path.startswith("/api/timedtext")
+            else "media" if path.startswith("/media/")
+            else "other"
+        )
+        with self._lock:
+            self.calls[service] += 1
+        delay = self._for(self.latency, service)
+        if delay:
+            time.sleep(delay * (0.5 + self._random()))
+        if self._random() < self._for(self.error_rate, service):
+            with self._lock:
+                self.errors[service] += 1
+            return self._json(h, {"error": "injected failure"}, status=503)
+
+        vid = (qs.get("id") or qs.get("videoId") or qs.get("v") or [""])[0]
+        rnd = random.Random(hash(vid) & 0xFFFF)
+        if path == "/youtube/v3/videos":
+            minutes = int(self.media_seconds // 60)
+            seconds = int(self.media_seconds % 60)
+            return self._json(h, {"items": [{
+                "id": vid,
+                "snippet": {
+                    "title": f"Bench video {vid}",
+                    "description": _words(40, rnd),
+                    "channelTitle": "Bench channel",
+                    "publishedAt": "2024-01-01T00:00:00Z",
+                },
+                "statistics": {"viewCount": "1000", "likeCount": "10", "commentCount": "1"},
+                "contentDetails": {"duration": f"PT{minutes}M{seconds}S"},
+            }]})
+        if path == "/youtube/v3/channels":
+            return self._json(h, {"items": [{"snippet": {"title": "Bench channel"}}]})
+        if path == "/youtube/v3/search":
+            return self._json(h, {"items": [
+                {"id": {"videoId": f"bench{i:06d}"}, "snippet": {"title": f"Bench {i}", "channelId": "UCbench",
+                                                                  "channelTitle": "Bench channel"}}
+                for i in range(10)
+            ]})
+        if path == "/youtube/v3/captions":
+            return self._json(h, {"items": [{"snippet": {"language": "en", "trackKind": "standard", "name": ""}}]})
+        if path == "/api/timedtext":
+            cues = ["WEBVTT", ""]
+            for i in range(50):
+                cues += [f"00:00:{i:02d}.000 --> 00:00:{i + 1:02d}.000", _words(8, rnd), ""]
+            return self._send(h, 200, "\n".join(cues).encode(), "text/vtt")
+        if re.fullmatch(r"/media/[\w-]+\.wav", path):
+            body, status, extra = self.media, 200, {"Accept-Ranges": "bytes"}
+            m = re.match(r"bytes=(\d+)-(\d*)", h.headers.get("Range") or "")
+            if m:
+                start = int(m.group(1))
+                end = int(m.group(2)) if m.group(2) else len(self.media) - 1
+                body, status = self.media[start:end + 1], 206
+                extra["Content-Range"] = f"bytes {start}-{end}/{len(self.media)}"
+            return self._send(h, status, body, "audio/wav", extra, head=(method == "HEAD"))
+        if path == "/v1/audio/transcriptions":
+            # verbose_json superset: plain-json clients only read "text"
+            words = _words(self.transcript_words, rnd).split()
+            step = self.media_seconds / max(1, (len(words) + 9) // 10)
+            segments = [
+                {"id": n, "start": round(n * step, 3), "end": round((n + 1) * step, 3),
+                 "text": " " + " ".join(words[i:i + 10])}
+                for n, i in enumerate(range(0, len(words), 10))
+            ]
+            return self._json(h, {"text": " ".join(words), "duration": self.media_seconds, "segments": segments})
+        if path == "/v1/chat/completions":
+            return self._json(h, {
+                "choices": [{"message": {"content": "# Summary\n\n" + _words(60, rnd) + "\n\n- point one\n- point two"}}],
+                "usage": {"prompt_tokens": 1000, "completion_tokens": 120},
+            })
+        return self._json(h, {"error": "not found"}, status=404)
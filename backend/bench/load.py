@@ -0,0 +1,193 @@
+"""HTTP load test for the API.
+
+Logs in as seeded users (see ``backend.bench.seed``) and runs a weighted mix
+of scenarios from concurrent clients, then reports throughput and latency
+percentiles per scenario. Point it at a running server with ``--base-url``,
+or pass ``--db`` to serve a seeded database in-process.
+
+    python -m backend.bench.seed --db /tmp/load.db --videos 100000
+    python -m backend.bench.load --db /tmp/load.db --clients 16 --duration 60
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from backend.bench import describe, percentile
+from backend.bench.seed import PASSWORD
+
+DEFAULT_MIX = "videos=1,source_videos=2,feed=2,video_detail=8,login=1"
+
+
+class Session:
+    """Per-user state discovered through the API before the run."""
+
+    def __init__(self, base_url: str, email: str):
+        self.base_url = base_url
+        self.email = email
+        self.http = requests.Session()
+        self.token = ""
+        self.source_ids: List[int] = []
+        self.videos: List[tuple] = []  # (source_id, video_id)
+
+    def login(self) -> requests.Response:
+        r = self.http.post(f"{self.base_url}/auth/login", json={"email": self.email, "password": PASSWORD}, timeout=30)
+        if r.ok:
+            self.token = r.json()["token"]
+            self.http.headers["Authorization"] = f"Bearer {self.token}"
+        return r
+
+    def get(self, path: str) -> requests.Response:
+        return self.http.get(f"{self.base_url}{path}", timeout=60)
+
+    def prepare(self) -> None:
+        self.login()
+        self.source_ids = [s["id"] for s in self.get("/sources").json()]
+        feed = self.get("/feed?limit=100").json()
+        self.videos = [(v["source_id"], v["id"]) for v in feed.get("items", [])]
+
+
+SCENARIOS: Dict[str, Callable[[Session, random.Random], Optional[requests.Response]]] = {
+    "videos": lambda s, rnd: s.get("/videos"),
+    "source_videos": lambda s, rnd: s.get(f"/sources/{rnd.choice(s.source_ids)}/videos") if s.source_ids else None,
+    "feed": lambda s, rnd: s.get("/feed?limit=20"),
+    "video_detail": lambda s, rnd: s.get("/sources/{}/videos/{}".format(*rnd.choice(s.videos))) if s.videos else None,
+    "login": lambda s, rnd: s.login(),
+}
+
+
+def _parse_mix(mix: str) -> Dict[str, float]:
+    out = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        out[name] = float(weight or 1)
+    return out
+
+
+def run(base_url: str, users: int = 20, clients: int = 8, duration: float = 30.0,
+        mix: str = DEFAULT_MIX, seed: int = 1) -> Dict[str, Any]:
+    weights = _parse_mix(mix)
+    names, w = list(weights), list(weights.values())
+    sessions = [Session(base_url, f"load{i}@example.com") for i in range(users)]
+    for s in sessions:
+        s.prepare()
+    sessions = [s for s in sessions if s.token]
+    if not sessions:
+        raise SystemExit("No seeded users could log in; run backend.bench.seed first")
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(idx: int):
+        rnd = random.Random(seed + idx)
+        # Each client keeps its own session objects (requests.Session is not thread-safe)
+        mine = [Session(base_url, s.email) for s in sessions]
+        for m, s in zip(mine, sessions):
+            m.token, m.source_ids, m.videos = s.token, s.source_ids, s.videos
+            m.http.headers["Authorization"] = f"Bearer {s.token}"
+        while time.monotonic() < stop_at:
+            name = rnd.choices(names, w)[0]
+            t = time.monotonic()
+            try:
+                resp = SCENARIOS[name](rnd.choice(mine), rnd)
+                if resp is None:
+                    continue
+                ok = resp.ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.monotonic() - t
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "clients": clients,
+        "users": len(sessions),
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "scenarios": {
+            name: dict(describe(vals), p99=percentile(vals, 99), errors=errors.get(name, 0),
+                       rps=round(len(vals) / elapsed, 2) if elapsed else 0.0)
+            for name, vals in latencies.items()
+        },
+    }
+
+
+def format_report(r: Dict[str, Any]) -> str:
+    lines = [
+        f"clients={r['clients']} users={r['users']} elapsed={r['elapsed_seconds']}s "
+        f"requests={r['requests']} throughput={r['throughput_rps']} req/s",
+        "",
+        f"{'scenario':<14} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for name, st in sorted(r["scenarios"].items()):
+        lines.append(
+            f"{name:<14} {st['count']:>7} {st['errors']:>5} {st['rps']:>8.1f} {st['p50'] * 1000:>9.1f} "
+            f"{st['p95'] * 1000:>9.1f} {st['p99'] * 1000:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _serve_in_process(db_path: str) -> str:
+    """Serve a seeded database with the threaded werkzeug server on a free port."""
+    import logging
+    import os
+    from werkzeug.serving import make_server
+    from backend import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(db_path)}",
+        "BACKGROUND_TASKS": False,
+    })
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="HTTP load test against a seeded database")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="URL of a running server")
+    target.add_argument("--db", help="seeded SQLite file to serve in-process")
+    ap.add_argument("--users", type=int, default=20, help="seeded users to log in as")
+    ap.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default: {DEFAULT_MIX})")
+    ap.add_argument("--json", dest="json_path", help="also write the report as JSON to this path")
+    args = ap.parse_args(argv)
+
+    base_url = args.base_url or _serve_in_process(args.db)
+    report = run(base_url, users=args.users, clients=args.clients, duration=args.duration, mix=args.mix)
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
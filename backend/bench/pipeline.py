@@ -0,0 +1,224 @@
+"""End-to-end pipeline benchmark against local fake services.
+
+Adds N videos through ``POST /sources/<id>/videos`` (which queues
+``_run_full_pipeline`` on the pipeline scheduler), runs at most
+``--concurrency`` pipelines at once, and reports per-stage p50/p95 latency,
+videos per minute and peak memory. ``--background M`` first queues M
+backfill-priority videos; ``wait_<priority>`` rows show how long runs of
+each class sat in the queue. No real YouTube or OpenAI quota is used.
+
+    python -m backend.bench.pipeline --videos 20 --concurrency 4 --latency 0.05
+    python -m backend.bench.pipeline --videos 5 --background 40 --concurrency 2
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from backend.bench import describe
+from backend.bench.fakes import FakeServices
+
+
+def run(
+    videos: int = 10,
+    concurrency: int = 4,
+    background: int = 0,
+    latency: float = 0.05,
+    error_rate: float = 0.0,
+    media_seconds: float = 10.0,
+    provider: Optional[str] = None,
+    timeout: float = 600.0,
+    trace_memory: bool = False,
+) -> Dict[str, Any]:
+    if provider:
+        from backend.ai_ops import get_transcriber
+
+        get_transcriber(provider)  # ValueError for unknown providers
+    fakes = FakeServices(latency=latency, error_rate=error_rate, media_seconds=media_seconds, seed=1).start()
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    old_env = {k: os.environ.get(k) for k in fakes.env()}
+    os.environ.update(fakes.env())
+    try:
+        from backend import create_app, scheduler, signals
+
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "VIDEO_DIR": os.path.join(workdir, "videos"),
+            "AUDIO_DIR": os.path.join(workdir, "audio"),
+            "CAPTIONS_DIR": os.path.join(workdir, "captions"),
+            "BACKGROUND_TASKS": False,
+        })
+        app.logger.setLevel(logging.WARNING)
+
+        stages = defaultdict(list)
+        failures = defaultdict(int)
+        statuses = defaultdict(int)
+        lock = threading.Lock()
+        done = threading.Semaphore(0)
+
+        def on_stage(video_id, stage, seconds, ok, bytes):
+            with lock:
+                stages[stage].append(seconds)
+                if not ok:
+                    failures[stage] += 1
+
+        def on_finished(video_id, status, seconds):
+            with lock:
+                stages["pipeline"].append(seconds)
+                statuses[status] += 1
+            done.release()
+
+        signals.pipeline_stage.connect(on_stage, weak=False)
+        signals.pipeline_finished.connect(on_finished, weak=False)
+
+        queued_at: Dict[int, tuple] = {}
+
+        def on_started(video_id):
+            with lock:
+                priority, t = queued_at.pop(video_id, ("unknown", time.monotonic()))
+                stages[f"wait_{priority}"].append(time.monotonic() - t)
+
+        signals.pipeline_started.connect(on_started, weak=False)
+
+        # The pipeline scheduler bounds the runs in flight
+        scheduler.configure(workers=concurrency)
+
+        client = app.test_client()
+        token = client.post(
+            "/auth/register", json={"name": "bench", "email": "bench@example.com", "password": "bench"}
+        ).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        source_id = client.post(
+            "/sources", json={"type": "youtube_channel", "value": "https://www.youtube.com/channel/UCbench"},
+            headers=headers,
+        ).get_json()["id"]
+
+        # Load yt-dlp's extractor registry up front so the first video doesn't pay for it
+        from yt_dlp import YoutubeDL
+        from yt_dlp.extractor import gen_extractor_classes
+        gen_extractor_classes()
+        YoutubeDL({"quiet": True}).close()
+
+        # tracemalloc slows allocation-heavy code (yt-dlp) by an order of magnitude,
+        # so Python-heap tracing is opt-in; max RSS is always reported.
+        if trace_memory:
+            tracemalloc.start()
+        peak_traced = 0
+        started = time.monotonic()
+        try:
+            # Background videos go in first, so interactive ones have to overtake them
+            for i in range(background + videos):
+                priority = "backfill" if i < background else "interactive"
+                body = {"url": f"https://www.youtube.com/watch?v=bench{i:06d}", "priority": priority}
+                if provider:
+                    body["provider"] = provider
+                t = time.monotonic()
+                with lock:
+                    resp = client.post(f"/sources/{source_id}/videos", json=body, headers=headers)
+                    queued_at[resp.get_json()["id"]] = (priority, t)
+                stages["add_video"].append(time.monotonic() - t)
+            deadline = started + timeout
+            for _ in range(background + videos):
+                if not done.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    break
+            elapsed = time.monotonic() - started
+            if trace_memory:
+                _, peak_traced = tracemalloc.get_traced_memory()
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            scheduler.get_scheduler().shutdown()
+            signals.pipeline_started.disconnect(on_started)
+            signals.pipeline_stage.disconnect(on_stage)
+            signals.pipeline_finished.disconnect(on_finished)
+
+        finished = statuses.get("finished", 0)
+        return {
+            "videos": videos,
+            "background": background,
+            "concurrency": concurrency,
+            "elapsed_seconds": round(elapsed, 3),
+            "statuses": dict(statuses),
+            "videos_per_minute": round(finished / elapsed * 60, 2) if elapsed else 0.0,
+            "stages": {
+                name: dict(describe(vals), failures=failures.get(name, 0))
+                for name, vals in stages.items()
+            },
+            "peak_traced_mb": round(peak_traced / 1024 / 1024, 2) if trace_memory else None,
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+            "external_calls": dict(fakes.calls),
+            "injected_errors": dict(fakes.errors),
+        }
+    finally:
+        fakes.stop()
+        for k, v in old_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_report(r: Dict[str, Any]) -> str:
+    lines = [
+        f"videos={r['videos']} background={r['background']} concurrency={r['concurrency']} "
+        f"elapsed={r['elapsed_seconds']}s "
+        f"statuses={r['statuses']}",
+        f"throughput: {r['videos_per_minute']} videos/min",
+        f"memory: max RSS {r['max_rss_mb']} MB"
+        + (f", peak traced Python heap {r['peak_traced_mb']} MB" if r["peak_traced_mb"] is not None else ""),
+        "",
+        f"{'stage':<18} {'count':>6} {'fail':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}",
+    ]
+    for name, st in sorted(r["stages"].items()):
+        lines.append(
+            f"{name:<18} {st['count']:>6} {st['failures']:>5} {st['p50'] * 1000:>9.1f} "
+            f"{st['p95'] * 1000:>9.1f} {st['max'] * 1000:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--videos", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=4, help="pipeline scheduler workers")
+    ap.add_argument("--background", type=int, default=0,
+                    help="backfill-priority videos queued before the interactive ones")
+    ap.add_argument("--latency", type=float, default=0.05, help="mean latency of fake services (seconds)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake requests failing with 503")
+    ap.add_argument("--media-seconds", type=float, default=10.0, help="length of the generated audio")
+    ap.add_argument("--provider", default=None, help="transcription provider (default: TRANSCRIBE_PROVIDER)")
+    ap.add_argument("--timeout", type=float, default=600.0)
+    ap.add_argument("--trace-memory", action="store_true", help="also report peak Python heap (slow)")
+    ap.add_argument("--json", dest="json_path", help="also write the report as JSON to this path")
+    args = ap.parse_args(argv)
+
+    report = run(
+        videos=args.videos,
+        concurrency=args.concurrency,
+        background=args.background,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        media_seconds=args.media_seconds,
+        provider=args.provider,
+        timeout=args.timeout,
+        trace_memory=args.trace_memory,
+    )
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["statuses"].get("finished", 0) == args.videos + args.background else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
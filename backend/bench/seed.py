@@ -0,0 +1,130 @@
+"""Seed a SQLite database with users, sources and videos for load tests.
+
+Rows are written straight through ``sqlite3.executemany`` (the ORM would take
+minutes for 100k videos). Every user gets the same password so the load test
+can log in as any of them. Running it again on the same file keeps existing
+users and sources and adds ``--videos`` more videos.
+
+    python -m backend.bench.seed --db /tmp/load.db --users 100 --sources-per-user 5 --videos 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "loadtest"
+
+_WORDS = (
+    "the a of and to in market report interview analysis policy growth energy climate research "
+    "data model team product launch release update review season match result history future "
+    "people question answer because which about really think going know"
+).split()
+
+
+def _text(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(words))
+
+
+def seed(db_path: str, users: int = 100, sources_per_user: int = 5, videos: int = 100_000,
+         transcript_words: int = 2500, seed_value: int = 1, batch: int = 2000) -> dict:
+    """Create the schema via the app and bulk-insert rows. Returns row counts."""
+    from backend import create_app
+
+    db_path = os.path.abspath(db_path)
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "BACKGROUND_TASKS": False})
+
+    rnd = random.Random(seed_value)
+    # Hash once: generating a hash per user would dominate seeding time
+    pw_hash = generate_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    created = now.strftime("%Y-%m-%d %H:%M:%S.%f")  # SQLAlchemy's SQLite DateTime format
+    started = time.monotonic()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT OR IGNORE INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+        [(f"Load User {i}", f"load{i}@example.com", pw_hash) for i in range(users)],
+    )
+    user_ids = [r[0] for r in cur.execute("SELECT id FROM users WHERE email LIKE 'load%@example.com'")]
+    cur.executemany(
+        "INSERT INTO sources (user_id, type, value, label, metadata_status, created_at, updated_at) "
+        "SELECT ?, 'youtube_channel', ?, ?, 'ready', ?, ? "
+        "WHERE NOT EXISTS (SELECT 1 FROM sources WHERE user_id = ? AND value = ?)",
+        [
+            (uid, value, f"Channel {uid}-{j}", created, created, uid, value)
+            for uid in user_ids for j in range(sources_per_user)
+            for value in [f"https://www.youtube.com/channel/UCload{uid:05d}{j:02d}"]
+        ],
+    )
+    sources = list(cur.execute(
+        "SELECT id, user_id FROM sources WHERE value LIKE 'https://www.youtube.com/channel/UCload%'"
+    ))
+    conn.commit()
+
+    # Transcript sizes vary around the requested mean (short clips to long talks).
+    # Numbering continues after the videos of earlier runs, so their URLs stay unique.
+    offset = cur.execute(
+        "SELECT COUNT(*) FROM videos WHERE url LIKE 'https://www.youtube.com/watch?v=ld%'"
+    ).fetchone()[0]
+    inserted = 0
+    while inserted < videos:
+        rows = []
+        for _ in range(min(batch, videos - inserted)):
+            src_id, user_id = rnd.choice(sources)
+            words = max(50, int(rnd.lognormvariate(0, 0.6) * transcript_words))
+            published = (now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365))).strftime("%Y-%m-%dT%H:%M:%SZ")
+            n = offset + inserted
+            rows.append((
+                src_id, f"https://www.youtube.com/watch?v=ld{n:09d}", f"Load video {n}",
+                _text(rnd, words), "# Summary\n\n" + _text(rnd, 80), "", "", "ready",
+                "Channel", _text(rnd, 40), rnd.randint(0, 10 ** 6), rnd.randint(0, 10 ** 4), None,
+                rnd.randint(0, 1000), published, rnd.randint(60, 3600), "ready", created, created,
+            ))
+            inserted += 1
+        cur.executemany(
+            "INSERT INTO videos (source_id, url, title, transcribe, summary, audio_path, audio_status, "
+            "transcribe_status, channel_title, description, view_count, like_count, dislike_count, "
+            "comment_count, published_at, duration_seconds, metadata_status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    # Materialize feeds for the seeded videos (same rows the pipeline fan-out would write)
+    cur.execute(
+        "INSERT OR IGNORE INTO feed_items (user_id, video_id, source_id, published_at, created_at) "
+        "SELECT s.user_id, v.id, s.id, v.published_at, v.created_at FROM videos v "
+        "JOIN sources s ON s.id = v.source_id WHERE v.url LIKE 'https://www.youtube.com/watch?v=ld%'"
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return {
+        "users": len(user_ids),
+        "sources": len(sources),
+        "videos": inserted,
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Seed a database for load tests")
+    ap.add_argument("--db", required=True, help="SQLite file to create or extend")
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--sources-per-user", type=int, default=5)
+    ap.add_argument("--videos", type=int, default=100_000)
+    ap.add_argument("--transcript-words", type=int, default=2500, help="mean words per transcript")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    print(seed(args.db, args.users, args.sources_per_user, args.videos, args.transcript_words, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
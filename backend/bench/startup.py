@@ -0,0 +1,180 @@
+"""Cold-start benchmark: import time, ``create_app()`` time and first request.
+
+Every sample runs in a fresh interpreter, so module caches don't hide import
+cost. Samples run against a database that is already at the current schema
+version (the normal restart case); one extra run against an empty database
+measures the first-boot migration. ``--importtime`` lists the slowest
+imports, ``--budget-ms`` fails the run when boot (import + create_app) p50
+exceeds the budget, and ``--history`` appends the result, tagged with
+``git describe``, to a JSON-lines file so boot time can be compared release
+to release.
+
+    python -m backend.bench.startup --runs 10 --budget-ms 1500 --history startup-history.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.bench import describe
+
+# Modules that should only load when a code path needs them
+HEAVY_MODULES = ("requests", "urllib3", "youtube_transcript_api", "yt_dlp", "faster_whisper", "numpy", "scipy")
+
+_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import backend
+t1 = time.perf_counter()
+app = backend.create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "BACKGROUND_TASKS": False})
+t2 = time.perf_counter()
+resp = app.test_client().get("/")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "status": resp.status_code,
+    "heavy_modules": [m for m in json.loads(sys.argv[2]) if m in sys.modules],
+}))
+"""
+
+
+def _project_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _probe(db_uri: str, extra_args: Optional[List[str]] = None) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = _project_root() + os.pathsep + env.get("PYTHONPATH", "")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable] + (extra_args or []) + ["-c", _PROBE, db_uri, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["process_ms"] = (time.perf_counter() - started) * 1000
+    out["stderr"] = proc.stderr
+    return out
+
+
+def _slowest_imports(importtime_stderr: str, top: int) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into the slowest imports by cumulative time."""
+    rows = []
+    for line in importtime_stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        name = name.rstrip()
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--tags"],
+            capture_output=True, text=True, cwd=_project_root(), check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(runs: int = 10, db_path: Optional[str] = None, importtime: bool = False, top: int = 15) -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix="bench-startup-")
+    try:
+        cold_db = os.path.join(tmp, "cold.db")
+        cold = _probe(f"sqlite:///{cold_db}")
+        warm_uri = f"sqlite:///{os.path.abspath(db_path)}" if db_path else f"sqlite:///{cold_db}"
+        _probe(warm_uri)  # make sure the warm database is at the current schema version
+        samples = [_probe(warm_uri) for _ in range(runs)]
+        slowest = _slowest_imports(_probe(warm_uri, ["-X", "importtime"])["stderr"], top) if importtime else None
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    report: Dict[str, Any] = {
+        "version": _git_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "runs": runs,
+        "database": db_path or "empty",
+        "import_ms": describe(s["import_ms"] for s in samples),
+        "create_app_ms": describe(s["create_app_ms"] for s in samples),
+        "boot_ms": describe(s["import_ms"] + s["create_app_ms"] for s in samples),
+        "first_request_ms": describe(s["first_request_ms"] for s in samples),
+        "process_ms": describe(s["process_ms"] for s in samples),
+        "first_boot_create_app_ms": cold["create_app_ms"],
+        "heavy_modules_at_boot": sorted({m for s in samples for m in s["heavy_modules"]}),
+    }
+    if slowest is not None:
+        report["slowest_imports"] = slowest
+    return report
+
+
+def _load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_report(report: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> str:
+    lines = [f"version={report['version']} python={report['python']} runs={report['runs']} db={report['database']}", ""]
+    lines.append(f"{'phase':<18}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'prev p50':>10}")
+    for key, label in (("import_ms", "import backend"), ("create_app_ms", "create_app"),
+                       ("boot_ms", "boot total"), ("first_request_ms", "first request"),
+                       ("process_ms", "process")):
+        d = report[key]
+        prev = f"{previous[key]['p50']:.1f}" if previous and key in previous else "-"
+        lines.append(f"{label:<18}{d['p50']:>10.1f}{d['p95']:>10.1f}{d['max']:>10.1f}{prev:>10}")
+    lines.append(f"first boot (migrating) create_app: {report['first_boot_create_app_ms']:.1f} ms")
+    heavy = report["heavy_modules_at_boot"]
+    lines.append(f"heavy modules loaded at boot: {', '.join(heavy) if heavy else 'none'}")
+    if report.get("slowest_imports"):
+        lines += ["", f"{'cumulative ms':>14}  module"]
+        for row in report["slowest_imports"]:
+            lines.append(f"{row['cumulative_ms']:>14.1f}  {'  ' * row['depth']}{row['module']}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Measure import and create_app time in fresh interpreters")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--db", help="existing SQLite file to boot against (default: a scratch database)")
+    ap.add_argument("--importtime", action="store_true", help="list the slowest imports (-X importtime)")
+    ap.add_argument("--top", type=int, default=15, help="rows for --importtime")
+    ap.add_argument("--budget-ms", type=float, help="fail (exit 1) when boot p50 exceeds this")
+    ap.add_argument("--history", help="JSON-lines file to compare against and append this result to")
+    ap.add_argument("--json", dest="json_path", help="also write the report as JSON to this path")
+    args = ap.parse_args(argv)
+
+    report = run(runs=args.runs, db_path=args.db, importtime=args.importtime, top=args.top)
+    history = _load_history(args.history) if args.history else []
+    previous = history[-1] if history else None
+    print(format_report(report, previous))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps({k: v for k, v in report.items() if k != "slowest_imports"}) + "\n")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.budget_ms is not None and report["boot_ms"]["p50"] > args.budget_ms:
+        print(f"\nboot p50 {report['boot_ms']['p50']:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Response compression negotiated via ``Accept-Encoding``.
+
+Text-like responses of at least COMPRESS_MIN_BYTES are compressed with
+brotli (if the ``brotli`` package is installed and the client accepts
+``br``) or gzip. Streamed responses are compressed chunk by chunk as they
+are produced.
+"""
+import gzip
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only
+    brotli = None
+
+
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def _accepted(header: str) -> dict:
+    """``Accept-Encoding`` as {coding: q}."""
+    out = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        out[coding.strip().lower()] = q
+    return out
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    accepted = _accepted(header)
+
+    def q(coding):
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    if brotli is not None and q("br") > 0 and q("br") >= q("gzip"):
+        return "br"
+    if q("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int) -> Iterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def init_app(app) -> None:
+    @app.after_request
+    def compress_response(resp):
+        min_bytes = app.config["COMPRESS_MIN_BYTES"]
+        if min_bytes < 0 or resp.status_code < 200 or resp.status_code in (204, 206, 304):
+            return resp
+        if resp.direct_passthrough or "Content-Encoding" in resp.headers:
+            return resp
+        if not (resp.mimetype or "").startswith(_COMPRESSIBLE):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return resp
+        level = app.config["COMPRESS_LEVEL"]
+
+        if resp.is_streamed:
+            resp.response = compress_stream(resp.response, encoding, level)
+            resp.headers.pop("Content-Length", None)
+        else:
+            data = resp.get_data()
+            if len(data) < min_bytes:
+                return resp
+            if encoding == "br":
+                resp.set_data(brotli.compress(data, quality=min(level, 11)))
+            else:
+                resp.set_data(gzip.compress(data, compresslevel=level))
+        resp.headers["Content-Encoding"] = encoding
+        return resp
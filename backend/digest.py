@@ -0,0 +1,310 @@
+"""Per-user daily digests, built in an off-peak batch.
+
+Once a day, inside DIGEST_WINDOW (server local time, default 02:00-05:00),
+one process claims the ``digest:batch`` task and builds a digest for every
+user whose feed received videos since their last digest. A digest reuses the
+stored video summaries (an excerpt of each, grouped by source) under a short
+overview written by the LLM from those excerpts; the rendered Markdown is
+stored in ``digests`` and served as-is by ``GET /feed/digest``.
+
+Overview calls are made one at a time from the batch thread, at most
+DIGEST_LLM_RPM per minute, with as many videos per request as
+DIGEST_PROMPT_TOKENS allows; they wait while interactive pipeline runs are
+queued and are memoized like summaries, so users following the same channels
+share them. Without OPENAI_API_KEY digests are built without an overview.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from backend import accounting, ai_ops, summary_cache, task_state
+from backend.extensions import db
+from backend.models.digest import Digest
+from backend.models.feed_item import FeedItem
+from backend.models.source import Source
+from backend.models.video import Video
+
+BATCH_KEY = "digest:batch"
+
+DIGEST_SYSTEM_PROMPT = (
+    "You write the opening of a personal daily video digest. "
+    "Given short summaries of new videos, write one paragraph naming the main themes, "
+    "then a bulleted list of the 3-5 videos most worth watching and why. Respond in Markdown without headings."
+)
+
+_MERGE_PREAMBLE = "These are digest notes on consecutive batches of the same day's videos; merge them into one."
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def parse_window(value: str) -> Tuple[int, int]:
+    """``"HH:MM-HH:MM"`` as minutes after midnight; the window may wrap past midnight."""
+    try:
+        start, end = (part.strip() for part in value.split("-"))
+        sh, sm = (int(x) for x in start.split(":"))
+        eh, em = (int(x) for x in end.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid digest window '{value}', expected HH:MM-HH:MM")
+    return sh * 60 + sm, eh * 60 + em
+
+
+def in_window(now: datetime, window: Tuple[int, int]) -> bool:
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+class RateLimiter:
+    """Spaces calls at least ``60 / per_minute`` seconds apart (blocking)."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> float:
+        """Block until the next slot; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(_env_float("DIGEST_LLM_RPM", 20))
+        return _limiter
+
+
+def _interactive_queued() -> int:
+    from flask import current_app
+
+    from backend import job_queue
+    from backend.scheduler import get_scheduler
+
+    if current_app.config.get("PIPELINE_MODE") == "queue":
+        return job_queue.stats()["queued"]["interactive"]
+    return get_scheduler().stats()["queued"]["interactive"]
+
+
+def _yield_to_interactive(max_wait: float) -> None:
+    """Hold off while users have pipeline runs queued (their summaries come first)."""
+    deadline = time.monotonic() + max_wait
+    while _interactive_queued() and time.monotonic() < deadline:
+        time.sleep(5)
+
+
+def _llm(system: str, text: str, calls: Dict[str, int]) -> str:
+    model = ai_ops.resolve_summary_model()
+
+    def generate() -> str:
+        _yield_to_interactive(_env_float("DIGEST_YIELD_SECONDS", 300))
+        get_limiter().wait()
+        calls["llm_calls"] += 1
+        return ai_ops.chat(system, text, max_tokens=600, model=model)
+
+    return summary_cache.memoized(text, model, f"digest\x00{system}", generate)
+
+
+def excerpt(summary: str, max_chars: int) -> str:
+    """Plain opening of a Markdown summary: headings dropped, cut at a word boundary."""
+    lines = [ln.strip() for ln in (summary or "").splitlines()]
+    text = " ".join(ln for ln in lines if ln and not ln.startswith("#"))
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + " …"
+
+
+def _entries(user_id: int, since: datetime, until: datetime) -> List[Tuple[Video, str]]:
+    """Videos that reached the user's feed in ``[since, until)``, newest first, with their source label."""
+    rows = (
+        db.session.query(Video, Source.label, Source.value)
+        .join(FeedItem, FeedItem.video_id == Video.id)
+        .join(Source, Source.id == FeedItem.source_id)
+        .filter(FeedItem.user_id == user_id, FeedItem.created_at >= since, FeedItem.created_at < until)
+        .order_by(FeedItem.published_at.desc(), FeedItem.video_id.desc())
+        .limit(_env_int("DIGEST_MAX_VIDEOS", 50))
+        .all()
+    )
+    return [(v, v.channel_title or label or value) for v, label, value in rows]
+
+
+def overview(entries: List[Tuple[Video, str]], calls: Dict[str, int]) -> str:
+    """LLM overview of the entries' summaries, packed into as few requests as the token budget allows."""
+    if not os.environ.get("OPENAI_API_KEY"):
+        return ""
+    budget = _env_int("DIGEST_PROMPT_TOKENS", 4000)
+    lines = [
+        f"- {v.title or v.url} ({source}): {excerpt(v.summary, 400)}"
+        for v, source in entries if (v.summary or "").strip()
+    ]
+    if not lines:
+        return ""
+    batches = ai_ops.split_transcript("\n".join(lines), budget)
+    notes = [n for n in (_llm(DIGEST_SYSTEM_PROMPT, b, calls) for b in batches) if n]
+    if len(notes) <= 1:
+        return notes[0] if notes else ""
+    return _llm(DIGEST_SYSTEM_PROMPT, f"{_MERGE_PREAMBLE}\n\n" + "\n\n".join(notes), calls)
+
+
+def render(entries: List[Tuple[Video, str]], intro: str, since: datetime, until: datetime) -> str:
+    excerpt_chars = _env_int("DIGEST_EXCERPT_CHARS", 600)
+    out = [
+        f"# Your digest: {len(entries)} new video{'s' if len(entries) != 1 else ''}",
+        f"_{since:%Y-%m-%d %H:%M} – {until:%Y-%m-%d %H:%M} UTC_",
+        "",
+    ]
+    if intro:
+        out += [intro, ""]
+    by_source: Dict[str, List[Video]] = {}
+    for v, source in entries:
+        by_source.setdefault(source, []).append(v)
+    for source, videos in by_source.items():
+        out += [f"## {source}", ""]
+        for v in videos:
+            out.append(f"### [{v.title or v.url}]({v.url})")
+            text = excerpt(v.summary, excerpt_chars)
+            out += ([text, ""] if text else [""])
+    return "\n".join(out).rstrip() + "\n"
+
+
+def build_digest(user_id: int, until: datetime, calls: Optional[Dict[str, int]] = None) -> Optional[Digest]:
+    """Build and store the user's digest of videos since their last one. None if there were none."""
+    calls = calls if calls is not None else {"llm_calls": 0}
+    last = db.session.query(func.max(Digest.until)).filter(Digest.user_id == user_id).scalar()
+    since = last or until - timedelta(hours=_env_float("DIGEST_FIRST_HOURS", 24))
+    entries = _entries(user_id, since, until)
+    if not entries:
+        return None
+    intro = overview(entries, calls)
+    d = Digest(
+        user_id=user_id,
+        since=since,
+        until=until,
+        video_count=len(entries),
+        video_ids=json.dumps([v.id for v, _ in entries]),
+        markdown=render(entries, intro, since, until),
+        model=ai_ops.resolve_summary_model() if intro else "",
+    )
+    db.session.add(d)
+    db.session.commit()
+    return d
+
+
+def users_due(until: datetime) -> List[int]:
+    """Users with feed items newer than their last digest (or the first-digest lookback)."""
+    first_since = until - timedelta(hours=_env_float("DIGEST_FIRST_HOURS", 24))
+    last = (
+        db.session.query(Digest.user_id, func.max(Digest.until).label("until"))
+        .group_by(Digest.user_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(FeedItem.user_id)
+        .outerjoin(last, last.c.user_id == FeedItem.user_id)
+        .filter(FeedItem.created_at < until, FeedItem.created_at >= func.coalesce(last.c.until, first_since))
+        .distinct()
+        .order_by(FeedItem.user_id)
+        .all()
+    )
+    return [uid for (uid,) in rows]
+
+
+def run_batch(until: Optional[datetime] = None) -> Dict[str, Any]:
+    """Build the digests of every user due at ``until`` (default now). Returns counters."""
+    until = until or datetime.utcnow()
+    started = time.monotonic()
+    result: Dict[str, Any] = {"users": 0, "digests": 0, "videos": 0, "failed": 0, "llm_calls": 0}
+    for user_id in users_due(until):
+        result["users"] += 1
+        try:
+            with accounting.job("digest", user_id=user_id):
+                d = build_digest(user_id, until, result)
+        except Exception:
+            logging.getLogger(__name__).exception("Digest for user_id=%s failed", user_id)
+            db.session.rollback()
+            result["failed"] += 1
+            continue
+        if d is not None:
+            result["digests"] += 1
+            result["videos"] += d.video_count
+    result["seconds"] = round(time.monotonic() - started, 3)
+    logging.getLogger(__name__).info("Digest batch: %s", result)
+    return result
+
+
+def _run_claimed(app, day: Optional[str]) -> None:
+    with app.app_context():
+        try:
+            result = run_batch()
+        except Exception as e:
+            app.logger.warning("Digest batch failed: %s", e)
+            db.session.rollback()
+            task_state.update(BATCH_KEY, status="idle", error=str(e))
+            return
+        fields = {"day": day} if day else {}
+        task_state.update(BATCH_KEY, status="idle", last_run=time.time(), error=None, **fields, **result)
+
+
+def trigger(app) -> bool:
+    """Run the batch now in a background thread (outside the window). False if one is running."""
+    if not task_state.claim(BATCH_KEY, status="processing"):
+        return False
+    threading.Thread(target=_run_claimed, args=(app, None), name="digest-batch", daemon=True).start()
+    return True
+
+
+def start_scheduler(app) -> None:
+    """Check every DIGEST_CHECK_SECONDS (0 disables) whether today's batch is due in DIGEST_WINDOW."""
+    interval = float(app.config.get("DIGEST_CHECK_SECONDS") or 0)
+    if interval <= 0:
+        return
+    window = parse_window(app.config["DIGEST_WINDOW"])
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            now = datetime.now()
+            if not in_window(now, window):
+                continue
+            day = now.date().isoformat()
+            with app.app_context():
+                if (task_state.get(BATCH_KEY) or {}).get("day") == day:
+                    continue
+                # One batch per day across worker processes
+                if not task_state.claim(BATCH_KEY, status="processing"):
+                    continue
+            _run_claimed(app, day)
+
+    threading.Thread(target=loop, name="digest-scheduler", daemon=True).start()
@@ -3,24 +3,30 @@ import shutil
 import threading
 from typing import Any, Dict
 
+from backend import task_state
 
-_lock = threading.Lock()
-_state: Dict[int, Dict[str, Any]] = {}
+
+_ACTIVE = {"queued", "starting", "downloading", "processing"}
+
+
+def _key(video_id: int) -> str:
+    return f"download:{video_id}"
 
 
 def get_status(video_id: int) -> Dict[str, Any]:
-    """Return a copy of the current download state for a video id."""
-    with _lock:
-        return dict(_state.get(video_id, {"status": "idle", "progress": 0}))
+    """Return a copy of the current download state for a video id (shared across processes)."""
+    return task_state.get(_key(video_id)) or {"status": "idle", "progress": 0}
 
 
 def _set_status(video_id: int, **kwargs):
-    with _lock:
-        st = _state.setdefault(video_id, {"status": "idle", "progress": 0})
-        st.update(kwargs)
+    task_state.update(_key(video_id), **kwargs)
 
 
 def _progress_hook_factory(video_id: int):
+    # Last values written to the store; yt-dlp calls the hook for every chunk,
+    # so only write when the visible status or percentage changes.
+    last = {"status": None, "progress": -1}
+
     def hook(d: Dict[str, Any]):
         status = d.get("status")
         if status == "downloading":
@@ -41,11 +47,12 @@ def _progress_hook_factory(video_id: int):
                     percent = 0
             else:
                 # No total and no fragments; provide a monotonic visual hint up to 95%
-                with _lock:
-                    cur = _state.get(video_id) or {}
-                    cur_prog = int(cur.get("progress") or 0)
+                cur_prog = max(0, last["progress"])
                 if downloaded > 0:
                     percent = min(95, cur_prog + 1)
+            if last["status"] == "downloading" and last["progress"] == percent:
+                return
+            last["status"], last["progress"] = "downloading", percent
             _set_status(
                 video_id,
                 status="downloading",
@@ -55,17 +62,16 @@ def _progress_hook_factory(video_id: int):
                 tmpfilename=d.get("tmpfilename"),
             )
         elif status == "finished":
+            last["status"], last["progress"] = "processing", 100
             _set_status(video_id, status="processing", progress=100)
     return hook
 
 
 def queue_download(app, video_id: int, url: str) -> None:
-    """Queue a background download once per video id (idempotent)."""
-    with _lock:
-        cur = _state.get(video_id)
-        if cur and cur.get("status") in {"queued", "starting", "downloading", "processing"}:
+    """Queue a background download once per video id (idempotent across processes)."""
+    with app.app_context():
+        if not task_state.claim(_key(video_id), status="queued", active=_ACTIVE):
             return
-        _state[video_id] = {"status": "queued", "progress": 0}
 
     def worker():
         from flask import current_app as _ca
@@ -87,8 +93,8 @@ def queue_download(app, video_id: int, url: str) -> None:
                 _set_status(video_id, status="error", error="ffmpeg required to extract audio-only mp4")
                 return
 
-            # Audio-only download with postprocessing to m4a (MP4 audio)
-            fmt = "bestaudio/best"
+            # Audio-only download; converted to m4a (MP4 audio) below if needed
+            fmt = "bestaudio[ext=m4a]/bestaudio/best"
 
             ydl_opts: Dict[str, Any] = {
                 "format": fmt,
@@ -102,14 +108,7 @@ def queue_download(app, video_id: int, url: str) -> None:
                 "extractor_retries": 3,
                 "noplaylist": True,
                 "ignoreerrors": False,
-                "postprocessors": [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "m4a",
-                        "preferredquality": "0",
-                    },
-                    {"key": "FFmpegMetadata"},
-                ],
+                # Conversion to m4a runs afterwards through the transcode pool
                 "progress_hooks": [_progress_hook_factory(video_id)],
             }
 
@@ -128,30 +127,37 @@ def queue_download(app, video_id: int, url: str) -> None:
                 # Normalize to a canonical watch URL to avoid playlists/mixes/etc.
                 canonical_url = url
                 try:
-                    from backend.youtube_captions import extract_video_id as _extract
+                    from backend.youtube_captions import extract_video_id as _extract, watch_url
                     vid_key = _extract(url)
                     if vid_key:
-                        canonical_url = f"https://www.youtube.com/watch?v={vid_key}"
+                        canonical_url = watch_url(vid_key)
                 except Exception:
                     pass
 
                 with YoutubeDL(ydl_opts) as ydl:
                     info = ydl.extract_info(canonical_url, download=True)
-                    # Expected output from FFmpegExtractAudio is .m4a
                     base = ydl.prepare_filename(info)
                     base_no_ext, _ = os.path.splitext(base)
-                    produced_m4a = base_no_ext + ".m4a"
-                    candidate = produced_m4a if os.path.exists(produced_m4a) else None
+                    candidate = base if os.path.exists(base) else None
                     if not candidate:
                         # Fallback: search for any common audio extension with same base
-                        for ext in (".m4a", ".mp4", ".aac", ".mp3", ".webm", ".wav"):
+                        for ext in (".m4a", ".mp4", ".aac", ".mp3", ".webm", ".opus", ".wav"):
                             p = base_no_ext + ext
                             if os.path.exists(p):
                                 candidate = p
                                 break
                     if not candidate:
                         raise RuntimeError("Audio file not produced")
-                    abs_path = os.path.abspath(candidate)
+                if not candidate.endswith(".m4a"):
+                    from backend.transcode import run_ffmpeg
+                    produced_m4a = base_no_ext + ".m4a"
+                    run_ffmpeg(
+                        ["-y", "-i", candidate, "-vn", "-c:a", "aac", "-b:a", "192k", produced_m4a],
+                        label=f"extract-audio {video_id}",
+                    )
+                    os.remove(candidate)
+                    candidate = produced_m4a
+                abs_path = os.path.abspath(candidate)
                 _set_status(video_id, status="finished", progress=100, file_path=abs_path)
                 # Persist audio_path to DB (project-relative), mark ready
                 try:
@@ -164,6 +170,8 @@ def queue_download(app, video_id: int, url: str) -> None:
                         v.audio_path = rel_path
                         v.audio_status = "ready"
                         db.session.commit()
+                    from backend import storage
+                    storage.track(abs_path, video_id)
                 except Exception:
                     pass
             except Exception as e:
@@ -0,0 +1,231 @@
+"""Background metadata enrichment for new videos and sources.
+
+``add_video`` and ``add_source`` insert their row immediately and hand the
+YouTube Data API lookups to a small bounded executor, so request latency no
+longer depends on Google's. Each job updates the row (``metadata_status``
+goes from ``pending`` to ``ready`` / ``failed``, ``updated_at`` moves) and
+sends ``signals.metadata_updated``; clients pick the change up through
+``GET /videos/changes`` or ``GET /sources?since=``.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from backend import accounting, feed, http_client, signals, task_state, tracing
+from backend.extensions import db
+from backend.models.source import Source
+from backend.models.video import Video
+from backend.youtube_captions import extract_video_id, youtube_api_url
+
+
+_ISO_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def parse_duration(value: Optional[str]) -> Optional[int]:
+    """ISO 8601 duration from ``contentDetails.duration`` (e.g. ``PT1H2M3S``) to seconds."""
+    m = _ISO_DURATION_RE.match(value or "")
+    if not m or not any(m.groupdict().values()):
+        return None
+    parts = {k: int(v or 0) for k, v in m.groupdict().items()}
+    return parts["days"] * 86400 + parts["hours"] * 3600 + parts["minutes"] * 60 + parts["seconds"]
+
+
+def _to_int(x) -> Optional[int]:
+    try:
+        return int(x)
+    except Exception:
+        return None
+
+
+def fetch_video_metadata(youtube_id: str, api_key: str) -> Optional[Dict[str, Any]]:
+    """Snippet, statistics and duration of one video; None if YouTube has no such video."""
+    r = http_client.get(
+        youtube_api_url("videos"),
+        params={"part": "snippet,statistics,contentDetails", "id": youtube_id, "key": api_key},
+        timeout=15,
+    )
+    r.raise_for_status()
+    items = (r.json() or {}).get("items") or []
+    if not items:
+        return None
+    it = items[0]
+    sn = it.get("snippet", {})
+    st = it.get("statistics", {})
+    return {
+        "title": (sn.get("title") or "").strip() or None,
+        "description": sn.get("description"),
+        "channel_title": sn.get("channelTitle"),
+        "published_at": sn.get("publishedAt"),
+        "view_count": _to_int(st.get("viewCount")),
+        "like_count": _to_int(st.get("likeCount")),
+        "dislike_count": _to_int(st.get("dislikeCount")),
+        "comment_count": _to_int(st.get("commentCount")),
+        "duration_seconds": parse_duration((it.get("contentDetails") or {}).get("duration")),
+    }
+
+
+def resolve_channel(value: str, api_key: str) -> Tuple[Optional[str], str]:
+    """Channel title for a channel URL, ``@handle`` or handle URL.
+
+    Returns ``(label, value)``; handles are rewritten to the canonical
+    ``/channel/<id>`` URL so later channel lookups don't need a search call.
+    """
+    chan_id = handle = None
+    if value.startswith("@"):
+        handle = value[1:]
+    m = re.search(r"/channel/([A-Za-z0-9_-]+)", value)
+    if m:
+        chan_id = m.group(1)
+    mh = re.search(r"/@([A-Za-z0-9._-]+)", value)
+    if mh:
+        handle = mh.group(1)
+
+    if chan_id:
+        r = http_client.get(
+            youtube_api_url("channels"),
+            params={"part": "snippet", "id": chan_id, "key": api_key},
+            timeout=12,
+        )
+        r.raise_for_status()
+        items = (r.json() or {}).get("items") or []
+        if items:
+            return items[0].get("snippet", {}).get("title"), value
+    elif handle:
+        r = http_client.get(
+            youtube_api_url("search"),
+            params={"part": "snippet", "type": "channel", "q": handle, "maxResults": 1, "key": api_key},
+            timeout=12,
+        )
+        r.raise_for_status()
+        items = (r.json() or {}).get("items") or []
+        if items:
+            sn = items[0].get("snippet", {})
+            ch_id = sn.get("channelId")
+            if ch_id:
+                value = f"https://www.youtube.com/channel/{ch_id}"
+            return sn.get("channelTitle"), value
+    return None, value
+
+
+def enrich_video(video_id: int) -> str:
+    """Fill in YouTube metadata of a video row. Returns the new metadata_status."""
+    v = db.session.get(Video, video_id)
+    if not v:
+        return "missing"
+    api_key = os.environ.get("YOUTUBE_API_KEY")
+    youtube_id = extract_video_id(v.url)
+    status = "skipped"
+    if youtube_id and api_key:
+        try:
+            with tracing.span("enrich.video", "enrich", video_id=video_id):
+                meta = fetch_video_metadata(youtube_id, api_key)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Metadata lookup failed for video %s: %s", video_id, e)
+            status = "failed"
+        else:
+            status = "ready"
+            for key, value in (meta or {}).items():
+                if value is not None:
+                    setattr(v, key, value)
+    v.metadata_status = status
+    db.session.commit()
+    if v.published_at:
+        # Finished videos already sit in the feed under their insertion time
+        feed.refresh_video(v)
+    signals.metadata_updated.send(video_id, kind="video", status=status)
+    return status
+
+
+def enrich_source(source_id: int) -> str:
+    """Resolve the channel label (and canonical URL) of a source row."""
+    src = db.session.get(Source, source_id)
+    if not src:
+        return "missing"
+    api_key = os.environ.get("YOUTUBE_API_KEY")
+    status = "skipped"
+    if api_key:
+        try:
+            with tracing.span("enrich.source", "enrich", source_id=source_id):
+                label, value = resolve_channel(src.value, api_key)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Channel lookup failed for source %s: %s", source_id, e)
+            status = "failed"
+        else:
+            status = "ready"
+            src.value = value
+            if label and not src.label:
+                src.label = label
+    src.metadata_status = status
+    db.session.commit()
+    signals.metadata_updated.send(source_id, kind="source", status=status)
+    return status
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(os.environ.get("ENRICH_WORKERS", 4)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich")
+        return _executor
+
+
+def _run(app, fn, row_id: int, claim: Optional[str] = None):
+    ids = {"video_id": row_id} if fn is enrich_video else {"source_id": row_id}
+    with app.app_context(), accounting.job(fn.__name__, **ids):
+        try:
+            return fn(row_id)
+        except Exception:
+            db.session.rollback()
+            logging.getLogger(__name__).exception("Enrichment %s(%s) failed", fn.__name__, row_id)
+            return "failed"
+        finally:
+            if claim:
+                task_state.delete(claim)
+
+
+def submit_video(app, video_id: int) -> "Future[str]":
+    return _get_executor().submit(tracing.bind(_run), app, enrich_video, video_id)
+
+
+def submit_source(app, source_id: int) -> "Future[str]":
+    return _get_executor().submit(tracing.bind(_run), app, enrich_source, source_id)
+
+
+def _claim_pending(model, kind: str, row_id: int) -> Optional[str]:
+    """Claim a pending row for this process; None if another process has it or it is no longer pending."""
+    key = f"enrich:{kind}:{row_id}"
+    if not task_state.claim(key, status="processing"):
+        return None
+    # Checked after the claim: a run that finished meanwhile has already released its key
+    if db.session.query(model.metadata_status).filter(model.id == row_id).scalar() != "pending":
+        task_state.delete(key)
+        return None
+    return key
+
+
+def resume_pending(app) -> int:
+    """Re-queue rows left pending by a previous process. Returns the number queued.
+
+    Every web worker runs this at startup; each row is claimed first, so only
+    one process repeats its lookup.
+    """
+    queued = 0
+    with app.app_context():
+        for model, kind, fn in ((Video, "video", enrich_video), (Source, "source", enrich_source)):
+            ids = [row_id for (row_id,) in db.session.query(model.id).filter(model.metadata_status == "pending")]
+            for row_id in ids:
+                key = _claim_pending(model, kind, row_id)
+                if key:
+                    _get_executor().submit(tracing.bind(_run), app, fn, row_id, key)
+                    queued += 1
+    return queued
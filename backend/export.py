@@ -0,0 +1,81 @@
+"""Streaming export of a user's library as NDJSON.
+
+One JSON object per line, each with a ``type``:
+
+    {"type": "export", "version": 1, "user_id": ..., "exported_at": ..., "sources": n, "videos": m}
+    {"type": "source", ...}          one per source (``Source.to_dict``)
+    {"type": "video", ...}           one per video (``Video.to_dict``: transcript and summary included,
+                                     plus ``segments`` when requested)
+    {"type": "end", "sources": n, "videos": m}
+
+Rows are read with ``yield_per`` (a server-side cursor) and serialized one at
+a time into ~64 KiB chunks, so memory use depends on the largest video, not
+on the size of the library. A missing ``end`` line means the download was cut.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator
+
+from backend import segments
+from backend.extensions import db
+from backend.json_provider import dumps_bytes
+from backend.models.source import Source
+from backend.models.transcript_segments import TranscriptSegments
+from backend.models.video import Video
+
+VERSION = 1
+CHUNK_BYTES = 64 * 1024
+BATCH_ROWS = 50  # rows per fetch; every video row carries its full transcript
+
+
+def records(user_id: int, include_segments: bool = False) -> Iterator[Dict[str, Any]]:
+    """The export as dicts, in output order."""
+    source_ids = db.session.query(Source.id).filter(Source.user_id == user_id)
+    videos = db.session.query(Video).filter(Video.source_id.in_(source_ids.scalar_subquery()))
+    yield {
+        "type": "export",
+        "version": VERSION,
+        "user_id": user_id,
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+        "sources": source_ids.count(),
+        "videos": videos.count(),
+    }
+
+    n_sources = 0
+    for src in Source.query.filter(Source.user_id == user_id).order_by(Source.id).yield_per(BATCH_ROWS):
+        n_sources += 1
+        yield {"type": "source", **src.to_dict()}
+
+    n_videos = 0
+    if include_segments:
+        q = (
+            videos.outerjoin(TranscriptSegments, TranscriptSegments.video_id == Video.id)
+            .add_columns(TranscriptSegments.data)
+        )
+    else:
+        q = videos
+    for row in q.order_by(Video.id).yield_per(BATCH_ROWS):
+        n_videos += 1
+        if include_segments:
+            video, blob = row
+            item = {"type": "video", **video.to_dict()}
+            item["segments"] = [s.to_dict() for s in segments.decode(blob)] if blob else []
+        else:
+            item = {"type": "video", **row.to_dict()}
+        yield item
+
+    yield {"type": "end", "sources": n_sources, "videos": n_videos}
+
+
+def ndjson_chunks(user_id: int, include_segments: bool = False) -> Iterator[bytes]:
+    """``records`` as NDJSON, batched into chunks of about CHUNK_BYTES."""
+    buf = []
+    size = 0
+    for rec in records(user_id, include_segments):
+        line = dumps_bytes(rec) + b"\n"
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
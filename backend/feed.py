@@ -0,0 +1,101 @@
+"""Per-user materialized feed.
+
+Videos are fanned out into ``feed_items`` when they finish the pipeline, so
+reading a page of the feed is a single range scan over
+``(user_id, published_at, video_id)`` instead of a join over every source.
+"""
+import base64
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from backend.extensions import db
+from backend.models.feed_item import FeedItem
+from backend.models.source import Source
+from backend.models.video import Video
+
+
+def _sort_key(video: Video) -> str:
+    """Feed ordering key; falls back to insertion time when YouTube gave no date."""
+    if video.published_at:
+        return video.published_at
+    return video.created_at.isoformat() + "Z" if video.created_at else ""
+
+
+def encode_cursor(published_at: str, video_id: int) -> str:
+    raw = f"{published_at}|{video_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        published_at, video_id = raw.rsplit("|", 1)
+        return published_at, int(video_id)
+    except Exception:
+        return None
+
+
+def fan_out_video(video: Video, commit: bool = True) -> None:
+    """Insert or refresh the feed row of the user who follows the video's source."""
+    src = db.session.get(Source, video.source_id)
+    if not src:
+        return
+    key = _sort_key(video)
+    item = FeedItem.query.filter_by(user_id=src.user_id, video_id=video.id).first()
+    if item:
+        item.published_at = key
+    else:
+        db.session.add(
+            FeedItem(user_id=src.user_id, video_id=video.id, source_id=src.id, published_at=key)
+        )
+    if commit:
+        db.session.commit()
+
+
+def refresh_video(video: Video, commit: bool = True) -> None:
+    """Re-key a video's existing feed rows, e.g. once its published_at is known."""
+    FeedItem.query.filter_by(video_id=video.id).update(
+        {FeedItem.published_at: _sort_key(video)}, synchronize_session=False
+    )
+    if commit:
+        db.session.commit()
+
+
+def remove_video(video_id: int) -> None:
+    """Drop a video from every feed (caller commits)."""
+    FeedItem.query.filter_by(video_id=video_id).delete(synchronize_session=False)
+
+
+def get_page(user_id: int, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Video], Optional[str]]:
+    """Return one page of a user's feed, newest first, plus the cursor for the next page."""
+    q = FeedItem.query.filter(FeedItem.user_id == user_id)
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        q = q.filter(tuple_(FeedItem.published_at, FeedItem.video_id) < tuple_(*after))
+    rows = (
+        q.order_by(FeedItem.published_at.desc(), FeedItem.video_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].published_at, rows[-1].video_id)
+    return [r.video for r in rows], next_cursor
+
+
+def backfill() -> int:
+    """Fan out finished videos that predate the feed table. Returns rows added."""
+    missing = (
+        db.session.query(Video)
+        .outerjoin(FeedItem, FeedItem.video_id == Video.id)
+        .filter(FeedItem.id.is_(None), Video.transcribe_status == "ready")
+        .all()
+    )
+    for v in missing:
+        fan_out_video(v, commit=False)
+    if missing:
+        db.session.commit()
+    return len(missing)
@@ -0,0 +1,54 @@
+"""Outgoing HTTP with per-thread connection reuse and latency metrics.
+
+Use ``http_client.get`` / ``http_client.post`` instead of ``requests.get`` /
+``requests.post`` so every external call is recorded by host and status
+(and YouTube Data API quota is charged to the current job, see ``accounting``).
+``requests`` itself is imported on the first call, not at app start.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+from backend import accounting, metrics
+
+
+_session_class = None
+_local = threading.local()
+
+
+def _instrumented_session_class():
+    global _session_class
+    if _session_class is None:
+        import requests
+
+        class InstrumentedSession(requests.Session):
+            def request(self, method, url, *args, **kwargs):
+                host = urlparse(url).hostname or "unknown"
+                started = time.perf_counter()
+                try:
+                    resp = super().request(method, url, *args, **kwargs)
+                except requests.RequestException:
+                    metrics.observe_external(host, "error", time.perf_counter() - started)
+                    raise
+                metrics.observe_external(host, resp.status_code, time.perf_counter() - started)
+                accounting.charge_http(url, resp)
+                return resp
+
+        _session_class = InstrumentedSession
+    return _session_class
+
+
+def session():
+    """Session of the calling thread (requests.Session is not safe to share across threads)."""
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = _instrumented_session_class()()
+    return s
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return session().post(url, **kwargs)
@@ -0,0 +1,254 @@
+"""Database-backed pipeline queue for standalone workers.
+
+With PIPELINE_MODE=queue, web processes don't run pipelines: ``_run_async``
+stores the run in ``pipeline_jobs`` and any number of ``python -m
+backend.worker`` processes, on this or other machines sharing the database,
+drain it. Jobs are ordered by the same score as the in-process scheduler
+(``backend.scheduler``), so priority classes, video length and ageing work
+the same in both modes.
+
+A worker takes a job with ``claim``, a single ``UPDATE ... RETURNING``
+statement, so two workers never start the same job. The claim is a lease of
+PIPELINE_LEASE_SECONDS that the worker extends with ``heartbeat`` while the
+run is in progress. When a worker dies its leases expire and the jobs are
+claimed again, up to PIPELINE_MAX_ATTEMPTS times; ``reap`` fails jobs whose
+last attempt's lease ran out.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from backend import signals
+from backend.extensions import db
+from backend.models.pipeline_job import PipelineJob
+from backend.scheduler import PRIORITIES, get_scheduler
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def lease_seconds() -> float:
+    return _env_float("PIPELINE_LEASE_SECONDS", 120)
+
+
+def max_attempts() -> int:
+    return max(1, int(_env_float("PIPELINE_MAX_ATTEMPTS", 3)))
+
+
+def _score(priority: str, duration_seconds: Optional[int], queued_at: float) -> float:
+    return get_scheduler().score(priority, duration_seconds, queued_at)
+
+
+# A running job whose lease ran out counts as queued
+_CLAIMABLE = "(status = 'queued' OR (status = 'running' AND lease_expires_at < :now))"
+
+
+def enqueue(video_id: int, url: str, provider: Optional[str] = None, priority: str = "interactive",
+            duration_seconds: Optional[int] = None) -> bool:
+    """Queue a run of ``video_id``.
+
+    Returns False if the video is already queued or running; a queued run
+    then only moves up to ``priority`` if that is a more urgent class.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}'")
+    now = time.time()
+    params = {
+        "video_id": video_id, "url": url, "provider": provider, "priority": priority,
+        "duration": duration_seconds, "score": _score(priority, duration_seconds, now), "now": now,
+    }
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            text(
+                "INSERT INTO pipeline_jobs (video_id, url, provider, priority, duration_seconds, score, "
+                "status, attempts, queued_at) "
+                "VALUES (:video_id, :url, :provider, :priority, :duration, :score, 'queued', 0, :now) "
+                "ON CONFLICT(video_id) DO UPDATE SET url = excluded.url, provider = excluded.provider, "
+                "priority = excluded.priority, duration_seconds = excluded.duration_seconds, "
+                "score = excluded.score, status = 'queued', attempts = 0, worker_id = NULL, "
+                "lease_expires_at = NULL, queued_at = excluded.queued_at, started_at = NULL, "
+                "finished_at = NULL, error = NULL "
+                "WHERE pipeline_jobs.status IN ('done', 'failed') "
+                "OR (pipeline_jobs.status = 'running' AND pipeline_jobs.lease_expires_at < :now)"
+            ),
+            params,
+        )
+        if res.rowcount == 1:
+            return True
+    promote(video_id, priority)
+    return False
+
+
+def _rescore(video_id: int, **changes: Any) -> bool:
+    """Apply ``changes`` to a queued job and recompute its score. False if it isn't queued."""
+    with db.engine.begin() as conn:
+        row = conn.execute(
+            text("SELECT priority, duration_seconds, queued_at FROM pipeline_jobs "
+                 "WHERE video_id = :video_id AND status = 'queued'"),
+            {"video_id": video_id},
+        ).mappings().first()
+        if row is None:
+            return False
+        job = {**row, **changes}
+        res = conn.execute(
+            text("UPDATE pipeline_jobs SET priority = :priority, duration_seconds = :duration_seconds, "
+                 "score = :score WHERE video_id = :video_id AND status = 'queued'"),
+            {**job, "video_id": video_id,
+             "score": _score(job["priority"], job["duration_seconds"], job["queued_at"])},
+        )
+        return res.rowcount == 1
+
+
+def promote(video_id: int, priority: str) -> bool:
+    """Move a queued run to a more urgent class. Returns False if it isn't queued or already there."""
+    current = db.session.query(PipelineJob.priority).filter(
+        PipelineJob.video_id == video_id, PipelineJob.status == "queued"
+    ).scalar()
+    if current is None or PRIORITIES.index(priority) >= PRIORITIES.index(current):
+        return False
+    return _rescore(video_id, priority=priority)
+
+
+def set_duration(video_id: int, duration_seconds: Optional[int]) -> bool:
+    """Re-score a queued run once the video's length is known."""
+    return _rescore(video_id, duration_seconds=duration_seconds)
+
+
+def claim(worker_id: str, lease: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Take the next job for ``worker_id`` with a lease of ``lease`` seconds. None if the queue is empty."""
+    now = time.time()
+    params = {"worker": worker_id, "now": now, "until": now + (lease or lease_seconds()),
+              "max": max_attempts()}
+    with db.engine.begin() as conn:
+        # The condition is repeated outside the subquery: a database that runs
+        # the subquery without locking re-checks the row it is about to update
+        row = conn.execute(
+            text(
+                "UPDATE pipeline_jobs SET status = 'running', worker_id = :worker, attempts = attempts + 1, "
+                "lease_expires_at = :until, started_at = :now "
+                "WHERE id = (SELECT id FROM pipeline_jobs "
+                f"WHERE {_CLAIMABLE} AND attempts < :max ORDER BY score LIMIT 1) "
+                f"AND {_CLAIMABLE} AND attempts < :max "
+                "RETURNING id, video_id, url, provider, priority, attempts, queued_at"
+            ),
+            params,
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+def heartbeat(job_id: int, worker_id: str, lease: Optional[float] = None) -> bool:
+    """Extend the lease. False if ``worker_id`` no longer holds the job (it expired and was claimed again)."""
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            text("UPDATE pipeline_jobs SET lease_expires_at = :until "
+                 "WHERE id = :id AND worker_id = :worker AND status = 'running'"),
+            {"id": job_id, "worker": worker_id, "until": time.time() + (lease or lease_seconds())},
+        )
+        return res.rowcount == 1
+
+
+def finish(job_id: int, worker_id: str, status: str, error: Optional[str] = None) -> bool:
+    """Mark a held job ``done`` or ``failed``. False if ``worker_id`` lost the lease."""
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            text("UPDATE pipeline_jobs SET status = :status, finished_at = :now, lease_expires_at = NULL, "
+                 "error = :error WHERE id = :id AND worker_id = :worker AND status = 'running'"),
+            {"id": job_id, "worker": worker_id, "status": status, "error": error, "now": time.time()},
+        )
+        return res.rowcount == 1
+
+
+def release(worker_id: str) -> int:
+    """Put the jobs held by ``worker_id`` back in the queue (shutdown without draining). Returns the count."""
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            text("UPDATE pipeline_jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, "
+                 "attempts = attempts - 1 WHERE worker_id = :worker AND status = 'running'"),
+            {"worker": worker_id},
+        )
+        return res.rowcount
+
+
+def reap() -> List[Dict[str, Any]]:
+    """Fail jobs whose last allowed attempt's lease expired. Returns them (``video_id``, ``url``)."""
+    now = time.time()
+    with db.engine.begin() as conn:
+        rows = conn.execute(
+            text("UPDATE pipeline_jobs SET status = 'failed', finished_at = :now, lease_expires_at = NULL, "
+                 "error = 'worker lost' "
+                 "WHERE status = 'running' AND lease_expires_at < :now AND attempts >= :max "
+                 "RETURNING video_id, url"),
+            {"now": now, "max": max_attempts()},
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def position(video_id: int) -> Optional[int]:
+    """0-based place of a queued run in the start order, None if not queued."""
+    score = db.session.query(PipelineJob.score).filter(
+        PipelineJob.video_id == video_id, PipelineJob.status == "queued"
+    ).scalar()
+    if score is None:
+        return None
+    return db.session.query(PipelineJob.id).filter(
+        PipelineJob.status == "queued", PipelineJob.score < score
+    ).count()
+
+
+def pending(limit: int = 100) -> List[Dict[str, Any]]:
+    """Queued and running jobs, queued ones in the order they will start."""
+    jobs = (
+        PipelineJob.query.filter(PipelineJob.status.in_(("queued", "running")))
+        .order_by(PipelineJob.status.desc(), PipelineJob.score)
+        .limit(limit)
+        .all()
+    )
+    return [j.to_dict() for j in jobs]
+
+
+def stats() -> Dict[str, Any]:
+    now = time.time()
+    rows = db.session.query(PipelineJob.status, PipelineJob.priority, db.func.count(PipelineJob.id)).group_by(
+        PipelineJob.status, PipelineJob.priority
+    )
+    counts: Dict[str, int] = {}
+    queued = {p: 0 for p in PRIORITIES}
+    for status, priority, n in rows:
+        counts[status] = counts.get(status, 0) + n
+        if status == "queued":
+            queued[priority] = n
+    oldest = db.session.query(db.func.min(PipelineJob.queued_at)).filter(PipelineJob.status == "queued").scalar()
+    workers = db.session.query(db.func.count(db.distinct(PipelineJob.worker_id))).filter(
+        PipelineJob.status == "running", PipelineJob.lease_expires_at >= now
+    ).scalar()
+    return {
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "queued": queued,
+        "oldest_queued_seconds": round(now - oldest, 3) if oldest else None,
+        "busy_workers": workers,
+        "lease_seconds": lease_seconds(),
+        "max_attempts": max_attempts(),
+    }
+
+
+def _on_metadata_updated(sender, kind=None, status=None, **kw):
+    from flask import current_app
+
+    if kind != "video" or status != "ready" or current_app.config.get("PIPELINE_MODE") != "queue":
+        return
+    from backend.models.video import Video
+
+    duration = db.session.query(Video.duration_seconds).filter(Video.id == sender).scalar()
+    if duration is not None:
+        set_duration(sender, duration)
+
+
+signals.metadata_updated.connect(_on_metadata_updated)
@@ -0,0 +1,96 @@
+"""Fast JSON for responses.
+
+``OrjsonProvider`` replaces Flask's JSON provider when ``orjson`` is installed
+(``jsonify`` keeps working unchanged; output matches Flask's: sorted keys,
+HTTP dates for datetimes). ``json_list_response`` serializes model lists
+item by item: short lists are sent as one body, long ones are streamed as
+they are serialized instead of being built in memory first.
+"""
+from typing import Any, Callable, Iterator
+
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # keep working (slower) without it
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, compact: bool = True) -> int:
+        opts = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        if not compact:
+            opts |= orjson.OPT_INDENT_2
+        return opts
+
+    def dumps_bytes(self, obj: Any, compact: bool = True) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(compact))
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Unusual options (indent=..., cls=...) keep the stdlib behaviour
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        # Same rule as Flask: indented in debug mode unless ``compact`` is set
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, compact=not pretty) + b"\n", mimetype=self.mimetype)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact JSON bytes with the app's JSON provider."""
+    provider = current_app.json
+    if isinstance(provider, OrjsonProvider):
+        return provider.dumps_bytes(obj)
+    return provider.dumps(obj).encode()
+
+
+def json_list_response(query: Callable[[], Any], serialize: Callable[[Any], Any] = lambda x: x,
+                       status: int = 200, batch: int = 200) -> Response:
+    """JSON array response from the ORM query built by ``query()``, serialized one item at a time.
+
+    Up to STREAM_LIST_THRESHOLD items are returned as a regular body (with
+    Content-Length); longer results are streamed in chunks. The items read to
+    decide are serialized in the view and sent first; the generator continues
+    with ``query().offset(...)`` and ``yield_per(batch)`` in a query of its
+    own, since the view's session is torn down once the view returns.
+    """
+    threshold = current_app.config.get("STREAM_LIST_THRESHOLD", 200)
+    head = [dumps_bytes(serialize(item)) for item in query().limit(threshold + 1)]
+    if len(head) <= threshold:
+        return current_app.response_class(
+            b"[" + b",".join(head) + b"]\n", status=status, mimetype="application/json",
+        )
+
+    def generate() -> Iterator[bytes]:
+        first = b"[" + b",".join(head)
+        buf, size, sep = [first], len(first), b","
+        for item in query().offset(len(head)).yield_per(batch):
+            chunk = sep + dumps_bytes(serialize(item))
+            sep = b","
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= 64 * 1024:
+                yield b"".join(buf)
+                buf, size = [], 0
+        buf.append(b"]\n")
+        yield b"".join(buf)
+
+    return current_app.response_class(
+        stream_with_context(generate()), status=status, mimetype="application/json"
+    )
+
+
+def init_app(app) -> None:
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,286 @@
+"""In-process Prometheus-style metrics.
+
+Counters, gauges and histograms keep their samples in plain dicts guarded by
+a per-metric lock (held only for a dict update), so recording is cheap
+enough to leave on in production. ``render()`` produces the Prometheus text
+exposition format served at ``/metrics``.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+_registry: List["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Scalar(_Metric):
+    """One value per label set, or values computed at scrape time by ``set_function``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(self, fn: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Compute the samples at scrape time; ``fn`` returns {label values tuple: value}."""
+        self._callback = fn
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                items = list(self._callback().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Counter(_Scalar):
+    """Monotonic total (a ``set_function`` callback must only ever grow)."""
+
+    kind = "counter"
+
+
+class Gauge(_Scalar):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-2])}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {int(row[-1])}")
+        return out
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# ---------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+_BYTES_BUCKETS = tuple(float(2 ** p) for p in range(10, 32, 2))  # 1 KiB .. 1 GiB
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Flask request latency by endpoint.",
+    ("endpoint", "method", "status"), _LATENCY_BUCKETS,
+)
+EXTERNAL_REQUEST_SECONDS = Histogram(
+    "external_request_duration_seconds", "Latency of outgoing HTTP calls by host.",
+    ("host",), _LATENCY_BUCKETS,
+)
+EXTERNAL_REQUESTS = Counter(
+    "external_requests_total", "Outgoing HTTP calls by host and status code ('error' if no response).",
+    ("host", "status"),
+)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds", "Duration of each pipeline stage.", ("stage", "outcome"), _STAGE_BUCKETS,
+)
+PIPELINE_STAGE_BYTES = Histogram(
+    "pipeline_stage_bytes", "Bytes processed by each pipeline stage.", ("stage",), _BYTES_BUCKETS,
+)
+PIPELINE_SECONDS = Histogram(
+    "pipeline_duration_seconds", "End-to-end pipeline duration.", ("status",), _STAGE_BUCKETS,
+)
+PIPELINE_RUNS = Counter("pipeline_runs_total", "Finished pipeline runs by status.", ("status",))
+PIPELINE_QUEUED = Gauge(
+    "pipeline_queue_depth", "Pipeline runs waiting to start (all workers with PIPELINE_MODE=queue, else this process).",
+)
+PIPELINE_IN_FLIGHT = Gauge(
+    "pipeline_in_flight", "Pipeline runs executing (all workers with PIPELINE_MODE=queue, else this process).",
+)
+PIPELINE_QUEUE_WAIT = Histogram(
+    "pipeline_queue_wait_seconds", "Time from queueing to start of a pipeline run, by priority class.",
+    ("priority",), _STAGE_BUCKETS,
+)
+PIPELINE_SCHEDULED = Gauge("pipeline_scheduled", "Pipeline runs queued in the scheduler by priority class.", ("priority",))
+TRANSCODE_JOBS = Gauge("transcode_jobs", "Transcode pool jobs by state.", ("state",))
+TRANSCODE_CPU_SECONDS = Counter("transcode_cpu_seconds_total", "CPU seconds spent in ffmpeg jobs.")
+SUMMARY_MEMO_LOOKUPS = Counter("summary_memo_lookups_total", "Summary memo lookups by result.", ("result",))
+
+
+def _transcode_jobs():
+    from backend import transcode
+    pool = transcode._pool
+    if pool is None:
+        return {}
+    st = pool.stats()
+    return {(k,): st[k] for k in ("queued", "running", "completed", "failed")}
+
+
+def _pipeline_scheduled():
+    from backend import scheduler
+    sched = scheduler._scheduler
+    return {(p,): n for p, n in sched.stats()["queued"].items()} if sched is not None else {}
+
+
+def _pipeline_counts() -> Dict[str, int]:
+    """Queued and running pipeline runs, from the shared jobs table in queue mode."""
+    from flask import current_app
+
+    if current_app.config.get("PIPELINE_MODE") == "queue":
+        from backend import job_queue
+        st = job_queue.stats()
+    else:
+        from backend import scheduler
+        st = scheduler.get_scheduler().stats()
+    return {"queued": sum(st["queued"].values()), "running": st["running"]}
+
+
+def _transcode_cpu():
+    from backend import transcode
+    pool = transcode._pool
+    return {(): pool.stats()["cpu_seconds"]} if pool is not None else {}
+
+
+def _summary_memo():
+    from backend import summary_cache
+    st = summary_cache.stats(entries=False)
+    return {("hit",): st["hits"], ("miss",): st["misses"]}
+
+
+TRANSCODE_JOBS.set_function(_transcode_jobs)
+TRANSCODE_CPU_SECONDS.set_function(_transcode_cpu)
+SUMMARY_MEMO_LOOKUPS.set_function(_summary_memo)
+PIPELINE_SCHEDULED.set_function(_pipeline_scheduled)
+# Computed at scrape time: with PIPELINE_MODE=queue, runs are queued by web
+# processes and started by workers, so per-process counters never balance
+PIPELINE_QUEUED.set_function(lambda: {(): _pipeline_counts()["queued"]})
+PIPELINE_IN_FLIGHT.set_function(lambda: {(): _pipeline_counts()["running"]})
+
+
+def _on_stage(video_id, stage, seconds, ok, bytes, **kw):
+    PIPELINE_STAGE_SECONDS.observe(seconds, stage=stage, outcome="ok" if ok else "error")
+    if bytes:
+        PIPELINE_STAGE_BYTES.observe(bytes, stage=stage)
+
+
+def _on_finished(video_id, status, seconds, **kw):
+    PIPELINE_RUNS.inc(status=status)
+    PIPELINE_SECONDS.observe(seconds, status=status)
+
+
+def observe_external(host: str, status, seconds: float) -> None:
+    EXTERNAL_REQUESTS.inc(host=host, status=status)
+    EXTERNAL_REQUEST_SECONDS.observe(seconds, host=host)
+
+
+def connect_signals() -> None:
+    """Subscribe to pipeline signals (idempotent)."""
+    from backend import signals
+
+    signals.pipeline_stage.connect(_on_stage)
+    signals.pipeline_finished.connect(_on_finished)
+
+
+def init_app(app) -> None:
+    """Record per-endpoint request latency and subscribe to pipeline signals."""
+    from flask import g, request
+
+    connect_signals()
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(resp):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or "unmatched",
+                method=request.method,
+                status=resp.status_code,
+            )
+        return resp
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+from backend.extensions import db
+
+
+class Digest(db.Model):
+    """A user's rendered digest of the videos that reached their feed in ``[since, until)``."""
+
+    __tablename__ = "digests"
+    __table_args__ = (
+        # Latest digest of a user: WHERE user_id=? ORDER BY until DESC
+        db.Index("ix_digest_user_until", "user_id", "until"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    since = db.Column(db.DateTime, nullable=False)
+    until = db.Column(db.DateTime, nullable=False)
+    video_count = db.Column(db.Integer, nullable=False, default=0)
+    video_ids = db.Column(db.Text, nullable=False, default="[]")  # JSON list, digest order
+    markdown = db.Column(db.Text, nullable=False, default="")
+    model = db.Column(db.String(100), nullable=False, default="")  # '' when no overview was generated
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "since": self.since.isoformat() + "Z",
+            "until": self.until.isoformat() + "Z",
+            "video_count": self.video_count,
+            "video_ids": json.loads(self.video_ids or "[]"),
+            "markdown": self.markdown,
+            "model": self.model,
+            "created_at": self.created_at.isoformat() + "Z" if self.created_at else None,
+        }
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint
+
+from backend.extensions import db
+from backend.models.video import Video
+
+
+class FeedItem(db.Model):
+    """Materialized entry of a user's unified feed (one row per user and video)."""
+
+    __tablename__ = "feed_items"
+    __table_args__ = (
+        UniqueConstraint("user_id", "video_id", name="uq_feed_user_video"),
+        # Covers the feed page read: WHERE user_id=? ORDER BY published_at DESC, video_id DESC
+        db.Index("ix_feed_user_published", "user_id", "published_at", "video_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), nullable=False, index=True)
+    source_id = db.Column(db.Integer, db.ForeignKey("sources.id"), nullable=False)
+    published_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    video = db.relationship(Video, lazy="joined")
@@ -0,0 +1,45 @@
+from backend.extensions import db
+
+
+class PipelineJob(db.Model):
+    """A pipeline run queued for ``python -m backend.worker`` (PIPELINE_MODE=queue); see ``backend.job_queue``."""
+
+    __tablename__ = "pipeline_jobs"
+    __table_args__ = (
+        # Next job to claim: WHERE status='queued' ORDER BY score
+        db.Index("ix_pipeline_job_status_score", "status", "score"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, nullable=False, unique=True)  # one row per video, reused by later runs
+    url = db.Column(db.String(500), nullable=False)
+    provider = db.Column(db.String(50), nullable=True)
+    priority = db.Column(db.String(20), nullable=False, default="interactive")
+    duration_seconds = db.Column(db.Integer, nullable=True)
+    score = db.Column(db.Float, nullable=False)  # same formula as backend.scheduler; lower starts first
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker_id = db.Column(db.String(200), nullable=True)
+    lease_expires_at = db.Column(db.Float, nullable=True)  # unix time; a running job past it is claimable
+    queued_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "video_id": self.video_id,
+            "provider": self.provider,
+            "priority": self.priority,
+            "duration_seconds": self.duration_seconds,
+            "score": round(self.score, 3),
+            "status": self.status,
+            "attempts": self.attempts,
+            "worker_id": self.worker_id,
+            "lease_expires_at": self.lease_expires_at,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
@@ -12,7 +12,9 @@ class Source(db.Model):
     type = db.Column(db.String(50), nullable=False)  # e.g., 'youtube_channel'
     value = db.Column(db.String(500), nullable=False)  # channel url/id/etc.
     label = db.Column(db.String(255), nullable=True)
+    metadata_status = db.Column(db.String(50), nullable=False, default="")  # '', 'pending', 'ready', 'failed', 'skipped'
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     videos = db.relationship(
         Video,
         backref="source",
@@ -28,5 +30,7 @@ class Source(db.Model):
             "type": self.type,
             "value": self.value,
             "label": self.label,
+            "metadata_status": self.metadata_status,
             "created_at": self.created_at.isoformat() + "Z",
+            "updated_at": self.updated_at.isoformat() + "Z" if self.updated_at else None,
         }
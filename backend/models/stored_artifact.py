@@ -0,0 +1,13 @@
+from backend.extensions import db
+
+
+class StoredArtifact(db.Model):
+    """A file written by the pipeline under VIDEO_DIR / AUDIO_DIR (see ``backend.storage``)."""
+
+    __tablename__ = "stored_artifacts"
+
+    path = db.Column(db.String(1000), primary_key=True)  # absolute path
+    video_id = db.Column(db.Integer, nullable=True, index=True)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False)  # unix time
+    last_access = db.Column(db.Float, nullable=False, index=True)  # unix time
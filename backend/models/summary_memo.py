@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from backend.extensions import db
+
+
+class SummaryMemo(db.Model):
+    """Cached summary keyed by a hash of (transcript, model, system prompt, instructions)."""
+
+    __tablename__ = "summary_memos"
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    model = db.Column(db.String(100), nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,17 @@
+from backend.extensions import db
+
+
+class TaskState(db.Model):
+    """Shared status of background work (downloads, pipeline runs), keyed by task key.
+
+    Rows are read and written through ``backend.task_state`` so every web worker
+    process sees the same state.
+    """
+
+    __tablename__ = "task_states"
+
+    key = db.Column(db.String(200), primary_key=True)  # e.g. 'download:42', 'pipeline:42'
+    status = db.Column(db.String(50), nullable=False, default="idle")
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.Text, nullable=False, default="{}")  # JSON object with extra fields
+    updated_at = db.Column(db.Float, nullable=False, index=True)  # unix time
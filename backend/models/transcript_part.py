@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint
+
+from backend.extensions import db
+
+
+class TranscriptPart(db.Model):
+    """Text of one transcribed audio segment, stored as soon as that segment finishes.
+
+    Rows exist while a video is being transcribed (and after a failed run, so a
+    retry can resume); they are removed once the joined transcript is saved.
+    """
+
+    __tablename__ = "transcript_parts"
+    __table_args__ = (
+        UniqueConstraint("video_id", "index", name="uq_transcript_part"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), nullable=False)
+    index = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False, default="")
+    # Timed segments of this part (backend.segments format, already offset to the video timeline)
+    segments = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
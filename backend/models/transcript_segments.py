@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from backend.extensions import db
+
+
+class TranscriptSegments(db.Model):
+    """Timed segments of a video's transcript in the packed format of ``backend.segments``.
+
+    One row per video; ``count`` and ``max_span_ms`` duplicate the blob header
+    so time-window reads can slice the blob in SQL.
+    """
+
+    __tablename__ = "transcript_segments"
+
+    video_id = db.Column(db.Integer, db.ForeignKey("videos.id"), primary_key=True)
+    source = db.Column(db.String(20), nullable=False, default="")  # 'captions', 'openai', 'local'
+    count = db.Column(db.Integer, nullable=False, default=0)
+    max_span_ms = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from backend.extensions import db
+
+
+class UsageRecord(db.Model):
+    """Resources consumed by one job (pipeline run, enrichment, digest, API request); see ``backend.accounting``."""
+
+    __tablename__ = "usage_records"
+    __table_args__ = (
+        db.Index("ix_usage_user_started", "user_id", "started_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # 'pipeline', 'enrich_video', 'digest', 'request', ...
+    detail = db.Column(db.String(100), nullable=False, default="")  # provider, endpoint, ...
+    status = db.Column(db.String(20), nullable=False, default="")
+    user_id = db.Column(db.Integer, nullable=True)  # no FK: records outlive deleted users and videos
+    video_id = db.Column(db.Integer, nullable=True, index=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    wall_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    audio_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    tokens_in = db.Column(db.Integer, nullable=False, default=0)
+    tokens_out = db.Column(db.Integer, nullable=False, default=0)
+    youtube_units = db.Column(db.Integer, nullable=False, default=0)
+    bytes_downloaded = db.Column(db.Integer, nullable=False, default=0)
+    ffmpeg_cpu_seconds = db.Column(db.Float, nullable=False, default=0.0)
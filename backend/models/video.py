@@ -14,12 +14,17 @@ class Video(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     source_id = db.Column(db.Integer, db.ForeignKey("sources.id"), nullable=False, index=True)
     url = db.Column(db.String(1000), nullable=False)
+    # Canonical YouTube ID of ``url``; videos sharing it share one pipeline run
+    youtube_id = db.Column(db.String(32), nullable=True, index=True)
     title = db.Column(db.String(255), nullable=True)
     transcribe = db.Column(db.Text, nullable=False, default="")
     summary = db.Column(db.Text, nullable=False, default="")
     audio_path = db.Column(db.String(1000), nullable=False, default="")
     audio_status = db.Column(db.String(50), nullable=False, default="")  # '', 'pending', 'ready', 'failed'
     transcribe_status = db.Column(db.String(50), nullable=False, default="")  # '', 'pending', 'ready', 'failed'
+    # Segments of the current/last transcription run (see backend.transcripts)
+    transcript_parts_total = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    transcript_parts_done = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     # YouTube metadata
     channel_title = db.Column(db.String(255), nullable=True)
     description = db.Column(db.Text, nullable=True)
@@ -28,19 +33,25 @@ class Video(db.Model):
     dislike_count = db.Column(db.Integer, nullable=True)
     comment_count = db.Column(db.Integer, nullable=True)
     published_at = db.Column(db.String(50), nullable=True)
+    duration_seconds = db.Column(db.Integer, nullable=True)
+    metadata_status = db.Column(db.String(50), nullable=False, default="")  # '', 'pending', 'ready', 'failed', 'skipped'
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     def to_dict(self) -> dict:
         return {
             "id": self.id,
             "source_id": self.source_id,
             "url": self.url,
+            "youtube_id": self.youtube_id,
             "title": self.title,
             "transcribe": self.transcribe,
             "summary": self.summary,
             "audio_path": self.audio_path,
             "audio_status": self.audio_status,
             "transcribe_status": self.transcribe_status,
+            "transcript_parts_total": self.transcript_parts_total,
+            "transcript_parts_done": self.transcript_parts_done,
             "channel_title": self.channel_title,
             "description": self.description,
             "view_count": self.view_count,
@@ -48,5 +59,8 @@ class Video(db.Model):
             "dislike_count": self.dislike_count,
             "comment_count": self.comment_count,
             "published_at": self.published_at,
+            "duration_seconds": self.duration_seconds,
+            "metadata_status": self.metadata_status,
             "created_at": self.created_at.isoformat() + "Z",
+            "updated_at": self.updated_at.isoformat() + "Z" if self.updated_at else None,
         }
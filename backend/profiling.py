@@ -0,0 +1,196 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when PROFILE_REQUESTS is set (``sql`` or ``full``) or
+when an admin sends ``X-Profile: sql`` / ``X-Profile: full``:
+
+- ``sql``: SQL statement count and time, grouped by statement so N+1
+  patterns show up as one statement with a high count.
+- ``full``: the above plus a sampling profiler on the request thread
+  (``sys._current_frames``), aggregated into folded stacks.
+
+Results are returned as ``X-SQL-Count``, ``X-SQL-Time-ms``, ``Server-Timing``
+and ``X-Profile-Id`` headers; the full profile is kept in memory and served
+at ``/admin/profiles/<id>``.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.security import JWTError, decode_jwt
+
+
+MODES = ("sql", "full")
+_KEEP = int(os.environ.get("PROFILE_KEEP", 100))
+_profiles: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+class Sampler(threading.Thread):
+    """Sample the stack of one thread at a fixed interval."""
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _active() -> Optional[Dict[str, Any]]:
+    return g.get("_profile") if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active() is not None:
+        conn.info.setdefault("_profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    prof = _active()
+    stack = conn.info.get("_profile_started")
+    if prof is None or not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    prof["sql_count"] += 1
+    prof["sql_seconds"] += elapsed
+    entry = prof["statements"].setdefault(" ".join(statement.split()), [0, 0.0])
+    entry[0] += 1
+    entry[1] += elapsed
+
+
+def _requested_mode() -> Optional[str]:
+    mode = (current_app.config.get("PROFILE_REQUESTS") or "").lower()
+    if mode in MODES:
+        return mode
+    header = (request.headers.get("X-Profile") or "").lower()
+    if header not in MODES:
+        return None
+    # Header-triggered profiling is for admins only
+    from backend.auth_utils import is_admin
+    from backend.models.user import User
+
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    try:
+        payload = decode_jwt(parts[1], current_app.config.get("JWT_SECRET_KEY", "dev-secret-change-me"))
+    except JWTError:
+        return None
+    return header if is_admin(User.query.get(payload.get("sub"))) else None
+
+
+def _start():
+    mode = _requested_mode()
+    if mode is None:
+        return
+    prof = {
+        "id": uuid.uuid4().hex[:12],
+        "mode": mode,
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "started_at": time.time(),
+        "sql_count": 0,
+        "sql_seconds": 0.0,
+        "statements": {},
+        "_t0": time.perf_counter(),
+    }
+    if mode == "full":
+        sampler = Sampler(threading.get_ident(), current_app.config["PROFILE_SAMPLE_INTERVAL"])
+        sampler.start()
+        prof["_sampler"] = sampler
+    g._profile = prof
+
+
+def _finish(resp):
+    prof = g.pop("_profile", None)
+    if prof is None:
+        return resp
+    sampler = prof.pop("_sampler", None)
+    if sampler is not None:
+        sampler.stop()
+    total_ms = (time.perf_counter() - prof.pop("_t0")) * 1000
+    sql_ms = prof["sql_seconds"] * 1000
+
+    statements = sorted(prof.pop("statements").items(), key=lambda kv: kv[1][1], reverse=True)
+    prof.update(
+        status=resp.status_code,
+        duration_ms=round(total_ms, 2),
+        sql_time_ms=round(sql_ms, 2),
+        statements=[
+            {"sql": sql, "count": count, "time_ms": round(seconds * 1000, 2)}
+            for sql, (count, seconds) in statements
+        ],
+    )
+    del prof["sql_seconds"]
+    if sampler is not None:
+        prof["samples"] = sampler.samples
+        prof["sample_interval_ms"] = sampler.interval * 1000
+        prof["stacks"] = dict(sampler.stacks.most_common())
+    _store(prof)
+
+    resp.headers["X-Profile-Id"] = prof["id"]
+    resp.headers["X-SQL-Count"] = str(prof["sql_count"])
+    resp.headers["X-SQL-Time-ms"] = f"{sql_ms:.2f}"
+    resp.headers["Server-Timing"] = (
+        f'sql;dur={sql_ms:.2f};desc="{prof["sql_count"]} queries", app;dur={total_ms:.2f}'
+    )
+    return resp
+
+
+def _store(prof: Dict[str, Any]) -> None:
+    with _profiles_lock:
+        _profiles[prof["id"]] = prof
+        while len(_profiles) > _KEEP:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Newest first, without statements and stacks."""
+    keys = ("id", "mode", "method", "path", "status", "started_at", "duration_ms", "sql_count", "sql_time_ms")
+    with _profiles_lock:
+        items = list(_profiles.values())
+    return [{k: p.get(k) for k in keys} for p in reversed(items)]
+
+
+def folded(prof: Dict[str, Any]) -> str:
+    """Folded stacks (``frame;frame;frame count``) for flamegraph tools."""
+    return "".join(f"{stack} {count}\n" for stack, count in (prof.get("stacks") or {}).items())
+
+
+def init_app(app) -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start)
+    app.after_request(_finish)
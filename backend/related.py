@@ -0,0 +1,644 @@
+"""Related videos: top-k cosine similarity over hashed TF-IDF vectors.
+
+A finished video's title, summary and transcript are tokenized and hashed
+into 2**RELATED_DIM_BITS buckets (default 18), weighted with sublinear tf x idf,
+pruned to the RELATED_TERMS (default 128) strongest terms and L2-normalized.
+The rows form a CSR matrix kept in memory-mapped files under
+RELATED_INDEX_DIR, next to each row's RELATED_TOP_K (default 50) nearest
+neighbours:
+
+- adding a video scores it against every stored row with one sparse
+  matrix-vector product, keeps its own top-k and inserts it into the lists
+  of the rows it beats (vectorized over all rows); re-indexing a video
+  first frees the slots its old row held, so it keeps its place in them;
+- a lookup reads one row of the memory-mapped neighbour lists, so it costs
+  the same for ten videos or a few hundred thousand.
+
+idf comes from the document frequencies at insert time, so older rows drift
+as the library grows; ``python -m backend.related --rebuild`` recomputes all
+vectors and neighbour lists. A re-indexed or removed video leaves a dead row
+behind; once more than RELATED_COMPACT_RATIO (default 0.25) of the rows are
+dead they are compacted away. Writers (pipeline threads of any worker
+process, and a rebuild for its whole run) serialize on a file lock; readers
+reopen the maps when the index changes. numpy and scipy are optional: without them the index is not kept
+and lookups report it as unavailable.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend import tracing
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the in-process lock still applies
+    fcntl = None
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in into is it its just like me my no not "
+    "of on or our she so that the their them then there these they this to too up us was we were what when "
+    "which who will with you your yeah okay um uh oh really know think going get got one can do don"
+    .split()
+)
+# Field weights: a word in the title counts three times, in the summary twice
+_FIELDS = (("title", 3), ("summary", 2), ("transcribe", 1))
+
+_ARRAYS = {  # name: (dtype, fill value of new slots)
+    "indptr": ("<i8", 0),
+    "indices": ("<i4", 0),
+    "data": ("<f4", 0),
+    "row_video": ("<i8", -1),  # video id per row, -1 once removed
+    "row_of": ("<i4", -1),  # row per video id
+    "nbr_rows": ("<i4", -1),  # rows x k neighbour rows, best first
+    "nbr_scores": ("<f4", 0),  # rows x k cosine similarities
+    "df": ("<i4", 0),  # document frequency per bucket
+}
+
+
+def available() -> bool:
+    try:
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def term_counts(fields: Dict[str, Optional[str]], dim: int) -> Dict[int, float]:
+    """Weighted term counts of a video's text fields, by hash bucket."""
+    counts: Dict[str, float] = collections.Counter()
+    for name, weight in _FIELDS:
+        for tok in _TOKEN_RE.findall((fields.get(name) or "").lower()):
+            if tok not in _STOPWORDS:
+                counts[tok] += weight
+    out: Dict[int, float] = collections.Counter()
+    for tok, n in counts.items():
+        out[zlib.crc32(tok.encode("utf-8")) & (dim - 1)] += n
+    return out
+
+
+def _weights(counts: Dict[int, float], df, docs: int, terms: int):
+    """Pruned, L2-normalized tf-idf vector as (sorted buckets, weights)."""
+    import numpy as np
+
+    if not counts:
+        return np.zeros(0, dtype="<i4"), np.zeros(0, dtype="<f4")
+    buckets = np.fromiter(counts.keys(), dtype="<i4", count=len(counts))
+    tf = np.fromiter(counts.values(), dtype="<f8", count=len(counts))
+    w = (1.0 + np.log(tf)) * (np.log((1.0 + docs) / (1.0 + df[buckets])) + 1.0)
+    if len(w) > terms:
+        keep = np.argpartition(-w, terms - 1)[:terms]
+        buckets, w = buckets[keep], w[keep]
+    order = np.argsort(buckets)
+    buckets, w = buckets[order], w[order]
+    norm = float(np.sqrt(np.dot(w, w))) or 1.0
+    return buckets, (w / norm).astype("<f4")
+
+
+class RelatedIndex:
+    """The on-disk index in ``path`` (see module docstring)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._maps: Dict[str, Any] = {}
+        self._meta: Optional[Dict[str, Any]] = None
+        self._meta_stamp = None
+
+    # -------------------------------------------------------------- files
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _capacity(self, name: str) -> int:
+        dtype = _ARRAYS[name][0]
+        try:
+            return os.path.getsize(self._file(name)) // int(dtype[-1])
+        except OSError:
+            return 0
+
+    def _ensure(self, name: str, n: int) -> None:
+        """Grow the array file to hold at least ``n`` items (doubling, new slots filled)."""
+        import numpy as np
+
+        dtype, fill = _ARRAYS[name]
+        cap = self._capacity(name)
+        if cap >= n:
+            return
+        new_cap = max(n, cap * 2, 1024)
+        with open(self._file(name), "ab") as f:
+            f.truncate(new_cap * int(dtype[-1]))
+        self._maps.pop((name, False), None)
+        self._maps.pop((name, True), None)
+        if fill:
+            m = np.memmap(self._file(name), dtype=dtype, mode="r+", shape=(new_cap,))
+            m[cap:] = fill
+            m.flush()
+            del m
+
+    def _array(self, name: str, writable: bool = False):
+        import numpy as np
+
+        key = (name, writable)
+        m = self._maps.get(key)
+        cap = self._capacity(name)
+        if m is None or len(m) != cap:
+            if cap == 0:
+                return np.zeros(0, dtype=_ARRAYS[name][0])
+            m = np.memmap(self._file(name), dtype=_ARRAYS[name][0], mode="r+" if writable else "r", shape=(cap,))
+            self._maps[key] = m
+        return m
+
+    def meta(self) -> Optional[Dict[str, Any]]:
+        """Index header; re-read (and maps reopened) when another writer changed the index."""
+        path = os.path.join(self.path, "meta.json")
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._meta = None
+            self._maps.clear()
+            return None
+        # meta.json is replaced, never rewritten in place, so a new inode is a new
+        # header; after a rebuild's swap it also means every array file is new
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if stamp != self._meta_stamp:
+            with open(path) as f:
+                self._meta = json.load(f)
+            self._meta_stamp = stamp
+            self._maps.clear()
+        return self._meta
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        meta["generation"] = meta.get("generation", 0) + 1
+        meta["updated_at"] = time.time()
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive access to ``path`` across threads and processes (also taken by ``build``)."""
+        with self._lock, open(self.path.rstrip(os.sep) + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Exclusive access for one writer across threads and processes."""
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            meta = self.meta() or {
+                "dim": 1 << _env_int("RELATED_DIM_BITS", 18),
+                "k": _env_int("RELATED_TOP_K", 50),
+                "terms": _env_int("RELATED_TERMS", 128),
+                "rows": 0, "nnz": 0, "docs": 0,
+            }
+            yield meta
+            for m in self._maps.values():
+                if hasattr(m, "flush"):
+                    m.flush()
+            self._write_meta(meta)
+            self.meta()
+
+    def _matrix(self, meta: Dict[str, Any], writable: bool = False):
+        from scipy.sparse import csr_matrix
+
+        rows, nnz = meta["rows"], meta["nnz"]
+        return csr_matrix(
+            (self._array("data", writable)[:nnz], self._array("indices", writable)[:nnz],
+             self._array("indptr", writable)[:rows + 1]),
+            shape=(rows, meta["dim"]),
+        )
+
+    def _row_of(self, video_id: int) -> int:
+        row_of = self._array("row_of")
+        return int(row_of[video_id]) if 0 <= video_id < len(row_of) else -1
+
+    # ------------------------------------------------------------- writes
+
+    def _remove_row(self, meta: Dict[str, Any], video_id: int) -> bool:
+        row = self._row_of(video_id)
+        if row < 0 or row >= meta["rows"]:
+            return False
+        indptr = self._array("indptr")
+        df = self._array("df", True)
+        df[self._array("indices")[indptr[row]:indptr[row + 1]]] -= 1
+        self._array("row_video", True)[row] = -1
+        self._array("row_of", True)[video_id] = -1
+        meta["docs"] -= 1
+        return True
+
+    def _compact(self, meta: Dict[str, Any]) -> None:
+        """Drop dead rows once they pass RELATED_COMPACT_RATIO; lists lose their references to them."""
+        import numpy as np
+
+        rows, nnz, k = meta["rows"], meta["nnz"], meta["k"]
+        if not rows or rows - meta["docs"] <= rows * _env_float("RELATED_COMPACT_RATIO", 0.25):
+            return
+        row_video = np.array(self._array("row_video")[:rows])
+        live = np.nonzero(row_video >= 0)[0]
+        n = len(live)
+        new_row = np.full(rows, -1, dtype="<i4")
+        new_row[live] = np.arange(n, dtype="<i4")
+
+        indptr = np.array(self._array("indptr")[:rows + 1])
+        lengths = indptr[live + 1] - indptr[live]
+        new_indptr = np.zeros(n + 1, dtype="<i8")
+        np.cumsum(lengths, out=new_indptr[1:])
+        new_nnz = int(new_indptr[-1])
+        take = np.repeat(indptr[live] - new_indptr[:-1], lengths) + np.arange(new_nnz)
+        indices = np.array(self._array("indices")[:nnz])[take]
+        data = np.array(self._array("data")[:nnz])[take]
+
+        r = np.array(self._array("nbr_rows")[:rows * k]).reshape(rows, k)[live]
+        s = np.array(self._array("nbr_scores")[:rows * k]).reshape(rows, k)[live]
+        r = np.where(r >= 0, new_row[np.maximum(r, 0)], -1)
+        s[r < 0] = -1
+        order = np.argsort(-s, axis=1, kind="stable")
+        r, s = np.take_along_axis(r, order, axis=1), np.take_along_axis(s, order, axis=1)
+        s[r < 0] = 0
+
+        self._array("indptr", True)[:n + 1] = new_indptr
+        self._array("indices", True)[:new_nnz] = indices
+        self._array("data", True)[:new_nnz] = data
+        self._array("nbr_rows", True)[:n * k] = r.ravel()
+        self._array("nbr_scores", True)[:n * k] = s.ravel()
+        out = self._array("row_video", True)
+        out[:n], out[n:rows] = row_video[live], -1
+        self._array("row_of", True)[row_video[live]] = np.arange(n, dtype="<i4")
+        meta["rows"], meta["nnz"] = n, new_nnz
+
+    def add(self, video_id: int, fields: Dict[str, Optional[str]]) -> int:
+        """Index (or re-index) a video. Returns its row."""
+        import numpy as np
+
+        with self._writing() as meta:
+            if not meta["rows"]:
+                self._ensure("indptr", 1)
+            dim, k = meta["dim"], meta["k"]
+            self._ensure("df", dim)
+            old = self._row_of(video_id)
+            if self._remove_row(meta, video_id):
+                rows = meta["rows"]
+                self._compact(meta)
+                if meta["rows"] != rows:
+                    old = -1  # compacted away, and with it its slots in other lists
+            counts = term_counts(fields, dim)
+            df = self._array("df", True)
+            if counts:
+                df[np.fromiter(counts.keys(), dtype="<i4", count=len(counts))] += 1
+            meta["docs"] += 1
+            buckets, weights = _weights(counts, df, meta["docs"], meta["terms"])
+
+            row, nnz = meta["rows"], meta["nnz"]
+            for name, n in (("indptr", row + 2), ("indices", nnz + len(buckets)), ("data", nnz + len(buckets)),
+                            ("row_video", row + 1), ("row_of", video_id + 1),
+                            ("nbr_rows", (row + 1) * k), ("nbr_scores", (row + 1) * k)):
+                self._ensure(name, n)
+
+            nbr_rows = self._array("nbr_rows", True)[:(row + 1) * k].reshape(row + 1, k)
+            nbr_scores = self._array("nbr_scores", True)[:(row + 1) * k].reshape(row + 1, k)
+            nbr_rows[row], nbr_scores[row] = -1, 0
+            if 0 <= old < row:
+                # Re-index: free the old row's slots so the new row can take them below
+                held = np.nonzero((nbr_rows[:row] == old).any(axis=1))[0]
+                if len(held):
+                    r, s = nbr_rows[held], nbr_scores[held]
+                    gone = r == old
+                    r[gone], s[gone] = -1, -1
+                    order = np.argsort(-s, axis=1, kind="stable")
+                    r, s = np.take_along_axis(r, order, axis=1), np.take_along_axis(s, order, axis=1)
+                    s[r < 0] = 0
+                    nbr_rows[held], nbr_scores[held] = r, s
+            if row and len(buckets):
+                q = np.zeros(dim, dtype="<f4")
+                q[buckets] = weights
+                scores = self._matrix(meta) @ q
+                scores[self._array("row_video")[:row] < 0] = 0
+                # Own list: the k best rows
+                kk = min(k, row)
+                best = np.argpartition(-scores, kk - 1)[:kk]
+                best = best[np.argsort(-scores[best], kind="stable")]
+                best = best[scores[best] > 0]
+                nbr_rows[row, :len(best)] = best
+                nbr_scores[row, :len(best)] = scores[best]
+                # Other lists: insert this row where it beats the current k-th neighbour (or fills a free slot)
+                beaten = np.nonzero((scores > 0) & (scores > nbr_scores[:row, k - 1]))[0]
+                if len(beaten):
+                    r, s = nbr_rows[beaten], nbr_scores[beaten]
+                    r[:, -1], s[:, -1] = row, scores[beaten]
+                    order = np.argsort(-s, axis=1, kind="stable")
+                    nbr_rows[beaten] = np.take_along_axis(r, order, axis=1)
+                    nbr_scores[beaten] = np.take_along_axis(s, order, axis=1)
+
+            self._array("indices", True)[nnz:nnz + len(buckets)] = buckets
+            self._array("data", True)[nnz:nnz + len(buckets)] = weights
+            self._array("indptr", True)[row + 1] = nnz + len(buckets)
+            self._array("row_video", True)[row] = video_id
+            self._array("row_of", True)[video_id] = row
+            meta["rows"], meta["nnz"] = row + 1, nnz + len(buckets)
+            return row
+
+    def remove(self, video_id: int) -> bool:
+        """Drop a video; other rows' lists skip it from now on."""
+        if self.meta() is None:
+            return False
+        with self._writing() as meta:
+            removed = self._remove_row(meta, video_id)
+            if removed:
+                self._compact(meta)
+            return removed
+
+    # -------------------------------------------------------------- reads
+
+    def neighbours(self, video_id: int) -> Optional[List[Tuple[int, float]]]:
+        """Precomputed ``[(video_id, score)]``, best first; None if the video isn't indexed."""
+        meta = self.meta()
+        if meta is None:
+            return None
+        row = self._row_of(video_id)
+        if row < 0 or row >= meta["rows"]:
+            return None
+        k = meta["k"]
+        rows = self._array("nbr_rows")[row * k:(row + 1) * k]
+        scores = self._array("nbr_scores")[row * k:(row + 1) * k]
+        row_video = self._array("row_video")
+        out = []
+        for r, s in zip(rows.tolist(), scores.tolist()):
+            if r < 0:
+                break
+            vid = int(row_video[r])
+            if vid >= 0:
+                out.append((vid, s))
+        return out
+
+    def score(self, video_id: int, candidates: Iterable[int]) -> List[Tuple[int, float]]:
+        """Exact similarity of a video to ``candidates`` (video ids), best first."""
+        import numpy as np
+
+        meta = self.meta()
+        row = self._row_of(video_id) if meta else -1
+        if row < 0:
+            return []
+        ids = np.fromiter((c for c in candidates if c != video_id), dtype=np.int64)
+        row_of = self._array("row_of")
+        ids = ids[(ids >= 0) & (ids < len(row_of))]
+        rows = row_of[ids].astype(np.int64)
+        keep = (rows >= 0) & (rows < meta["rows"])
+        if not keep.any():
+            return []
+        ids, rows = ids[keep], rows[keep]
+        X = self._matrix(meta)
+        scores = (X[rows] @ X[row].T).toarray().ravel()
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order if scores[i] > 0]
+
+    def stats(self) -> Dict[str, Any]:
+        meta = dict(self.meta() or {})
+        size = 0
+        for name in _ARRAYS:
+            try:
+                size += os.path.getsize(self._file(name))
+            except OSError:
+                pass
+        meta["bytes"] = size
+        return meta
+
+
+def build(path: str, docs: Callable[[], Iterable[Tuple[int, Dict[str, Optional[str]]]]],
+          dim_bits: Optional[int] = None, k: Optional[int] = None, terms: Optional[int] = None,
+          log: Callable[[str], None] = lambda msg: None) -> Dict[str, Any]:
+    """Rebuild the whole index from ``docs()`` (an iterable of (video_id, fields), read twice).
+
+    Neighbour lists are computed blockwise (sparse x sparse^T, then a top-k
+    partition per row), in a scratch directory that replaces ``path`` when done.
+    The writer lock is held throughout, so ``add`` calls made meanwhile wait and
+    land in the new index instead of the one being replaced.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with RelatedIndex(path)._locked():
+        return _build(path, docs, dim_bits, k, terms, log)
+
+
+def _build(path: str, docs: Callable[[], Iterable[Tuple[int, Dict[str, Optional[str]]]]],
+           dim_bits: Optional[int], k: Optional[int], terms: Optional[int],
+           log: Callable[[str], None]) -> Dict[str, Any]:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    dim = 1 << (dim_bits or _env_int("RELATED_DIM_BITS", 18))
+    k = k or _env_int("RELATED_TOP_K", 50)
+    terms = terms or _env_int("RELATED_TERMS", 128)
+
+    started = time.monotonic()
+    df = np.zeros(dim, dtype="<i4")
+    n = 0
+    for _vid, fields in docs():
+        counts = term_counts(fields, dim)
+        if counts:
+            df[np.fromiter(counts.keys(), dtype="<i4", count=len(counts))] += 1
+        n += 1
+    log(f"document frequencies over {n} videos: {time.monotonic() - started:.1f}s")
+
+    video_ids = np.zeros(n, dtype="<i8")
+    indptr = np.zeros(n + 1, dtype="<i8")
+    indices: List[Any] = []
+    data: List[Any] = []
+    nnz = 0
+    for i, (vid, fields) in enumerate(docs()):
+        if i >= n:
+            break
+        buckets, weights = _weights(term_counts(fields, dim), df, n, terms)
+        video_ids[i] = vid
+        indices.append(buckets)
+        data.append(weights)
+        nnz += len(buckets)
+        indptr[i + 1] = nnz
+    X = csr_matrix(
+        (np.concatenate(data) if data else np.zeros(0, "<f4"),
+         np.concatenate(indices) if indices else np.zeros(0, "<i4"), indptr),
+        shape=(n, dim),
+    )
+    log(f"vectors: {time.monotonic() - started:.1f}s, {nnz} non-zeros")
+
+    nbr_rows = np.full((n, k), -1, dtype="<i4")
+    nbr_scores = np.zeros((n, k), dtype="<f4")
+    XT = X.T.tocsc()
+    block = max(1, (1 << 25) // max(n, 1))  # ~128 MB of dense scores per block
+    kk = min(k, max(n - 1, 0))
+    for lo in range(0, n if kk else 0, block):
+        hi = min(n, lo + block)
+        S = (X[lo:hi] @ XT).toarray()
+        S[np.arange(hi - lo), np.arange(lo, hi)] = 0  # not your own neighbour
+        best = np.argpartition(-S, kk - 1, axis=1)[:, :kk]
+        best_scores = np.take_along_axis(S, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best[best_scores <= 0] = -1
+        nbr_rows[lo:hi, :kk] = best
+        nbr_scores[lo:hi, :kk] = np.maximum(best_scores, 0)
+        if lo // block % 50 == 49:
+            log(f"neighbours: {hi}/{n} rows, {time.monotonic() - started:.1f}s")
+    log(f"neighbours: {time.monotonic() - started:.1f}s")
+
+    scratch = path.rstrip(os.sep) + ".building"
+    shutil.rmtree(scratch, ignore_errors=True)
+    os.makedirs(scratch)
+    row_of = np.full(int(video_ids.max()) + 1 if n else 0, -1, dtype="<i4")
+    row_of[video_ids] = np.arange(n, dtype="<i4")
+    for name, arr in (("indptr", indptr), ("indices", X.indices.astype("<i4")), ("data", X.data.astype("<f4")),
+                      ("row_video", video_ids), ("row_of", row_of), ("nbr_rows", nbr_rows.ravel()),
+                      ("nbr_scores", nbr_scores.ravel()), ("df", df)):
+        arr.astype(_ARRAYS[name][0]).tofile(os.path.join(scratch, f"{name}.bin"))
+    meta = {"dim": dim, "k": k, "terms": terms, "rows": n, "nnz": nnz, "docs": n,
+            "generation": 0, "built_at": time.time()}
+    RelatedIndex(scratch)._write_meta(meta)
+
+    old = path.rstrip(os.sep) + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.isdir(path):
+        os.replace(path, old)
+    os.replace(scratch, path)
+    shutil.rmtree(old, ignore_errors=True)
+    log(f"done: {time.monotonic() - started:.1f}s")
+    return RelatedIndex(path).stats()
+
+
+# ---------------------------------------------------------------------
+# App integration
+# ---------------------------------------------------------------------
+
+_indexes: Dict[str, RelatedIndex] = {}
+_indexes_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_warned = False
+
+
+def get_index(app) -> RelatedIndex:
+    path = app.config["RELATED_INDEX_DIR"]
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = RelatedIndex(path)
+        return _indexes[path]
+
+
+def _video_fields(video) -> Dict[str, Optional[str]]:
+    return {name: getattr(video, name) for name, _ in _FIELDS}
+
+
+def _index_video(app, video_id: int) -> None:
+    from backend.extensions import db
+    from backend.models.video import Video
+
+    with app.app_context():
+        v = db.session.get(Video, video_id)
+        if v is None or v.transcribe_status != "ready":
+            return
+        fields = _video_fields(v)
+    started = time.monotonic()
+    row = get_index(app).add(video_id, fields)
+    logging.getLogger(__name__).info(
+        "Indexed video_id=%s as related row %s in %.1f ms", video_id, row, (time.monotonic() - started) * 1000
+    )
+
+
+def enqueue(app, video_id: int) -> None:
+    """Index a finished video in the background (one writer thread per process)."""
+    global _executor, _warned
+    if not available():
+        if not _warned:
+            _warned = True
+            app.logger.info("numpy/scipy not installed: the related-videos index is not maintained")
+        return
+    with _indexes_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related")
+    _executor.submit(tracing.bind(_run), app, video_id)
+
+
+def _run(app, video_id: int) -> None:
+    try:
+        _index_video(app, video_id)
+    except Exception:
+        logging.getLogger(__name__).exception("Related index update failed for video_id=%s", video_id)
+
+
+def remove(app, video_id: int) -> None:
+    """Drop a deleted video (or one whose transcript was cleared) from the index."""
+    if available():
+        get_index(app).remove(video_id)
+
+
+def _docs(app) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    from backend.extensions import db
+    from backend.models.video import Video
+
+    with app.app_context():
+        q = (
+            db.session.query(Video.id, Video.title, Video.summary, Video.transcribe)
+            .filter(Video.transcribe_status == "ready")
+            .order_by(Video.id)
+        )
+        for vid, title, summary, transcribe in q.yield_per(500):
+            yield vid, {"title": title, "summary": summary, "transcribe": transcribe}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Maintain the related-videos index")
+    ap.add_argument("--rebuild", action="store_true", help="recompute all vectors and neighbour lists")
+    ap.add_argument("--db", help="SQLite file (default: the app's configured database)")
+    args = ap.parse_args(argv)
+    if not available():
+        print("numpy and scipy are required: pip install numpy scipy", file=sys.stderr)
+        return 1
+
+    from backend import create_app
+
+    config = {"BACKGROUND_TASKS": False}
+    if args.db:
+        config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(args.db)}"
+    app = create_app(config)
+    index = get_index(app)
+    if args.rebuild:
+        stats = build(index.path, lambda: _docs(app), log=print)
+    else:
+        stats = index.stats()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
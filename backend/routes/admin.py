@@ -0,0 +1,90 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from backend import accounting, digest, job_queue, profiling, storage, task_state
+from backend.scheduler import get_scheduler
+from backend.transcode import get_pool
+from backend.auth_utils import admin_required
+
+
+bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+@bp.get("/storage")
+@admin_required
+def storage_usage():
+    """Disk usage of VIDEO_DIR / AUDIO_DIR and the configured byte budget."""
+    return jsonify(storage.usage())
+
+
+@bp.post("/storage/sweep")
+@admin_required
+def storage_sweep():
+    """Run the orphan sweep and budget enforcement now."""
+    freed = storage.sweep_orphans() + storage.enforce_budget()
+    return jsonify(freed_bytes=freed, **storage.usage())
+
+
+@bp.get("/usage")
+@admin_required
+def usage_report():
+    """Recorded job usage: totals and top groups (``?days=7&group=user|kind|video|day&order=tokens_in&limit=20``)."""
+    try:
+        return jsonify(accounting.report_from_args(request.args))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+@bp.get("/digests")
+@admin_required
+def digest_batch():
+    """State and counters of the last daily digest batch."""
+    return jsonify(task_state.get(digest.BATCH_KEY) or {"status": "idle"})
+
+
+@bp.post("/digests/run")
+@admin_required
+def digest_run():
+    """Build due digests now instead of waiting for the off-peak window."""
+    if not digest.trigger(current_app._get_current_object()):
+        return jsonify(error="A digest batch is already running"), 409
+    return jsonify(started=True), 202
+
+
+@bp.get("/transcode")
+@admin_required
+def transcode_stats():
+    """Transcode pool size, queue depth and accumulated CPU seconds (this process)."""
+    return jsonify(get_pool().stats())
+
+
+@bp.get("/pipeline-queue")
+@admin_required
+def pipeline_queue():
+    """Scheduler counters and queued pipeline runs in start order.
+
+    With PIPELINE_MODE=queue, the shared ``pipeline_jobs`` queue (all workers);
+    otherwise this process's scheduler.
+    """
+    if current_app.config.get("PIPELINE_MODE") == "queue":
+        return jsonify(mode="queue", items=job_queue.pending(), **job_queue.stats())
+    sched = get_scheduler()
+    return jsonify(mode="thread", items=sched.pending(), **sched.stats())
+
+
+@bp.get("/profiles")
+@admin_required
+def profiles():
+    """Recent request profiles kept in memory (newest first)."""
+    return jsonify(items=profiling.list_profiles())
+
+
+@bp.get("/profiles/<profile_id>")
+@admin_required
+def profile_detail(profile_id):
+    """One profile; ``?format=folded`` returns stacks for flamegraph tools."""
+    prof = profiling.get_profile(profile_id)
+    if not prof:
+        return jsonify(error="Profile not found"), 404
+    if request.args.get("format") == "folded":
+        return Response(profiling.folded(prof), mimetype="text/plain")
+    return jsonify(prof)
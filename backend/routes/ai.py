@@ -1,17 +1,22 @@
 import os
 import shutil
-import threading
 import subprocess
+import time
 import glob
-from typing import List, Optional, Union
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Union
 
 from flask import Blueprint, current_app, jsonify, request, g
 from backend.extensions import db
 from backend.models.video import Video
 from backend.models.source import Source
-from backend.youtube_captions import extract_video_id
-from backend.ai_ops import summarize_markdown, openai_transcribe
-from backend.auth_utils import auth_required
+from backend.youtube_captions import extract_video_id, fetch_captions_segments, watch_url
+from backend.ai_ops import get_transcriber
+from backend.auth_utils import admin_required, auth_required
+from backend.feed import fan_out_video
+from backend.scheduler import PRIORITIES, get_scheduler
+from backend.transcode import run_ffmpeg
+from backend import accounting, job_queue, related, segments, signals, storage, summary_cache, task_state, tracing, transcripts
 
 bp = Blueprint("ai", __name__, url_prefix="/ai")
 
@@ -28,13 +33,14 @@ def _normalize_transcript(t: Union[str, List[str]]) -> str:
 
 
 def _summarize(text: str, instructions: str = "", model: Optional[str] = None) -> str:
-    """Summarize transcript using AI."""
-    return summarize_markdown(text, instructions=instructions, model=model)
+    """Summarize transcript using AI (memoized on transcript, model and instructions)."""
+    return summary_cache.summarize_cached(text, instructions=instructions, model=model)
 
 
-def _transcribe(path: str, model: Optional[str] = None, language: Optional[str] = None) -> str:
-    """Transcribe an audio file using AI."""
-    return openai_transcribe(path, model=model, language=language)
+def _transcribe(path: str, model: Optional[str] = None, language: Optional[str] = None,
+                provider: Optional[str] = None) -> str:
+    """Transcribe an audio file with the configured (or requested) provider."""
+    return get_transcriber(provider).transcribe(path, model=model, language=language)
 
 
 def _resolve_audio_path(vid: Video) -> Optional[str]:
@@ -46,6 +52,7 @@ def _resolve_audio_path(vid: Video) -> Optional[str]:
     if getattr(vid, "audio_path", None):
         p = os.path.join(project_root, vid.audio_path.lstrip("/"))
         if os.path.isfile(p):
+            storage.touch(p)
             return p
 
     # Case 2: search in VIDEO_DIR
@@ -58,6 +65,7 @@ def _resolve_audio_path(vid: Video) -> Optional[str]:
             vid.audio_path = rel
             vid.audio_status = "ready"
             db.session.commit()
+            storage.track(cand, vid.id)
             return cand
 
     return None
@@ -67,9 +75,11 @@ def _resolve_audio_path(vid: Video) -> Optional[str]:
 # 🧠 Background Processing
 # ---------------------------------------------------------------------
 
-def _prepare_audio_segments(path: str) -> list[str]:
-    """Ensure audio is under OpenAI limits. Downsample + segment if needed."""
-    limit = 24 * 1024 * 1024  # 24MB
+_CHUNK_SECONDS = 600
+
+
+def _prepare_audio_segments(path: str, limit: Optional[int] = 24 * 1024 * 1024) -> list[str]:
+    """Ensure audio is under the provider's upload limit. Downsample + segment if needed."""
     try:
         size = os.path.getsize(path)
     except Exception:
@@ -78,17 +88,18 @@ def _prepare_audio_segments(path: str) -> list[str]:
     small_path = path
     try:
         base, _ = os.path.splitext(path)
-        small_path = base + ".small.m4a"
-        subprocess.run([
-            "ffmpeg", "-y", "-i", path,
-            "-ac", "1", "-ar", "16000",
-            "-c:a", "aac", "-b:a", "48k", small_path
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        size = os.path.getsize(small_path)
+        out_path = base + ".small.m4a"
+        run_ffmpeg([
+            "-y", "-i", path,
+            "-vn", "-ac", "1", "-ar", "16000",
+            "-c:a", "aac", "-b:a", "48k", out_path
+        ], label=f"downsample {os.path.basename(path)}")
+        size = os.path.getsize(out_path)
+        small_path = out_path
     except Exception:
         pass
 
-    if size and size <= limit:
+    if not limit or (size and size <= limit):
         return [small_path]
 
     # Split into ~10min chunks
@@ -96,25 +107,147 @@ def _prepare_audio_segments(path: str) -> list[str]:
     base = os.path.splitext(os.path.basename(small_path))[0]
     pattern = os.path.join(out_dir, f"{base}.part-%03d.m4a")
     try:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", small_path,
-            "-f", "segment", "-segment_time", "600",
+        run_ffmpeg([
+            "-y", "-i", small_path,
+            "-f", "segment", "-segment_time", str(_CHUNK_SECONDS),
             "-c", "copy", pattern
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        ], label=f"segment {os.path.basename(small_path)}")
         return sorted(glob.glob(os.path.join(out_dir, f"{base}.part-*.m4a")))
     except Exception:
         return [small_path]
 
 
-def _run_full_pipeline(app, video_id: int, url: str):
-    """Main background pipeline: download, transcribe, summarize."""
+def _media_seconds(path: str) -> Optional[float]:
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+            capture_output=True, text=True, timeout=30, check=True,
+        ).stdout
+        return float(out.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def _chunk_offsets_ms(durations: List[Optional[float]]) -> List[int]:
+    """Start of each audio chunk on the video's timeline (nominal chunk length where ffprobe can't tell)."""
+    offsets, pos = [], 0.0
+    for duration in durations:
+        offsets.append(int(round(pos * 1000)))
+        pos += duration if duration is not None else _CHUNK_SECONDS
+    return offsets
+
+
+def _audio_seconds(duration: Optional[float], timed: List[segments.Segment]) -> float:
+    """Length of transcribed audio for accounting: ffprobe's, else the end of the last recognized segment."""
+    if duration is not None:
+        return duration
+    return timed[-1].end_ms / 1000 if timed else 0.0
+
+
+def _pipeline_key(video_id: int) -> str:
+    return f"pipeline:{video_id}"
+
+
+def _flight_key(youtube_id: str) -> str:
+    """Claimed by the one pipeline run working on a YouTube video (any source, any user)."""
+    return f"youtube:{youtube_id}"
+
+
+def _pipeline_state(video_id: int) -> Dict[str, Any]:
+    """Pipeline state of a video; while waiting on another video's run, that run's progress."""
+    state = task_state.get(_pipeline_key(video_id)) or {"status": "idle", "progress": 0}
+    if state.get("status") == "queued":
+        if current_app.config.get("PIPELINE_MODE") == "queue":
+            state["queue_position"] = job_queue.position(video_id)
+        else:
+            state["queue_position"] = get_scheduler().position(video_id)
+    if state.get("status") == "waiting" and state.get("flight"):
+        shared = task_state.get(state["flight"]) or {}
+        state["leader"] = shared.get("video_id") or state.get("leader")
+        state["leader_status"] = shared.get("status")
+        state["progress"] = shared.get("progress", 0)
+    return state
+
+
+@contextmanager
+def _stage(video_id: int, name: str):
+    """Time a pipeline stage and emit ``signals.pipeline_stage`` (also on failure).
+
+    The block may set ``info["bytes"]`` to report the amount of data processed.
+    """
+    info = {"bytes": 0}
+    started = time.monotonic()
+    ok = False
+    trace = tracing.Span(name, "pipeline", video_id=video_id).start()
+    try:
+        yield info
+        ok = True
+    finally:
+        trace.end(ok=ok, bytes=info["bytes"])
+        signals.pipeline_stage.send(
+            video_id, stage=name, seconds=time.monotonic() - started, ok=ok, bytes=info["bytes"]
+        )
+
+
+def _file_sizes(paths) -> int:
+    total = 0
+    for p in paths:
+        try:
+            total += os.path.getsize(p)
+        except OSError:
+            pass
+    return total
+
+
+def _run_full_pipeline(app, video_id: int, url: str, provider: Optional[str] = None) -> str:
+    """Main background pipeline: download, transcribe, summarize.
+
+    ``provider`` selects the transcription backend (default: TRANSCRIBE_PROVIDER).
+    Returns the final status (``finished`` or ``failed``).
+    """
+    signals.pipeline_started.send(video_id)
+    started = time.monotonic()
+    status = "failed"
+    trace = tracing.Span("pipeline", "pipeline", video_id=video_id, provider=provider).start()
+    try:
+        with accounting.job("pipeline", app=app, video_id=video_id,
+                            detail=provider or os.environ.get("TRANSCRIBE_PROVIDER") or "openai") as usage:
+            status = usage.status = _pipeline_steps(app, video_id, url, provider)
+    finally:
+        trace.end(status=status)
+        try:
+            _finish_flight(app, video_id, url, status)
+        except Exception:
+            app.logger.exception("Handing over pipeline result of video_id=%s failed", video_id)
+        if status == "finished":
+            related.enqueue(app, video_id)
+        signals.pipeline_finished.send(video_id, status=status, seconds=time.monotonic() - started)
+    return status
+
+
+def _pipeline_steps(app, video_id: int, url: str, provider: Optional[str]) -> str:
     from yt_dlp import YoutubeDL
 
     with app.app_context():
+        key = _pipeline_key(video_id)
+        youtube_id = extract_video_id(url)
+        flight = _flight_key(youtube_id) if youtube_id else None
+
+        def set_state(**fields):
+            # Mirrored on the YouTube ID claim, which callers attached to this run read
+            task_state.update(key, **fields)
+            if flight:
+                task_state.update(flight, **fields)
+
         v = Video.query.get(video_id)
         if not v:
             current_app.logger.warning("Video %s not found", video_id)
-            return
+            set_state(status="failed", error="Video not found")
+            return "failed"
+
+        # ---------------- Step 0: Captions (optional) ----------------
+        if youtube_id and app.config.get("PIPELINE_CAPTIONS") and _captions_step(v, youtube_id, set_state):
+            return _finish_steps(video_id, v, set_state)
 
         out_dir = app.config.get("VIDEO_DIR")
         os.makedirs(out_dir, exist_ok=True)
@@ -122,87 +255,257 @@ def _run_full_pipeline(app, video_id: int, url: str):
         # ---------------- Step 1: Download ----------------
         try:
             current_app.logger.info("Downloading audio for video_id=%s", video_id)
-            vid_key = extract_video_id(url)
-            canon_url = f"https://www.youtube.com/watch?v={vid_key}" if vid_key else url
-            ydl_opts = {
-                "format": "bestaudio/best",
-                "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
-                "quiet": True,
-                "noplaylist": True,
-                "postprocessors": [
-                    {"key": "FFmpegExtractAudio", "preferredcodec": "m4a", "preferredquality": "0"},
-                    {"key": "FFmpegMetadata"},
-                ],
-            }
-            with YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(canon_url, download=True)
-                base = os.path.splitext(ydl.prepare_filename(info))[0]
-                audio_path = next((base + ext for ext in [".m4a", ".mp3", ".aac", ".wav", ".webm"] if os.path.exists(base + ext)), None)
-                if not audio_path:
-                    raise RuntimeError("No audio file found")
+            set_state(status="downloading")
+            with _stage(video_id, "download") as st:
+                canon_url = watch_url(youtube_id) if youtube_id else url
+                # No yt-dlp postprocessors: the raw audio stream is transcoded once,
+                # through the transcode pool, in _prepare_audio_segments.
+                ydl_opts = {
+                    "format": "bestaudio[ext=m4a]/bestaudio/best",
+                    "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
+                    "quiet": True,
+                    "noprogress": True,
+                    "noplaylist": True,
+                }
+                with YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(canon_url, download=True)
+                    produced = ydl.prepare_filename(info)
+                    base = os.path.splitext(produced)[0]
+                    candidates = [produced] + [base + ext for ext in [".m4a", ".mp3", ".aac", ".wav", ".webm", ".opus"]]
+                    audio_path = next((p for p in candidates if os.path.exists(p)), None)
+                    if not audio_path:
+                        raise RuntimeError("No audio file found")
+                st["bytes"] = _file_sizes([audio_path])
+                accounting.charge(bytes_downloaded=st["bytes"])
 
             rel = f"/{os.path.relpath(audio_path, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))}"
             v.audio_path, v.audio_status = rel, "ready"
             db.session.commit()
+            storage.track(audio_path, video_id)
         except Exception as e:
             current_app.logger.exception("Audio download failed: %s", e)
             v.audio_status = "failed"
             db.session.commit()
-            return
+            set_state(status="failed", error=f"download: {e}")
+            storage.release_video(video_id)
+            return "failed"
 
         # ---------------- Step 2: Transcribe ----------------
         try:
             current_app.logger.info("Transcribing video_id=%s", video_id)
             v.transcribe_status = "pending"
             db.session.commit()
-
-            chunks = _prepare_audio_segments(audio_path)
-            parts = [openai_transcribe(p) for p in chunks if p]
-            transcript = "\n\n".join(filter(None, parts))
+            set_state(status="transcribing")
+
+            transcriber = get_transcriber(provider)
+            with _stage(video_id, "transcode") as st:
+                chunks = _prepare_audio_segments(audio_path, limit=transcriber.max_upload_bytes)
+                st["bytes"] = _file_sizes(chunks)
+            for p in chunks:
+                storage.track(p, video_id)
+            with _stage(video_id, "transcribe") as st:
+                st["bytes"] = _file_sizes(chunks)
+                # Each segment is stored as it finishes, so the start of the
+                # transcript is readable while later segments are running
+                parts = transcripts.begin(v, len(chunks))
+                db.session.commit()
+                durations = [_media_seconds(p) for p in chunks]
+                offsets = _chunk_offsets_ms(durations)
+                for index, p in enumerate(chunks):
+                    if index in parts:
+                        continue  # kept from an earlier, failed run
+                    with tracing.span("transcribe.segment", "transcribe", index=index,
+                                      provider=transcriber.name, bytes=_file_sizes([p])):
+                        parts[index], timed = transcriber.transcribe_timed(p)
+                    accounting.charge(audio_seconds=_audio_seconds(durations[index], timed))
+                    transcripts.save_part(v, index, parts[index], segments.shift(timed, offsets[index]))
+            transcript = transcripts.join([parts[i] for i in sorted(parts)])
 
             if not transcript.strip():
                 raise RuntimeError("Empty transcript")
 
             v.transcribe = transcript
             v.transcribe_status = "ready"
+            timed = transcripts.timed_segments(video_id)
+            if timed:
+                segments.save(video_id, timed, source=transcriber.name)
+            else:
+                segments.delete(video_id)
+            transcripts.clear(video_id)
             db.session.commit()
         except Exception as e:
             current_app.logger.exception("Transcription failed: %s", e)
             v.transcribe_status = "failed"
             db.session.commit()
-            return
+            set_state(status="failed", error=f"transcribe: {e}")
+            # Keep the downloaded audio for a manual retry; drop derived fragments
+            storage.release_video(video_id, keep=[audio_path])
+            return "failed"
 
-        # ---------------- Step 3: Summarize ----------------
-        try:
-            current_app.logger.info("Summarizing video_id=%s", video_id)
-            v.summary = summarize_markdown(v.description + v.transcribe)
-            db.session.commit()
-        except Exception as e:
-            current_app.logger.exception("Summarization failed: %s", e)
+        return _finish_steps(video_id, v, set_state)
 
-        # ---------------- Step 4: Cleanup ----------------
-        try:
-            current_app.logger.info("Cleaning up video_id=%s", video_id)
-            for fp in glob.glob(audio_path.replace(".m4a", "*.m4a")):
-                try:
-                    os.remove(fp)
-                except Exception:
-                    pass
-            v.audio_path = ""
-            v.audio_status = ""
-            db.session.commit()
-        except Exception as e:
-            current_app.logger.warning("Cleanup failed: %s", e)
 
+def _captions_step(v: Video, youtube_id: str, set_state) -> bool:
+    """Use the video's YouTube captions as its transcript (PIPELINE_CAPTIONS). False if it has none."""
+    try:
+        current_app.logger.info("Fetching captions for video_id=%s", v.id)
+        set_state(status="transcribing")
+        with _stage(v.id, "captions") as st:
+            cues = fetch_captions_segments(youtube_id)
+            text = "\n".join(c.text for c in cues).strip()
+            st["bytes"] = len(text.encode("utf-8"))
+        if not text:
+            return False
+        v.transcribe, v.transcribe_status = text, "ready"
+        # Cue timings are kept for deep links, like the transcription provider's
+        segments.save(v.id, cues, source="captions")
+        db.session.commit()
+        return True
+    except Exception as e:
+        current_app.logger.warning("Captions unavailable for video_id=%s: %s", v.id, e)
+        db.session.rollback()
+        return False
+
+
+def _finish_steps(video_id: int, v: Video, set_state) -> str:
+    """Summarize, publish and clean up a video whose transcript is ready."""
+    # ---------------- Step 3: Summarize ----------------
+    try:
+        current_app.logger.info("Summarizing video_id=%s", video_id)
+        set_state(status="summarizing")
+        with _stage(video_id, "summarize") as st:
+            st["bytes"] = len(v.transcribe.encode("utf-8"))
+            v.summary = _summarize(v.transcribe)
+        db.session.commit()
+    except Exception as e:
+        current_app.logger.exception("Summarization failed: %s", e)
+
+    # Video is finished: publish it to its followers' feeds
+    try:
+        fan_out_video(v)
+    except Exception as e:
+        current_app.logger.exception("Feed fan-out failed: %s", e)
+        db.session.rollback()
 
-def _run_async(app, video_id: int, url: str):
-    """Run pipeline in a background thread."""
-    threading.Thread(
-        target=_run_full_pipeline,
-        args=(app, video_id, url),
-        daemon=True,
-        name=f"pipeline-{video_id}"
-    ).start()
+    # ---------------- Step 4: Cleanup ----------------
+    try:
+        current_app.logger.info("Cleaning up video_id=%s", video_id)
+        storage.release_video(video_id)
+        v.audio_path = ""
+        v.audio_status = ""
+        db.session.commit()
+    except Exception as e:
+        current_app.logger.warning("Cleanup failed: %s", e)
+
+    set_state(status="finished", progress=100)
+    return "finished"
+
+
+def _adopt_result(video: Video, leader_id: int, status: str) -> bool:
+    """Give a video waiting on another video's run that run's outcome. Returns True if it was waiting."""
+    key = _pipeline_key(video.id)
+    if (task_state.get(key) or {}).get("status") != "waiting":
+        return False
+    leader = db.session.get(Video, leader_id)
+    if status != "finished" or not leader or leader.transcribe_status != "ready":
+        task_state.update(key, status="failed", error=f"shared run of video {leader_id} {status}")
+        return True
+    video.transcribe, video.transcribe_status = leader.transcribe, "ready"
+    video.summary = leader.summary
+    segments.copy(leader_id, video.id)
+    db.session.commit()
+    try:
+        fan_out_video(video)
+    except Exception as e:
+        current_app.logger.exception("Feed fan-out failed: %s", e)
+        db.session.rollback()
+    related.enqueue(current_app._get_current_object(), video.id)
+    task_state.update(key, status="finished", progress=100, leader=leader_id)
+    return True
+
+
+def _finish_flight(app, video_id: int, url: str, status: str) -> None:
+    """Release this run's YouTube ID claim and hand the result to videos attached to it."""
+    youtube_id = extract_video_id(url)
+    if not youtube_id:
+        return
+    with app.app_context():
+        flight = _flight_key(youtube_id)
+        if (task_state.get(flight) or {}).get("video_id") != video_id:
+            return
+        task_state.update(flight, status=status)
+        followers = Video.query.filter(Video.youtube_id == youtube_id, Video.id != video_id).all()
+        for f in followers:
+            if _adopt_result(f, video_id, status):
+                current_app.logger.info("video_id=%s took the result of video_id=%s", f.id, video_id)
+
+
+def _adopt_if_done(video_id: int, flight: str) -> None:
+    shared = task_state.get(flight) or {}
+    if shared.get("status") in ("finished", "failed") and shared.get("video_id"):
+        v = db.session.get(Video, video_id)
+        if v:
+            _adopt_result(v, shared["video_id"], shared["status"])
+
+
+def _keep_alive(app, video_id: int, url: str) -> None:
+    """Keep the run's pipeline state (and its YouTube ID claim) fresh while it is queued or running here."""
+    youtube_id = extract_video_id(url)
+    keys = [_pipeline_key(video_id)] + ([_flight_key(youtube_id)] if youtube_id else [])
+    task_state.keep_alive(app, *keys)
+
+
+def _run_async(app, video_id: int, url: str, provider: Optional[str] = None,
+               priority: str = "interactive") -> Dict[str, Any]:
+    """Queue the pipeline on the priority scheduler, unless a run is already in flight.
+
+    With PIPELINE_MODE=queue the run goes to the ``pipeline_jobs`` table
+    instead, for a ``python -m backend.worker`` process to pick up.
+
+    Single-flight per video and per YouTube ID: triggering a video whose run
+    is in progress, or another row of the same YouTube video (added under a
+    different source), attaches to the running pipeline instead of
+    downloading and transcribing it again. Attached rows wait with status
+    ``waiting`` and get the transcript and summary when the run finishes.
+    Triggering a queued video again moves it up to ``priority``. Returns the
+    pipeline state plus ``started``.
+    """
+    key = _pipeline_key(video_id)
+    youtube_id = extract_video_id(url)
+    queued_mode = app.config.get("PIPELINE_MODE") == "queue"
+    with app.app_context():
+        if not task_state.claim(key):
+            state = _pipeline_state(video_id)
+            waiting_on = state.get("flight") if state.get("status") == "waiting" else None
+            if not waiting_on or task_state.is_active(task_state.get(waiting_on)):
+                if queued_mode:
+                    job_queue.promote(video_id, priority)
+                else:
+                    get_scheduler().promote(video_id, priority)
+                return {"started": False, **state}
+            # The run this video waited on died without handing over: run it here
+            task_state.update(key, status="queued", leader=None, flight=None)
+        if youtube_id:
+            flight = _flight_key(youtube_id)
+            if not task_state.claim(flight):
+                leader = (task_state.get(flight) or {}).get("video_id")
+                task_state.update(key, status="waiting", progress=0, error=None, leader=leader, flight=flight)
+                task_state.keep_alive(app, key)
+                # The shared run may have finished between the claim and the update
+                _adopt_if_done(video_id, flight)
+                return {"started": False, **_pipeline_state(video_id)}
+            task_state.update(flight, video_id=video_id)
+        task_state.update(key, status="queued", progress=0, error=None, leader=None, flight=None,
+                          priority=priority)
+        _keep_alive(app, video_id, url)
+        duration = db.session.query(Video.duration_seconds).filter(Video.id == video_id).scalar()
+        if queued_mode:
+            job_queue.enqueue(video_id, url, provider, priority, duration)
+    signals.pipeline_queued.send(video_id)
+    if not queued_mode:
+        run = tracing.bind(_run_full_pipeline)
+        get_scheduler().submit(video_id, lambda: run(app, video_id, url, provider), priority, duration)
+    return {"started": True, "status": "queued", "progress": 0, "priority": priority}
 
 
 # ---------------------------------------------------------------------
@@ -220,6 +523,16 @@ def transcribe_video(video_id: int):
     if not src or src.user_id != g.current_user.id:
         return jsonify(error="Not authorized"), 403
 
+    data = request.get_json(silent=True) or {}
+    provider = (data.get("provider") or "").strip() or None
+    try:
+        transcriber = get_transcriber(provider)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    reason = transcriber.unavailable()
+    if reason:
+        return jsonify(error=f"Transcription provider '{transcriber.name}' is unavailable: {reason}"), 503
+
     abs_path = _resolve_audio_path(vid)
     if not abs_path:
         return jsonify(error="Audio file not found"), 404
@@ -227,15 +540,27 @@ def transcribe_video(video_id: int):
     vid.transcribe_status = "pending"
     db.session.commit()
 
-    text = _transcribe(abs_path)
+    try:
+        text, timed = transcriber.transcribe_timed(abs_path)
+    except Exception:
+        current_app.logger.exception("Transcription of video_id=%s with %s failed", vid.id, transcriber.name)
+        text, timed = "", []
+    accounting.charge(audio_seconds=_audio_seconds(_media_seconds(abs_path), timed))
     if not text:
         vid.transcribe_status = "failed"
         db.session.commit()
         return jsonify(error="Transcription failed"), 502
 
-    vid.transcribe, vid.transcribe_status = text, "ready"
-    vid.summary = _summarize(text)
+    # Before the writes below: the summary call must not wait on this session's transaction
+    summary = _summarize(text)
+    vid.transcribe, vid.transcribe_status, vid.summary = text, "ready", summary
+    if timed:
+        segments.save(vid.id, timed, source=transcriber.name)
+    else:
+        segments.delete(vid.id)
+    fan_out_video(vid, commit=False)
     db.session.commit()
+    related.enqueue(current_app._get_current_object(), vid.id)
     return jsonify(video=vid.to_dict()), 200
 
 
@@ -265,6 +590,13 @@ def summarize_video(video_id: int):
     return jsonify(video=vid.to_dict())
 
 
+@bp.get("/summary-cache")
+@admin_required
+def summary_cache_stats():
+    """Hit/miss counters for the summary memo table (this process)."""
+    return jsonify(summary_cache.stats())
+
+
 @bp.post("/videos/<int:video_id>/pipeline")
 @auth_required
 def queue_pipeline(video_id: int):
@@ -277,5 +609,32 @@ def queue_pipeline(video_id: int):
     if not src or src.user_id != g.current_user.id:
         return jsonify(error="Not authorized"), 403
 
-    _run_async(current_app._get_current_object(), video_id, vid.url)
-    return jsonify(message="Pipeline started", video_id=video_id)
+    data = request.get_json(silent=True) or {}
+    provider = (data.get("provider") or "").strip() or None
+    try:
+        get_transcriber(provider)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    priority = data.get("priority") or "interactive"
+    if priority not in PRIORITIES:
+        return jsonify(error=f"'priority' must be one of {', '.join(PRIORITIES)}"), 400
+
+    state = _run_async(current_app._get_current_object(), video_id, vid.url, provider=provider, priority=priority)
+    if not state.pop("started"):
+        return jsonify(message="Pipeline already running", video_id=video_id, attached=True, **state)
+    return jsonify(message="Pipeline started", video_id=video_id, attached=False, **state)
+
+
+@bp.get("/videos/<int:video_id>/pipeline")
+@auth_required
+def pipeline_status(video_id: int):
+    """Current pipeline state for a video (shared across worker processes)."""
+    vid = Video.query.get(video_id)
+    if not vid:
+        return jsonify(error="Video not found"), 404
+
+    src = Source.query.get(vid.source_id)
+    if not src or src.user_id != g.current_user.id:
+        return jsonify(error="Not authorized"), 403
+
+    return jsonify(video_id=video_id, **_pipeline_state(video_id))
@@ -1,11 +1,12 @@
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, current_app, g, jsonify, request
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from backend import accounting, http_client
+from backend.auth_utils import auth_required
 from backend.extensions import db
 from backend.models.user import User
 from backend.security import JWTError, create_jwt, decode_jwt
 import os
-import requests
 
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -84,8 +85,10 @@ def google_login():
     if not client_id:
         return jsonify(error="Server missing GOOGLE_CLIENT_ID"), 500
 
+    import requests
+
     try:
-        resp = requests.get("https://oauth2.googleapis.com/tokeninfo", params={"id_token": id_token}, timeout=15)
+        resp = http_client.get("https://oauth2.googleapis.com/tokeninfo", params={"id_token": id_token}, timeout=15)
     except requests.RequestException as e:
         return jsonify(error=f"Google verify failed: {e}"), 502
 
@@ -114,3 +117,16 @@ def google_login():
 
     token = _issue_token(user)
     return jsonify(token=token, user=user.to_dict())
+
+
+@bp.get("/me/usage")
+@auth_required
+def my_usage():
+    """The user's own recorded usage (``?days=30&group=day|kind|video``)."""
+    args = {"days": 30, **request.args.to_dict()}
+    if args.get("group") == "user":
+        return jsonify(error="group must be one of kind, video, day"), 400
+    try:
+        return jsonify(accounting.report_from_args(args, user_id=g.current_user.id, default_group="day"))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
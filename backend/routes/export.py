@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, g, request, stream_with_context
+
+from backend import compression, export
+from backend.auth_utils import auth_required
+
+
+bp = Blueprint("export", __name__, url_prefix="/export")
+
+
+@bp.get("/library")
+@auth_required
+def export_library():
+    """Stream the user's sources and videos (with transcripts and summaries) as NDJSON.
+
+    ``?segments=1`` adds each video's timed segments; ``?gzip=1`` sends a
+    ``.ndjson.gz`` file instead of relying on ``Accept-Encoding``.
+    """
+    include_segments = request.args.get("segments") in ("1", "true", "yes")
+    as_gzip = request.args.get("gzip") in ("1", "true", "yes")
+    chunks = export.ndjson_chunks(g.current_user.id, include_segments)
+    filename = f"library-{datetime.utcnow():%Y%m%d}.ndjson"
+    if as_gzip:
+        chunks = compression.compress_stream(chunks, "gzip", max(current_app.config["COMPRESS_LEVEL"], 6))
+        filename += ".gz"
+    resp = current_app.response_class(
+        stream_with_context(chunks),
+        mimetype="application/gzip" if as_gzip else "application/x-ndjson",
+    )
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
@@ -0,0 +1,68 @@
+from flask import Blueprint, Response, jsonify, request, g
+
+from backend import feed
+from backend.auth_utils import auth_required
+from backend.models.digest import Digest
+
+
+bp = Blueprint("feed", __name__, url_prefix="/feed")
+
+
+@bp.get("")
+@auth_required
+def get_feed():
+    """Unified feed across all of the user's sources, newest first (cursor-paginated)."""
+    limit = request.args.get("limit", 20, type=int)
+    limit = max(1, min(limit, 100))
+    cursor = request.args.get("cursor") or None
+    videos, next_cursor = feed.get_page(g.current_user.id, limit=limit, cursor=cursor)
+    return jsonify(items=[v.to_dict() for v in videos], next_cursor=next_cursor)
+
+
+def _digest_response(d: Digest):
+    """The stored digest as JSON, or its Markdown alone with ``?format=markdown``; conditional on its ETag."""
+    if request.args.get("format") == "markdown":
+        resp = Response(d.markdown, mimetype="text/markdown")
+    else:
+        resp = jsonify(d.to_dict())
+    resp.set_etag(f"digest-{d.id}-{request.args.get('format') or 'json'}")
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
+
+
+@bp.get("/digest")
+@auth_required
+def get_digest():
+    """The user's latest daily digest (built off-peak, see backend/digest.py)."""
+    d = Digest.query.filter_by(user_id=g.current_user.id).order_by(Digest.until.desc()).first()
+    if not d:
+        return jsonify(error="No digest yet"), 404
+    return _digest_response(d)
+
+
+@bp.get("/digests")
+@auth_required
+def list_digests():
+    """Earlier digests of the user, newest first (without their Markdown)."""
+    limit = max(1, min(request.args.get("limit", 30, type=int), 100))
+    rows = (
+        Digest.query.filter_by(user_id=g.current_user.id)
+        .order_by(Digest.until.desc())
+        .limit(limit)
+        .all()
+    )
+    items = []
+    for d in rows:
+        item = d.to_dict()
+        item.pop("markdown")
+        items.append(item)
+    return jsonify(items=items)
+
+
+@bp.get("/digests/<int:digest_id>")
+@auth_required
+def get_digest_by_id(digest_id: int):
+    d = Digest.query.filter_by(id=digest_id, user_id=g.current_user.id).first()
+    if not d:
+        return jsonify(error="Digest not found"), 404
+    return _digest_response(d)
@@ -0,0 +1,19 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+
+from backend import metrics
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def scrape():
+    """Prometheus text exposition of this process's metrics."""
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {token}"):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -3,13 +3,18 @@ import os
 import glob
 import re
 import shutil
-import requests
+from datetime import datetime
 
+from backend import enrichment, http_client, related, segments, storage, transcripts
+from backend.ai_ops import get_transcriber
 from backend.auth_utils import auth_required
 from backend.extensions import db
+from backend.feed import fan_out_video, remove_video
+from backend.json_provider import json_list_response
 from backend.models.source import Source
 from backend.models.video import Video
-from backend.youtube_captions import extract_video_id
+from backend.scheduler import PRIORITIES
+from backend.youtube_captions import extract_video_id, youtube_api_url
 
 bp = Blueprint("sources", __name__, url_prefix="/sources")
 
@@ -20,19 +25,22 @@ bp = Blueprint("sources", __name__, url_prefix="/sources")
 @bp.get("")
 @auth_required
 def list_sources():
-    """List all sources belonging to the authenticated user."""
-    items = (
-        Source.query.filter_by(user_id=g.current_user.id)
-        .order_by(Source.id.desc())
-        .all()
-    )
+    """List all sources belonging to the authenticated user.
+
+    ``?since=<updated_at>`` returns only sources changed after that time.
+    """
+    q = Source.query.filter_by(user_id=g.current_user.id)
+    since = _parse_since(request.args.get("since"))
+    if since:
+        q = q.filter(Source.updated_at > since)
+    items = q.order_by(Source.id.desc()).all()
     return jsonify([s.to_dict() for s in items])
 
 
 @bp.post("")
 @auth_required
 def add_source():
-    """Add a new YouTube channel source."""
+    """Add a new YouTube channel source (202 while the channel label is looked up)."""
     data = request.get_json() or {}
     type_ = (data.get("type") or "").strip().lower()
     value = (data.get("value") or "").strip()
@@ -43,61 +51,22 @@ def add_source():
     if type_ != "youtube_channel":
         return jsonify(error="Unsupported source type"), 400
 
-    # Auto-resolve channel label via YouTube Data API if not provided
-    if not label:
-        api_key = os.environ.get("YOUTUBE_API_KEY")
-        if api_key:
-            try:
-                u = value
-                chan_id = handle = None
-                # Parse possible URL or handle
-                if u.startswith("@"):
-                    handle = u[1:]
-                m = re.search(r"/channel/([A-Za-z0-9_-]+)", u)
-                if m:
-                    chan_id = m.group(1)
-                mh = re.search(r"/@([A-Za-z0-9._-]+)", u)
-                if mh:
-                    handle = mh.group(1)
-
-                # Lookup channel info
-                if chan_id:
-                    r = requests.get(
-                        "https://www.googleapis.com/youtube/v3/channels",
-                        params={"part": "snippet", "id": chan_id, "key": api_key},
-                        timeout=12,
-                    )
-                    if r.ok:
-                        items = (r.json() or {}).get("items") or []
-                        if items:
-                            label = items[0].get("snippet", {}).get("title")
-                elif handle:
-                    r = requests.get(
-                        "https://www.googleapis.com/youtube/v3/search",
-                        params={
-                            "part": "snippet",
-                            "type": "channel",
-                            "q": handle,
-                            "maxResults": 1,
-                            "key": api_key,
-                        },
-                        timeout=12,
-                    )
-                    if r.ok:
-                        items = (r.json() or {}).get("items") or []
-                        if items:
-                            it = items[0]
-                            label = it.get("snippet", {}).get("channelTitle")
-                            ch_id = it.get("snippet", {}).get("channelId")
-                            if ch_id:
-                                value = f"https://www.youtube.com/channel/{ch_id}"
-            except Exception:
-                pass
-
-    src = Source(user_id=g.current_user.id, type=type_, value=value, label=label)
+    # Channel label (and canonical URL for handles) is resolved in the background
+    needs_lookup = not label and bool(os.environ.get("YOUTUBE_API_KEY"))
+    src = Source(
+        user_id=g.current_user.id,
+        type=type_,
+        value=value,
+        label=label,
+        metadata_status="pending" if needs_lookup else "skipped",
+    )
     db.session.add(src)
     db.session.commit()
-    return jsonify(src.to_dict()), 201
+    if not needs_lookup:
+        return jsonify(src.to_dict()), 201
+
+    enrichment.submit_source(current_app._get_current_object(), src.id)
+    return jsonify(src.to_dict()), 202
 
 
 @bp.get("/<int:source_id>")
@@ -120,13 +89,19 @@ def list_videos(source_id: int):
     src = Source.query.get(source_id)
     if not src or src.user_id != g.current_user.id:
         return jsonify(error="Source not found"), 404
-    return jsonify([v.to_dict() for v in src.videos])
+    source_id = src.id
+    return json_list_response(
+        lambda: Video.query.filter_by(source_id=source_id).order_by(Video.id.desc()), Video.to_dict
+    )
 
 
 @bp.post("/<int:source_id>/videos")
 @auth_required
 def add_video(source_id: int):
-    """Add a new video under a source and run AI pipeline."""
+    """Add a new video under a source and run AI pipeline.
+
+    Returns 202 right after the insert; metadata and the pipeline run in the background.
+    """
     src = Source.query.get(source_id)
     if not src or src.user_id != g.current_user.id:
         return jsonify(error="Source not found"), 404
@@ -136,83 +111,49 @@ def add_video(source_id: int):
     if not url:
         return jsonify(error="'url' is required"), 400
 
+    priority = data.get("priority") or "interactive"
+    if priority not in PRIORITIES:
+        return jsonify(error=f"'priority' must be one of {', '.join(PRIORITIES)}"), 400
+    provider = (data.get("provider") or "").strip() or None
+    try:
+        get_transcriber(provider)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
     existing = Video.query.filter_by(source_id=src.id, url=url).first()
     if existing:
         return jsonify(error="Video already added"), 409
 
-    # Fetch YouTube metadata
-    vid_id = extract_video_id(url)
-    api_key = os.environ.get("YOUTUBE_API_KEY")
-
-    title = description = channel_title = published_at = None
-    views = likes = dislikes = comments = None
-
-    if vid_id and api_key:
-        try:
-            r = requests.get(
-                "https://www.googleapis.com/youtube/v3/videos",
-                params={
-                    "part": "snippet,statistics",
-                    "id": vid_id,
-                    "key": api_key,
-                },
-                timeout=15,
-            )
-            if r.ok:
-                j = r.json() or {}
-                items = j.get("items") or []
-                if items:
-                    it = items[0]
-                    sn = it.get("snippet", {})
-                    st = it.get("statistics", {})
-                    title = (sn.get("title") or "").strip() or None
-                    description = sn.get("description")
-                    channel_title = sn.get("channelTitle")
-                    published_at = sn.get("publishedAt")
-
-                    def to_int(x):
-                        try:
-                            return int(x)
-                        except Exception:
-                            return None
-
-                    views = to_int(st.get("viewCount"))
-                    likes = to_int(st.get("likeCount"))
-                    dislikes = to_int(st.get("dislikeCount"))
-                    comments = to_int(st.get("commentCount"))
-        except Exception:
-            pass
-
-    # Create video record
-    video = Video(
-        source_id=src.id,
-        url=url,
-        title=title or url,
-        description=description,
-        channel_title=channel_title,
-        view_count=views,
-        like_count=likes,
-        dislike_count=dislikes,
-        comment_count=comments,
-        published_at=published_at,
-    )
+    # Create video record; YouTube metadata is filled in by a background lookup
+    video = Video(source_id=src.id, url=url, youtube_id=extract_video_id(url), title=url, metadata_status="pending")
     db.session.add(video)
     db.session.commit()
+    enrichment.submit_video(current_app._get_current_object(), video.id)
 
     # ✅ Trigger the AI pipeline asynchronously (new ai.py system)
     try:
         from backend.routes.ai import _run_async
         current_app.logger.info("Starting full AI pipeline for video_id=%s", video.id)
-        _run_async(current_app._get_current_object(), video.id, video.url)
+        _run_async(current_app._get_current_object(), video.id, video.url, provider=provider, priority=priority)
     except Exception as e:
         current_app.logger.exception("Pipeline start failed for video_id=%s: %s", video.id, e)
 
-    return jsonify(video.to_dict()), 201
+    return jsonify(video.to_dict()), 202
 
 
 # ---------------------------------
 # HELPERS
 # ---------------------------------
+def _parse_since(value):
+    """Parse an ``updated_at`` value as returned by to_dict (ISO 8601, optional 'Z')."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        return None
+
+
 def _get_owned_source_and_video(source_id: int, video_id: int):
     """Ensure source and video belong to current user."""
     src = Source.query.get(source_id)
@@ -235,7 +176,54 @@ def get_video(source_id: int, video_id: int):
         return jsonify(error="Source not found"), 404
     if not vid:
         return jsonify(error="Video not found"), 404
-    return jsonify(vid.to_dict())
+    data = vid.to_dict()
+    data["transcript_progress"] = transcripts.progress(vid)
+    if vid.transcribe_status == "pending" and vid.transcript_parts_done:
+        data["partial_transcript"] = transcripts.partial_text(vid.id)
+    return jsonify(data)
+
+
+@bp.get("/<int:source_id>/videos/<int:video_id>/transcript")
+@auth_required
+def get_transcript_range(source_id: int, video_id: int):
+    """Transcript text from ``?offset=`` (characters), at most ``?limit=`` characters.
+
+    Works while the video is still being transcribed: poll with the returned
+    ``next_offset`` to fetch only newly finished segments.
+    """
+    src, vid = _get_owned_source_and_video(source_id, video_id)
+    if not src:
+        return jsonify(error="Source not found"), 404
+    if not vid:
+        return jsonify(error="Video not found"), 404
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", type=int)
+    return jsonify(transcripts.read_range(vid, offset=offset, limit=limit))
+
+
+@bp.get("/<int:source_id>/videos/<int:video_id>/segments")
+@auth_required
+def get_transcript_segments(source_id: int, video_id: int):
+    """Timed transcript segments overlapping ``?start=`` .. ``?end=`` (seconds).
+
+    ``end`` defaults to the end of the video; at most ``?limit=`` segments
+    (default 500) are returned, ``next_start`` tells where to continue.
+    """
+    src, vid = _get_owned_source_and_video(source_id, video_id)
+    if not src:
+        return jsonify(error="Source not found"), 404
+    if not vid:
+        return jsonify(error="Video not found"), 404
+    start = request.args.get("start", 0.0, type=float)
+    end = request.args.get("end", type=float)
+    limit = min(max(request.args.get("limit", 500, type=int), 1), 5000)
+    if end is not None and end < start:
+        return jsonify(error="'end' must not be before 'start'"), 400
+    end_ms = int(end * 1000) if end is not None else 2 ** 32 - 1
+    result = segments.read_window(vid.id, int(max(0.0, start) * 1000), end_ms, limit=limit)
+    if result is None:
+        return jsonify(error="No timed transcript for this video"), 404
+    return jsonify(video_id=vid.id, start=start, end=end, **result)
 
 
 @bp.patch("/<int:source_id>/videos/<int:video_id>")
@@ -255,8 +243,19 @@ def update_video(source_id: int, video_id: int):
         text = (data.get("transcribe") or "").strip()
         vid.transcribe = text
         vid.transcribe_status = "ready" if text else ""
+        # Timings no longer match an edited transcript
+        segments.delete(vid.id)
+        if vid.transcribe_status == "ready":
+            fan_out_video(vid, commit=False)
+        else:
+            remove_video(vid.id)
 
     db.session.commit()
+    if "title" in data or "transcribe" in data:
+        if vid.transcribe_status == "ready":
+            related.enqueue(current_app._get_current_object(), vid.id)
+        else:
+            related.remove(current_app._get_current_object(), vid.id)
     return jsonify(vid.to_dict())
 
 
@@ -276,9 +275,14 @@ def delete_video(source_id: int, video_id: int):
             path = os.path.join(project_root, vid.audio_path.lstrip("/"))
             if os.path.isfile(path):
                 os.remove(path)
+        storage.release_video(vid.id)
     except Exception:
-        pass
+        db.session.rollback()
 
+    remove_video(vid.id)
+    transcripts.clear(vid.id)
+    segments.delete(vid.id)
+    related.remove(current_app._get_current_object(), vid.id)
     db.session.delete(vid)
     db.session.commit()
     return jsonify(message="Video deleted"), 200
@@ -332,8 +336,8 @@ def fetch_latest_videos(source_id: int):
 
     try:
         while len(all_videos) < to_idx and (fetched < 5):  # avoid too many API calls
-            r = requests.get(
-                "https://www.googleapis.com/youtube/v3/search",
+            r = http_client.get(
+                youtube_api_url("search"),
                 params={
                     "part": "snippet",
                     "channelId": chan_id,
@@ -1,6 +1,11 @@
-from flask import Blueprint, jsonify, g
+from datetime import datetime
 
+from flask import Blueprint, current_app, jsonify, g, request
+from sqlalchemy import or_, tuple_
+
+from backend import feed, related
 from backend.auth_utils import auth_required
+from backend.json_provider import json_list_response
 from backend.extensions import db
 from backend.models.video import Video
 from backend.models.source import Source
@@ -12,12 +17,127 @@ bp = Blueprint("videos", __name__, url_prefix="/videos")
 @bp.get("")
 @auth_required
 def list_videos():
+    """All of the user's videos, newest first.
+
+    ``?status=unfinished`` returns only videos without a ready transcript
+    (queued, in progress or failed), which are not in the feed yet.
+    """
+    user_id = g.current_user.id
+    status = request.args.get("status")
+    if status not in (None, "", "unfinished"):
+        return jsonify(error="'status' must be 'unfinished'"), 400
+
+    def query():
+        q = (
+            db.session.query(Video)
+            .join(Source, Source.id == Video.source_id)
+            .filter(Source.user_id == user_id)
+        )
+        if status == "unfinished":
+            q = q.filter(or_(Video.transcribe_status.is_(None), Video.transcribe_status != "ready"))
+        return q.order_by(Video.id.desc())
+
+    return json_list_response(query, Video.to_dict)
+
+
+@bp.get("/changes")
+@auth_required
+def list_changes():
+    """Videos of the user changed since ``?since=<cursor>`` (metadata, pipeline status, ...).
+
+    Without ``since`` no items are returned, only the cursor for "now"; poll
+    with the returned ``cursor`` to receive later changes in update order.
+    """
+    limit = max(1, min(request.args.get("limit", 100, type=int), 500))
     q = (
         db.session.query(Video)
         .join(Source, Source.id == Video.source_id)
         .filter(Source.user_id == g.current_user.id)
-        .order_by(Video.id.desc())
     )
-    items = q.all()
-    return jsonify([v.to_dict() for v in items])
+    since = request.args.get("since")
+    after = feed.decode_cursor(since) if since else None
+    if not after:
+        last = q.order_by(Video.updated_at.desc(), Video.id.desc()).first()
+        if last:
+            cursor = feed.encode_cursor(last.updated_at.isoformat(), last.id)
+        else:
+            cursor = feed.encode_cursor(datetime.min.isoformat(), 0)
+        return jsonify(items=[], cursor=cursor, has_more=False)
+
+    updated_at, video_id = after
+    try:
+        updated_at = datetime.fromisoformat(updated_at)
+    except ValueError:
+        return jsonify(error="Invalid cursor"), 400
+    rows = (
+        q.filter(tuple_(Video.updated_at, Video.id) > tuple_(updated_at, video_id))
+        .order_by(Video.updated_at.asc(), Video.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = feed.encode_cursor(rows[-1].updated_at.isoformat(), rows[-1].id) if rows else since
+    return jsonify(items=[v.to_dict() for v in rows], cursor=cursor, has_more=has_more)
+
+
+@bp.get("/<int:video_id>/related")
+@auth_required
+def related_videos(video_id: int):
+    """The user's videos most similar to this one (``?limit=10``, at most 50).
+
+    Reads the precomputed neighbour list of the related-videos index; when
+    too few of those belong to the user, the user's own indexed videos are
+    scored directly.
+    """
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    owned = (
+        db.session.query(Video)
+        .join(Source, Source.id == Video.source_id)
+        .filter(Source.user_id == g.current_user.id)
+    )
+    vid = owned.filter(Video.id == video_id).first()
+    if not vid:
+        return jsonify(error="Video not found"), 404
+    if not related.available():
+        return jsonify(error="Related videos need numpy and scipy on the server"), 503
+
+    index = related.get_index(current_app)
+    candidates = index.neighbours(video_id)
+    if candidates is None:
+        return jsonify(items=[], indexed=False, exact=False)
+
+    def pick(candidates):
+        """Owned videos among ``(video_id, score)`` pairs, one per YouTube ID, best first."""
+        ids = [other for other, _ in candidates if other != video_id]
+        videos = {v.id: v for v in owned.filter(Video.id.in_(ids)).all()} if ids else {}
+        seen = {vid.youtube_id}
+        out = []
+        for other, score in candidates:
+            v = videos.get(other)
+            if v is None or (v.youtube_id and v.youtube_id in seen):
+                continue
+            seen.add(v.youtube_id)
+            out.append((v, score))
+            if len(out) == limit:
+                break
+        return out
 
+    picked = pick(candidates)
+    exact = len(picked) < limit
+    if exact:
+        ready = owned.filter(Video.transcribe_status == "ready").with_entities(Video.id)
+        picked = pick(index.score(video_id, [i for (i,) in ready])[:limit * 4])
+    items = [
+        {
+            "video_id": v.id,
+            "source_id": v.source_id,
+            "title": v.title,
+            "url": v.url,
+            "channel_title": v.channel_title,
+            "published_at": v.published_at,
+            "score": round(score, 4),
+        }
+        for v, score in picked
+    ]
+    return jsonify(items=items, indexed=True, exact=exact)
@@ -0,0 +1,240 @@
+"""Priority scheduling for pipeline runs.
+
+Runs are executed by PIPELINE_WORKERS threads (default 4) in order of a
+deadline-style score fixed when the run is queued:
+
+    score = queued_at + CLASS_DELAY[priority] + duration_seconds * PIPELINE_DURATION_WEIGHT
+
+``interactive`` runs (a user adding or re-running a video) compete on queue
+time alone, ``ingest`` and ``backfill`` runs are held back by their class
+delay, and within a class shorter videos go first. The score is an absolute
+time, so waiting work ages: a backfill run queued more than CLASS_DELAY
+seconds ago outranks a new interactive one, and background work keeps moving
+under sustained interactive load. Videos without a known length count as
+PIPELINE_UNKNOWN_DURATION seconds; a queued video is re-scored when
+enrichment fills in its duration.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend import metrics, signals
+
+PRIORITIES = ("interactive", "ingest", "backfill")
+CLASS_DELAY = {"interactive": 0.0, "ingest": 120.0, "backfill": 900.0}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class _Job:
+    __slots__ = ("video_id", "fn", "priority", "duration_seconds", "queued_at", "score", "entry")
+
+    def __init__(self, video_id: int, fn: Callable[[], Any], priority: str,
+                 duration_seconds: Optional[int], queued_at: float):
+        self.video_id = video_id
+        self.fn = fn
+        self.priority = priority
+        self.duration_seconds = duration_seconds
+        self.queued_at = queued_at
+        self.score = 0.0
+        self.entry: Optional[list] = None
+
+
+class PipelineScheduler:
+    def __init__(self, workers: Optional[int] = None, duration_weight: Optional[float] = None,
+                 unknown_duration: Optional[float] = None):
+        self.workers = workers or max(1, int(_env_float("PIPELINE_WORKERS", 4)))
+        self.duration_weight = (_env_float("PIPELINE_DURATION_WEIGHT", 0.1)
+                                if duration_weight is None else duration_weight)
+        self.unknown_duration = (_env_float("PIPELINE_UNKNOWN_DURATION", 600)
+                                 if unknown_duration is None else unknown_duration)
+        self._cond = threading.Condition()
+        self._heap: List[list] = []  # [score, seq, job]; job is None once superseded
+        self._queued: Dict[int, _Job] = {}
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._stats = {"running": 0, "completed": 0, "failed": 0}
+
+    def score(self, priority: str, duration_seconds: Optional[int], queued_at: float) -> float:
+        duration = self.unknown_duration if duration_seconds is None else duration_seconds
+        return queued_at + CLASS_DELAY[priority] + duration * self.duration_weight
+
+    def _push(self, job: _Job) -> None:
+        if job.entry is not None:
+            job.entry[-1] = None
+        job.score = self.score(job.priority, job.duration_seconds, job.queued_at)
+        job.entry = [job.score, next(self._seq), job]
+        heapq.heappush(self._heap, job.entry)
+        self._queued[job.video_id] = job
+
+    def submit(self, video_id: int, fn: Callable[[], Any], priority: str = "interactive",
+               duration_seconds: Optional[int] = None) -> bool:
+        """Queue ``fn()`` as the pipeline run of ``video_id``.
+
+        Returns False if the video is already queued; its run then only moves
+        up to ``priority`` if that is a more urgent class.
+        """
+        if priority not in CLASS_DELAY:
+            raise ValueError(f"Unknown priority '{priority}'")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            if video_id in self._queued:
+                self._promote(self._queued[video_id], priority)
+                return False
+            self._push(_Job(video_id, fn, priority, duration_seconds, time.time()))
+            self._start_workers()
+            self._cond.notify()
+        return True
+
+    def _promote(self, job: _Job, priority: str) -> None:
+        if PRIORITIES.index(priority) < PRIORITIES.index(job.priority):
+            job.priority = priority
+            self._push(job)
+
+    def promote(self, video_id: int, priority: str) -> bool:
+        """Move a queued run to a more urgent class. Returns False if it isn't queued."""
+        with self._cond:
+            job = self._queued.get(video_id)
+            if job is None:
+                return False
+            self._promote(job, priority)
+            return True
+
+    def set_duration(self, video_id: int, duration_seconds: Optional[int]) -> bool:
+        """Re-score a queued run once the video's length is known."""
+        with self._cond:
+            job = self._queued.get(video_id)
+            if job is None or job.duration_seconds == duration_seconds:
+                return False
+            job.duration_seconds = duration_seconds
+            self._push(job)
+            return True
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, daemon=True, name=f"pipeline-worker-{len(self._threads)}")
+            self._threads.append(t)
+            t.start()
+
+    def _next(self) -> Optional[_Job]:
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][-1] is None:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    job = heapq.heappop(self._heap)[-1]
+                    del self._queued[job.video_id]
+                    self._stats["running"] += 1
+                    return job
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _work(self) -> None:
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            metrics.PIPELINE_QUEUE_WAIT.observe(time.time() - job.queued_at, priority=job.priority)
+            ok = False
+            try:
+                job.fn()
+                ok = True
+            except Exception:
+                logging.getLogger(__name__).exception("Pipeline run for video_id=%s crashed", job.video_id)
+            finally:
+                with self._cond:
+                    self._stats["running"] -= 1
+                    self._stats["completed" if ok else "failed"] += 1
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Queued runs in the order they will start."""
+        with self._cond:
+            jobs = sorted(self._queued.values(), key=lambda j: (j.score, j.entry[1]))
+        now = time.time()
+        return [
+            {
+                "video_id": j.video_id,
+                "priority": j.priority,
+                "duration_seconds": j.duration_seconds,
+                "waiting_seconds": round(now - j.queued_at, 3),
+                "score": round(j.score, 3),
+            }
+            for j in jobs
+        ]
+
+    def is_queued(self, video_id: int) -> bool:
+        with self._cond:
+            return video_id in self._queued
+
+    def position(self, video_id: int) -> Optional[int]:
+        """0-based place of a queued run in the start order, None if not queued."""
+        with self._cond:
+            job = self._queued.get(video_id)
+            if job is None:
+                return None
+            return sum(1 for j in self._queued.values() if (j.score, j.entry[1]) < (job.score, job.entry[1]))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._stats)
+            queued = {p: 0 for p in PRIORITIES}
+            for job in self._queued.values():
+                queued[job.priority] += 1
+        out["queued"] = queued
+        out["workers"] = self.workers
+        out["duration_weight"] = self.duration_weight
+        out["class_delay_seconds"] = dict(CLASS_DELAY)
+        return out
+
+    def shutdown(self) -> None:
+        """Let workers exit once the queue is drained; further submits fail."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+_scheduler: Optional[PipelineScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PipelineScheduler:
+    """Process-wide scheduler, created on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PipelineScheduler()
+            signals.metadata_updated.connect(_on_metadata_updated)
+        return _scheduler
+
+
+def configure(**kwargs) -> PipelineScheduler:
+    """Replace the process-wide scheduler (e.g. ``configure(workers=8)``); the old one drains and stops."""
+    global _scheduler
+    old = get_scheduler()
+    with _scheduler_lock:
+        _scheduler = PipelineScheduler(**kwargs)
+    old.shutdown()
+    return _scheduler
+
+
+def _on_metadata_updated(sender, kind=None, status=None, **kw):
+    if kind != "video" or status != "ready" or _scheduler is None or not _scheduler.is_queued(sender):
+        return
+    from backend.extensions import db
+    from backend.models.video import Video
+
+    duration = db.session.query(Video.duration_seconds).filter(Video.id == sender).scalar()
+    if duration is not None:
+        _scheduler.set_duration(sender, duration)
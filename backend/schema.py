@@ -0,0 +1,149 @@
+"""Database schema setup.
+
+``ensure_schema`` runs ``create_all`` and the lightweight SQLite column
+migrations only when the database's ``PRAGMA user_version`` is behind
+``SCHEMA_VERSION``, so starting against a current database costs a single
+PRAGMA. Bump ``SCHEMA_VERSION`` whenever a model or column is added.
+"""
+import logging
+
+from sqlalchemy.engine import Connection
+
+from backend.extensions import db
+
+
+SCHEMA_VERSION = 7
+
+
+def _import_models() -> None:
+    """Register every table with the metadata before ``create_all``."""
+    import backend.models.digest  # noqa: F401
+    import backend.models.feed_item  # noqa: F401
+    import backend.models.pipeline_job  # noqa: F401
+    import backend.models.source  # noqa: F401
+    import backend.models.stored_artifact  # noqa: F401
+    import backend.models.summary_memo  # noqa: F401
+    import backend.models.task_state  # noqa: F401
+    import backend.models.transcript_part  # noqa: F401
+    import backend.models.transcript_segments  # noqa: F401
+    import backend.models.usage_record  # noqa: F401
+    import backend.models.user  # noqa: F401
+    import backend.models.video  # noqa: F401
+
+
+def schema_version(conn: Connection) -> int:
+    try:
+        return int(conn.exec_driver_sql("PRAGMA user_version").scalar() or 0)
+    except Exception:
+        # Not SQLite: no version bookkeeping, always run the (idempotent) setup
+        return 0
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    """Columns added after the tables were first created (ALTER TABLE ... ADD COLUMN)."""
+    cols = conn.exec_driver_sql("PRAGMA table_info(videos)").fetchall()
+    col_names = {row[1] for row in cols} if cols else set()
+    if "transcribe" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcribe TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET transcribe='' WHERE transcribe IS NULL")
+    if "summary" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN summary TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET summary='' WHERE summary IS NULL")
+    if "audio_path" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN audio_path TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET audio_path='' WHERE audio_path IS NULL")
+    if "audio_status" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN audio_status TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET audio_status='' WHERE audio_status IS NULL")
+    if "transcribe_status" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcribe_status TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET transcribe_status='' WHERE transcribe_status IS NULL")
+    # YouTube metadata columns
+    if "channel_title" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN channel_title TEXT")
+    if "description" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN description TEXT")
+    if "view_count" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN view_count INTEGER")
+    if "like_count" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN like_count INTEGER")
+    if "dislike_count" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN dislike_count INTEGER")
+    if "comment_count" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN comment_count INTEGER")
+    if "published_at" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN published_at TEXT")
+    if "transcript_parts_total" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcript_parts_total INTEGER NOT NULL DEFAULT 0")
+    if "transcript_parts_done" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN transcript_parts_done INTEGER NOT NULL DEFAULT 0")
+    if "duration_seconds" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN duration_seconds INTEGER")
+    if "metadata_status" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN metadata_status TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE videos SET metadata_status='ready' WHERE metadata_status IS NULL OR metadata_status=''")
+    if "updated_at" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN updated_at DATETIME")
+        conn.exec_driver_sql("UPDATE videos SET updated_at=created_at WHERE updated_at IS NULL")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_videos_updated_at ON videos (updated_at)")
+    if "youtube_id" not in col_names:
+        from backend.youtube_captions import extract_video_id
+
+        conn.exec_driver_sql("ALTER TABLE videos ADD COLUMN youtube_id TEXT")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_videos_youtube_id ON videos (youtube_id)")
+        ids = [(extract_video_id(url), vid) for vid, url in conn.exec_driver_sql("SELECT id, url FROM videos")]
+        ids = [row for row in ids if row[0]]
+        if ids:
+            conn.exec_driver_sql("UPDATE videos SET youtube_id=? WHERE id=?", ids)
+    cols = conn.exec_driver_sql("PRAGMA table_info(sources)").fetchall()
+    col_names = {row[1] for row in cols} if cols else set()
+    if "metadata_status" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE sources ADD COLUMN metadata_status TEXT DEFAULT ''")
+        conn.exec_driver_sql("UPDATE sources SET metadata_status='ready' WHERE metadata_status IS NULL OR metadata_status=''")
+    if "updated_at" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE sources ADD COLUMN updated_at DATETIME")
+        conn.exec_driver_sql("UPDATE sources SET updated_at=created_at WHERE updated_at IS NULL")
+    cols = conn.exec_driver_sql("PRAGMA table_info(transcript_parts)").fetchall()
+    col_names = {row[1] for row in cols} if cols else set()
+    if "segments" not in col_names:
+        conn.exec_driver_sql("ALTER TABLE transcript_parts ADD COLUMN segments BLOB")
+
+
+def migrate() -> None:
+    """Create tables, add missing columns, backfill derived data and stamp the version."""
+    _import_models()
+    db.create_all()
+    try:
+        conn: Connection = db.engine.connect()
+        # WAL lets several worker processes read while one writes (persists in the DB file)
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        _add_missing_columns(conn)
+        conn.commit()
+        conn.close()
+    except Exception:
+        # Best-effort; skip if not SQLite or table not present yet
+        logging.getLogger(__name__).exception("Column migration failed")
+    # Fan out finished videos created before the feed table existed
+    try:
+        from backend.feed import backfill
+        backfill()
+    except Exception:
+        db.session.rollback()
+    with db.engine.connect() as conn:
+        try:
+            conn.exec_driver_sql(f"PRAGMA user_version={SCHEMA_VERSION}")
+            conn.commit()
+        except Exception:
+            pass
+
+
+def ensure_schema(app) -> bool:
+    """Migrate if the database is behind SCHEMA_VERSION. Returns True when it ran."""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            current = schema_version(conn)
+        if current >= SCHEMA_VERSION:
+            return False
+        logging.getLogger(__name__).info("Migrating database schema %s -> %s", current, SCHEMA_VERSION)
+        migrate()
+        return True
@@ -0,0 +1,188 @@
+"""Timed transcript segments in a compact packed format.
+
+A transcript's segments are stored as one blob:
+
+    header   "<4sII"  magic b"SEG1", segment count, longest segment (ms)
+    records  "<III"   start_ms, end_ms, text_offset (sorted by start)
+    text              UTF-8 segment texts, back to back
+
+Segment ``i``'s text runs from its offset to the next segment's. A
+time-window read bisects the record block and then slices only the matching
+bytes of the text block (in SQL, for stored transcripts), so the rest of the
+transcript is never loaded or decoded. Segments come from caption cues
+(``youtube_captions.iter_vtt_cues``) or from the transcription provider,
+shifted by the start of each audio chunk.
+"""
+import bisect
+import struct
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+
+from backend.extensions import db
+from backend.models.transcript_segments import TranscriptSegments
+
+HEADER = struct.Struct("<4sII")
+RECORD = struct.Struct("<III")
+MAGIC = b"SEG1"
+
+
+class Segment(NamedTuple):
+    start_ms: int
+    end_ms: int
+    text: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"start": self.start_ms / 1000, "end": self.end_ms / 1000, "text": self.text}
+
+
+def shift(segments: Iterable[Segment], offset_ms: int) -> List[Segment]:
+    return [Segment(s.start_ms + offset_ms, s.end_ms + offset_ms, s.text) for s in segments]
+
+
+def encode(segments: Iterable[Segment]) -> bytes:
+    segs = sorted((s for s in segments if s.text), key=lambda s: (s.start_ms, s.end_ms))
+    records = bytearray()
+    text = bytearray()
+    max_span = 0
+    for s in segs:
+        start = max(0, int(s.start_ms))
+        end = max(start, int(s.end_ms))
+        records += RECORD.pack(start, end, len(text))
+        text += s.text.encode("utf-8")
+        max_span = max(max_span, end - start)
+    return HEADER.pack(MAGIC, len(segs), max_span) + bytes(records) + bytes(text)
+
+
+def header(blob: bytes) -> Tuple[int, int]:
+    """``(count, max_span_ms)`` of a packed blob."""
+    magic, count, max_span = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a packed segment blob")
+    return count, max_span
+
+
+class _Starts:
+    """Start times of a record block as a read-only sequence, for ``bisect``."""
+
+    def __init__(self, records: bytes, count: int):
+        self.records = records
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> int:
+        return RECORD.unpack_from(self.records, i * RECORD.size)[0]
+
+
+def _select(records: bytes, count: int, max_span_ms: int, start_ms: int, end_ms: int,
+            limit: Optional[int]) -> Tuple[List[int], Optional[int]]:
+    """Indexes of segments overlapping ``[start_ms, end_ms]`` (at most ``limit``) and the next index, if cut."""
+    starts = _Starts(records, count)
+    # Nothing starting more than max_span before the window can reach into it
+    lo = bisect.bisect_right(starts, start_ms - max_span_ms)
+    hi = bisect.bisect_right(starts, end_ms)
+    picked = []
+    for i in range(lo, hi):
+        if RECORD.unpack_from(records, i * RECORD.size)[1] <= start_ms:
+            continue
+        if limit is not None and len(picked) >= limit:
+            return picked, i
+        picked.append(i)
+    return picked, None
+
+
+def _segments(records: bytes, picked: List[int], text: bytes, text_base: int, text_len: int,
+              count: int) -> List[Segment]:
+    """Segments ``picked`` given the text bytes starting at offset ``text_base`` of the text block."""
+    out = []
+    for i in picked:
+        start, end, off = RECORD.unpack_from(records, i * RECORD.size)
+        nxt = RECORD.unpack_from(records, (i + 1) * RECORD.size)[2] if i + 1 < count else text_len
+        out.append(Segment(start, end, text[off - text_base:nxt - text_base].decode("utf-8")))
+    return out
+
+
+def decode(blob: bytes) -> List[Segment]:
+    count, _ = header(blob)
+    body = HEADER.size + count * RECORD.size
+    records = blob[HEADER.size:body]
+    return _segments(records, list(range(count)), blob[body:], 0, len(blob) - body, count)
+
+
+def window(blob: bytes, start_ms: int, end_ms: int, limit: Optional[int] = None) -> List[Segment]:
+    """Segments of an in-memory blob overlapping ``[start_ms, end_ms]``."""
+    count, max_span = header(blob)
+    body = HEADER.size + count * RECORD.size
+    records = blob[HEADER.size:body]
+    picked, _ = _select(records, count, max_span, start_ms, end_ms, limit)
+    return _segments(records, picked, blob[body:], 0, len(blob) - body, count)
+
+
+# ---------------------------------------------------------------------
+# Stored transcripts
+# ---------------------------------------------------------------------
+
+def save(video_id: int, segments: Iterable[Segment], source: str) -> None:
+    """Replace the stored segments of a video (caller commits)."""
+    blob = encode(segments)
+    count, max_span = header(blob)
+    row = db.session.get(TranscriptSegments, video_id)
+    if row is None:
+        row = TranscriptSegments(video_id=video_id)
+        db.session.add(row)
+    row.source, row.count, row.max_span_ms, row.data = source, count, max_span, blob
+
+
+def delete(video_id: int) -> None:
+    """Drop stored segments (caller commits)."""
+    TranscriptSegments.query.filter_by(video_id=video_id).delete(synchronize_session=False)
+
+
+def copy(from_video_id: int, to_video_id: int) -> None:
+    """Give ``to_video_id`` the segments of ``from_video_id`` (caller commits)."""
+    row = db.session.get(TranscriptSegments, from_video_id)
+    if row is None:
+        delete(to_video_id)
+        return
+    dst = db.session.get(TranscriptSegments, to_video_id) or TranscriptSegments(video_id=to_video_id)
+    dst.source, dst.count, dst.max_span_ms, dst.data = row.source, row.count, row.max_span_ms, row.data
+    db.session.add(dst)
+
+
+def read_window(video_id: int, start_ms: int, end_ms: int, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Stored segments overlapping ``[start_ms, end_ms]``; None if the video has none.
+
+    Reads the record block and the byte range of the matching texts only.
+    ``next_start`` is set when ``limit`` cut the result (continue from there).
+    """
+    T = TranscriptSegments
+    row = (
+        db.session.query(T.count, T.max_span_ms, T.source, func.length(T.data),
+                         func.substr(T.data, HEADER.size + 1, T.count * RECORD.size))
+        .filter(T.video_id == video_id)
+        .first()
+    )
+    if row is None:
+        return None
+    count, max_span, source, size, records = row
+    records = bytes(records or b"")
+    text_base = HEADER.size + count * RECORD.size
+    text_len = size - text_base
+    picked, cut = _select(records, count, max_span, start_ms, end_ms, limit)
+    segs: List[Segment] = []
+    if picked:
+        first = RECORD.unpack_from(records, picked[0] * RECORD.size)[2]
+        last = picked[-1] + 1
+        stop = RECORD.unpack_from(records, last * RECORD.size)[2] if last < count else text_len
+        text = db.session.query(func.substr(T.data, text_base + first + 1, stop - first)).filter(
+            T.video_id == video_id
+        ).scalar()
+        segs = _segments(records, picked, bytes(text or b""), first, text_len, count)
+    return {
+        "source": source,
+        "count": count,
+        "segments": [s.to_dict() for s in segs],
+        "next_start": RECORD.unpack_from(records, cut * RECORD.size)[0] / 1000 if cut is not None else None,
+    }
@@ -0,0 +1,24 @@
+"""Blinker signals for background work.
+
+Receivers connect with ``signal.connect(fn)``; they are called synchronously
+in the pipeline thread, so they must be cheap.
+"""
+from blinker import Namespace
+
+
+_signals = Namespace()
+
+# sender: video id; no kwargs. Sent when a run is handed to a worker thread.
+pipeline_queued = _signals.signal("pipeline-queued")
+
+# sender: video id; no kwargs. Sent when the run starts executing.
+pipeline_started = _signals.signal("pipeline-started")
+
+# sender: video id; kwargs: stage (str), seconds (float), ok (bool), bytes (int)
+pipeline_stage = _signals.signal("pipeline-stage")
+
+# sender: video id; kwargs: status ('finished' | 'failed'), seconds (float)
+pipeline_finished = _signals.signal("pipeline-finished")
+
+# sender: video or source id; kwargs: kind ('video' | 'source'), status (metadata_status)
+metadata_updated = _signals.signal("metadata-updated")
@@ -0,0 +1,272 @@
+"""Disk quota manager for pipeline artifacts in VIDEO_DIR and AUDIO_DIR.
+
+Every file the pipeline writes is recorded in ``stored_artifacts``. The
+sweeper keeps the tracked total under STORAGE_MAX_BYTES by evicting the
+least recently used files of idle videos (woken early when a new file
+crosses the budget), and also removes files of deleted videos. With STORAGE_SWEEP_ORPHANS the sweep also removes
+untracked files, but only ones named like pipeline output (a YouTube ID stem:
+``<id>.m4a``, ``<id>.small.m4a``, ``<id>.part-000.m4a``, yt-dlp leftovers)
+that no ``Video.audio_path`` refers to.
+"""
+import glob
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import func, select, text, update
+
+from backend import task_state
+from backend.extensions import db
+from backend.models.stored_artifact import StoredArtifact
+from backend.models.video import Video
+
+
+# Base names the pipeline writes: 11-character YouTube ID, then any extension(s)
+_PIPELINE_NAME = re.compile(r"^[A-Za-z0-9_-]{11}\.[^/]+$")
+
+_BACKEND_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Set by ``track`` when the budget is exceeded; wakes this process's sweeper early
+_over_budget = threading.Event()
+
+
+def _dirs() -> List[str]:
+    out = []
+    for name in ("VIDEO_DIR", "AUDIO_DIR"):
+        d = current_app.config.get(name)
+        if d and os.path.abspath(d) not in out:
+            out.append(os.path.abspath(d))
+    return out
+
+
+def _budget() -> int:
+    return int(current_app.config.get("STORAGE_MAX_BYTES") or 0)
+
+
+def _is_busy(video_id: Optional[int]) -> bool:
+    """True while a download or pipeline run for the video may still use its files."""
+    if video_id is None:
+        return False
+    for key in (f"pipeline:{video_id}", f"download:{video_id}"):
+        if task_state.is_active(task_state.get(key)):
+            return True
+    return False
+
+
+def _remove_file(path: str) -> int:
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+def track(path: str, video_id: Optional[int] = None) -> None:
+    """Record (or refresh) a file written by the pipeline; wake the sweeper if over budget.
+
+    Written on a connection of its own: the caller's ``db.session`` (often
+    mid-pipeline) is neither flushed nor committed, and no files are evicted
+    inline.
+    """
+    if not path or not os.path.isfile(path):
+        return
+    path = os.path.abspath(path)
+    now = time.time()
+    budget = _budget()
+    with db.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO stored_artifacts (path, video_id, size_bytes, created_at, last_access) "
+                "VALUES (:path, :video_id, :size, :now, :now) "
+                "ON CONFLICT(path) DO UPDATE SET video_id = excluded.video_id, "
+                "size_bytes = excluded.size_bytes, last_access = excluded.last_access"
+            ),
+            {"path": path, "video_id": video_id, "size": os.path.getsize(path), "now": now},
+        )
+        total = conn.execute(select(func.coalesce(func.sum(StoredArtifact.size_bytes), 0))).scalar() if budget else 0
+    if budget and total > budget:
+        _over_budget.set()
+
+
+def touch(path: str) -> None:
+    """Mark a tracked file as recently used (LRU)."""
+    if not path:
+        return
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(StoredArtifact).where(StoredArtifact.path == os.path.abspath(path)).values(last_access=time.time())
+        )
+
+
+def total_bytes() -> int:
+    return int(db.session.query(func.coalesce(func.sum(StoredArtifact.size_bytes), 0)).scalar() or 0)
+
+
+def release_video(video_id: int, keep: Iterable[str] = ()) -> int:
+    """Delete every artifact of a video except ``keep``. Returns bytes freed.
+
+    Besides tracked rows, files sharing the base name of a tracked file in any
+    extension (yt-dlp leftovers like ``.part``/``.ytdl``, ffmpeg fragments) are removed too.
+    """
+    keep = {os.path.abspath(p) for p in keep if p}
+    freed = 0
+    arts = StoredArtifact.query.filter_by(video_id=video_id).all()
+    paths = {a.path for a in arts}
+    for a in arts:
+        stem = os.path.join(os.path.dirname(a.path), os.path.basename(a.path).split(".", 1)[0])
+        paths.update(glob.glob(glob.escape(stem) + ".*"))
+    # Same YouTube id may be in use by another video row
+    others = {
+        p for (p,) in db.session.query(StoredArtifact.path).filter(
+            StoredArtifact.path.in_(list(paths)), StoredArtifact.video_id != video_id
+        )
+    } if paths else set()
+    for p in paths - keep - others:
+        freed += _remove_file(p)
+    for a in arts:
+        if a.path not in keep:
+            db.session.delete(a)
+    db.session.commit()
+    return freed
+
+
+def _forget_audio(video_ids: Iterable[int]) -> None:
+    """Clear ``audio_path`` on videos whose audio file was evicted."""
+    for vid in Video.query.filter(Video.id.in_(list(video_ids))).all():
+        if vid.audio_path:
+            vid.audio_path = ""
+            vid.audio_status = ""
+    db.session.commit()
+
+
+def enforce_budget() -> int:
+    """Evict least recently used artifacts of idle videos until under budget. Returns bytes freed."""
+    budget = _budget()
+    if not budget:
+        return 0
+    total = total_bytes()
+    freed = 0
+    evicted_videos = set()
+    busy: Dict[Optional[int], bool] = {}
+    for art in StoredArtifact.query.order_by(StoredArtifact.last_access.asc()).all():
+        if total - freed <= budget:
+            break
+        if art.video_id not in busy:
+            busy[art.video_id] = _is_busy(art.video_id)
+        if busy[art.video_id]:
+            continue
+        _remove_file(art.path)
+        freed += art.size_bytes or 0
+        if art.video_id is not None:
+            evicted_videos.add(art.video_id)
+        db.session.delete(art)
+    db.session.commit()
+    if evicted_videos:
+        _forget_audio(evicted_videos)
+    if freed:
+        current_app.logger.info("Storage eviction freed %s bytes (budget=%s)", freed, budget)
+    return freed
+
+
+def _referenced_paths() -> set:
+    """Absolute paths of every ``Video.audio_path`` (stored relative to backend/ or absolute)."""
+    out = set()
+    for (p,) in db.session.query(Video.audio_path).filter(Video.audio_path != "", Video.audio_path.isnot(None)):
+        out.add(os.path.abspath(p))
+        out.add(os.path.abspath(os.path.join(_BACKEND_ROOT, p.lstrip("/"))))
+    return out
+
+
+def sweep_orphans(untracked: Optional[bool] = None) -> int:
+    """Remove files of deleted videos and rows whose file is gone; with ``untracked``
+    (default STORAGE_SWEEP_ORPHANS) also untracked pipeline files past the grace
+    period that no video refers to. Returns bytes freed."""
+    if untracked is None:
+        untracked = bool(current_app.config.get("STORAGE_SWEEP_ORPHANS"))
+    grace = float(current_app.config.get("STORAGE_ORPHAN_GRACE_SECONDS") or 3600)
+    now = time.time()
+    freed = 0
+
+    arts = StoredArtifact.query.all()
+    tracked = {a.path for a in arts}
+    video_ids = {a.video_id for a in arts if a.video_id is not None}
+    existing = {vid for (vid,) in db.session.query(Video.id).filter(Video.id.in_(video_ids))} if video_ids else set()
+    for a in arts:
+        if not os.path.isfile(a.path):
+            db.session.delete(a)
+        elif a.video_id is not None and a.video_id not in existing:
+            freed += _remove_file(a.path)
+            db.session.delete(a)
+    db.session.commit()
+
+    referenced = _referenced_paths() if untracked else set()
+    for d in _dirs() if untracked else []:
+        if not os.path.isdir(d):
+            continue
+        for entry in os.scandir(d):
+            if not entry.is_file() or entry.path in tracked or entry.path in referenced:
+                continue
+            if not _PIPELINE_NAME.match(entry.name):
+                continue
+            try:
+                if now - entry.stat().st_mtime < grace:
+                    continue
+            except OSError:
+                continue
+            freed += _remove_file(entry.path)
+    if freed:
+        current_app.logger.info("Storage sweep freed %s bytes", freed)
+    return freed
+
+
+def usage() -> Dict[str, Any]:
+    """Disk usage of the media directories and of tracked artifacts."""
+    dirs = {}
+    for d in _dirs():
+        files = size = 0
+        if os.path.isdir(d):
+            for entry in os.scandir(d):
+                if entry.is_file():
+                    files += 1
+                    try:
+                        size += entry.stat().st_size
+                    except OSError:
+                        pass
+        dirs[d] = {"files": files, "bytes": size}
+    return {
+        "budget_bytes": _budget(),
+        "tracked_bytes": total_bytes(),
+        "tracked_files": db.session.query(StoredArtifact).count(),
+        "directories": dirs,
+    }
+
+
+def start_sweeper(app) -> None:
+    """Run ``sweep_orphans`` + ``enforce_budget`` every STORAGE_SWEEP_SECONDS (0 disables),
+    and early when ``track`` finds the budget exceeded."""
+    interval = float(app.config.get("STORAGE_SWEEP_SECONDS") or 0)
+    if interval <= 0:
+        return
+
+    def loop():
+        while True:
+            _over_budget.wait(interval)
+            _over_budget.clear()
+            with app.app_context():
+                # One sweeper at a time across worker processes
+                if not task_state.claim("storage:sweep", status="processing"):
+                    continue
+                try:
+                    sweep_orphans()
+                    enforce_budget()
+                except Exception as e:
+                    app.logger.warning("Storage sweep failed: %s", e)
+                    db.session.rollback()
+                finally:
+                    task_state.update("storage:sweep", status="idle")
+
+    threading.Thread(target=loop, name="storage-sweeper", daemon=True).start()
@@ -0,0 +1,92 @@
+"""Memoized summaries.
+
+Summaries are stored under a hash of the normalized transcript, the model,
+the prompts (including the map-reduce chunk and reduce prompts) and the
+instructions, so re-summarizing identical input returns the stored Markdown
+without calling the LLM, and changing a prompt starts fresh.
+"""
+import hashlib
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from backend.ai_ops import SUMMARY_PROMPTS, resolve_summary_model, summarize_markdown
+from backend.extensions import db
+from backend.models.summary_memo import SummaryMemo
+
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def memo_key(transcript: str, model: str, instructions: str = "") -> str:
+    normalized = re.sub(r"\s+", " ", transcript or "").strip()
+    h = hashlib.sha256()
+    for part in (normalized, model, *SUMMARY_PROMPTS, (instructions or "").strip()):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def summarize_cached(transcript: str, *, instructions: str = "", model: Optional[str] = None) -> str:
+    """Return the memoized summary for this input, generating and storing it on a miss."""
+    if not (transcript or "").strip():
+        return ""
+    model = resolve_summary_model(model)
+    return memoized(
+        transcript, model, instructions,
+        lambda: summarize_markdown(transcript, instructions=instructions, model=model),
+    )
+
+
+def memoized(text: str, model: str, instructions: str, generate: Callable[[], str]) -> str:
+    """Stored output for ``(text, model, instructions)``, calling ``generate()`` and storing it on a miss.
+
+    The memo table is read and written on a connection of its own, so the
+    caller's ``db.session`` (and its pending changes) is never committed or
+    rolled back here. Storing is best effort: a failed write only loses the memo.
+    """
+    key = memo_key(text, model, instructions)
+    with db.engine.connect() as conn:
+        summary = conn.execute(select(SummaryMemo.summary).where(SummaryMemo.key == key)).scalar()
+    if summary is not None:
+        _count("hits")
+        _write(update(SummaryMemo).where(SummaryMemo.key == key).values(hits=SummaryMemo.hits + 1))
+        return summary
+
+    _count("misses")
+    md = generate()
+    if md:
+        _write(insert(SummaryMemo).values(key=key, model=model, summary=md))
+    return md
+
+
+def _write(stmt) -> None:
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(stmt)
+    except IntegrityError:
+        pass  # a concurrent request stored the same key first
+    except OperationalError as e:
+        # e.g. SQLite locked by the caller's own open write transaction
+        logging.getLogger(__name__).warning("Summary memo not written: %s", e)
+
+
+def stats(entries: bool = True) -> Dict[str, Any]:
+    """Hit/miss counters of this process; with ``entries`` also the memo row count (needs an app context)."""
+    with _lock:
+        out = dict(_stats)
+    lookups = out["hits"] + out["misses"]
+    out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+    if entries:
+        out["entries"] = db.session.query(SummaryMemo).count()
+    return out
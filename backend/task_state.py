@@ -0,0 +1,187 @@
+"""Cross-process task state store backed by the ``task_states`` table.
+
+Replaces per-process dicts so that status lookups and idempotency checks agree
+across every web worker. ``claim`` is a single upsert statement, so only one
+caller can move a task into an active status.
+
+Owners that don't update a task for long stretches (a queued run, a long
+transcription) register it with ``keep_alive``; a per-process thread then
+refreshes ``updated_at`` until the task leaves the active statuses, so it is
+only reclaimed when the owning process is gone.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+from backend.extensions import db
+from backend.models.task_state import TaskState  # noqa: F401  (registers the table)
+
+
+# "waiting": attached to another task's run (see routes.ai._run_async)
+ACTIVE_STATUSES = ("queued", "waiting", "starting", "downloading", "processing", "transcribing", "summarizing")
+
+
+def stale_after() -> float:
+    """Seconds after which an active task without updates may be reclaimed (crashed worker)."""
+    try:
+        return float(os.environ.get("TASK_STATE_STALE_SECONDS", 3600))
+    except ValueError:
+        return 3600.0
+
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    try:
+        out = json.loads(row.data or "{}")
+    except ValueError:
+        out = {}
+    out["status"] = row.status
+    out["progress"] = row.progress
+    out["updated_at"] = row.updated_at
+    return out
+
+
+def is_active(state: Optional[Dict[str, Any]]) -> bool:
+    """True if ``state`` (from ``get``) is active and not stale."""
+    if not state or state.get("status") not in ACTIVE_STATUSES:
+        return False
+    return time.time() - (state.get("updated_at") or 0) < stale_after()
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """Return the state for ``key`` or None if it was never set."""
+    with db.engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT status, progress, data, updated_at FROM task_states WHERE key = :key"),
+            {"key": key},
+        ).first()
+    return _row_to_dict(row) if row else None
+
+
+def claim(key: str, status: str = "queued", active: Iterable[str] = ACTIVE_STATUSES) -> bool:
+    """Atomically move ``key`` into ``status`` unless it is already active.
+
+    Returns True when this caller owns the task. A task that has been active
+    without updates for longer than TASK_STATE_STALE_SECONDS can be reclaimed.
+    """
+    active = tuple(active)
+    now = time.time()
+    placeholders = ", ".join(f":a{i}" for i in range(len(active)))
+    params = {"key": key, "status": status, "now": now, "stale": now - stale_after()}
+    params.update({f"a{i}": s for i, s in enumerate(active)})
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            text(
+                "INSERT INTO task_states (key, status, progress, data, updated_at) "
+                "VALUES (:key, :status, 0, '{}', :now) "
+                "ON CONFLICT(key) DO UPDATE SET status = excluded.status, progress = 0, "
+                "data = '{}', updated_at = excluded.updated_at "
+                f"WHERE task_states.status NOT IN ({placeholders}) "
+                "OR task_states.updated_at < :stale"
+            ),
+            params,
+        )
+        return res.rowcount == 1
+
+
+def update(key: str, **fields: Any) -> None:
+    """Merge ``fields`` into the state for ``key`` (creating it if needed).
+
+    One upsert statement: the merge happens inside SQLite (``json_set``), so
+    concurrent writers never read-then-write and can't fail upgrading a read
+    transaction to a write lock. Each field replaces its previous value.
+    """
+    fields = dict(fields)
+    fields.pop("updated_at", None)
+    status = fields.pop("status", None)
+    progress = fields.pop("progress", None)
+    params: Dict[str, Any] = {
+        "key": key, "now": time.time(), "data": json.dumps(fields),
+        "status": status, "progress": None if progress is None else int(progress or 0),
+    }
+    merged = "task_states.data"
+    if fields:
+        pairs = []
+        for i, (name, value) in enumerate(fields.items()):
+            params[f"p{i}"] = "$." + json.dumps(name)
+            params[f"v{i}"] = json.dumps(value)
+            pairs.append(f":p{i}, json(:v{i})")
+        merged = f"json_set(COALESCE(task_states.data, '{{}}'), {', '.join(pairs)})"
+    with db.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO task_states (key, status, progress, data, updated_at) "
+                "VALUES (:key, COALESCE(:status, 'idle'), COALESCE(:progress, 0), :data, :now) "
+                "ON CONFLICT(key) DO UPDATE SET status = COALESCE(:status, task_states.status), "
+                f"progress = COALESCE(:progress, task_states.progress), data = {merged}, "
+                "updated_at = excluded.updated_at"
+            ),
+            params,
+        )
+
+
+def touch(keys: Iterable[str]) -> List[str]:
+    """Refresh ``updated_at`` of the active tasks among ``keys``. Returns the keys that are still active."""
+    keys = list(keys)
+    if not keys:
+        return []
+    params = {"now": time.time(), **{f"k{i}": k for i, k in enumerate(keys)},
+              **{f"a{i}": s for i, s in enumerate(ACTIVE_STATUSES)}}
+    with db.engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                "UPDATE task_states SET updated_at = :now "
+                f"WHERE key IN ({', '.join(f':k{i}' for i in range(len(keys)))}) "
+                f"AND status IN ({', '.join(f':a{i}' for i in range(len(ACTIVE_STATUSES)))}) "
+                "RETURNING key"
+            ),
+            params,
+        ).all()
+    return [r[0] for r in rows]
+
+
+_alive: Dict[str, tuple] = {}  # key -> (app, registered at)
+_alive_lock = threading.Lock()
+_alive_thread: Optional[threading.Thread] = None
+
+
+def keep_alive(app, *keys: str) -> None:
+    """Keep ``keys`` from going stale while this process lives, until they leave the active statuses."""
+    global _alive_thread
+    with _alive_lock:
+        for key in keys:
+            _alive[key] = (app, time.monotonic())
+        if _alive_thread is None or not _alive_thread.is_alive():
+            _alive_thread = threading.Thread(target=_refresh_loop, name="task-state-keepalive", daemon=True)
+            _alive_thread.start()
+
+
+def _refresh_loop() -> None:
+    while True:
+        time.sleep(max(1.0, stale_after() / 4))
+        started = time.monotonic()
+        with _alive_lock:
+            by_app: Dict[Any, List[str]] = {}
+            for key, (app, _) in _alive.items():
+                by_app.setdefault(app, []).append(key)
+        for app, keys in by_app.items():
+            try:
+                with app.app_context():
+                    active = set(touch(keys))
+            except Exception:
+                logging.getLogger(__name__).exception("Refreshing task state failed")
+                continue
+            with _alive_lock:
+                for key in keys:
+                    # Keep keys registered again while the update ran (a new run of the same task)
+                    if key not in active and key in _alive and _alive[key][1] < started:
+                        del _alive[key]
+
+
+def delete(key: str) -> None:
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM task_states WHERE key = :key"), {"key": key})
@@ -0,0 +1,38 @@
+"""Pending lookups are resumed by one process only."""
+import pytest
+
+from backend import create_app, enrichment
+from backend.extensions import db
+from backend.models.source import Source
+from backend.models.video import Video
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv("YOUTUBE_API_KEY", raising=False)
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+
+
+def test_resume_pending_claims_each_row(app, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(enrichment, "_run", lambda app, fn, row_id, claim=None: submitted.append(claim))
+    with app.app_context():
+        src = Source(user_id=1, type="youtube_channel", value="@chan", metadata_status="pending")
+        db.session.add(src)
+        db.session.flush()
+        db.session.add_all([
+            Video(source_id=src.id, url="https://www.youtube.com/watch?v=aaaaaaaaaaa", metadata_status="pending"),
+            Video(source_id=src.id, url="https://www.youtube.com/watch?v=bbbbbbbbbbb", metadata_status="ready"),
+        ])
+        db.session.commit()
+
+    assert enrichment.resume_pending(app) == 2
+    # A second process starting now finds every pending row claimed
+    assert enrichment.resume_pending(app) == 0
+    enrichment._get_executor().shutdown(wait=True)
+    enrichment._executor = None
+    assert sorted(submitted) == ["enrich:source:1", "enrich:video:1"]
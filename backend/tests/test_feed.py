@@ -0,0 +1,33 @@
+"""Clearing a video's transcript takes it out of the feed; setting one puts it back."""
+from backend import create_app
+from backend.extensions import db
+from backend.models.video import Video
+
+
+def test_patch_transcript_updates_the_feed(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("YOUTUBE_API_KEY", raising=False)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+    c = app.test_client()
+    token = c.post("/auth/register", json={"name": "a", "email": "a@x.com", "password": "p"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    source_id = c.post("/sources", json={"type": "youtube_channel", "value": "@chan", "label": "Chan"},
+                       headers=headers).get_json()["id"]
+    with app.app_context():
+        v = Video(source_id=source_id, url="https://www.youtube.com/watch?v=aaaaaaaaaaa", title="t")
+        db.session.add(v)
+        db.session.commit()
+        video_id = v.id
+    path = f"/sources/{source_id}/videos/{video_id}"
+
+    def feed_ids():
+        return [item["id"] for item in c.get("/feed", headers=headers).get_json()["items"]]
+
+    c.patch(path, json={"transcribe": "hello"}, headers=headers)
+    assert feed_ids() == [video_id]
+    c.patch(path, json={"transcribe": ""}, headers=headers)
+    assert feed_ids() == []
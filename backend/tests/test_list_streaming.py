@@ -0,0 +1,49 @@
+"""List endpoints above STREAM_LIST_THRESHOLD are streamed from a session of their own."""
+import pytest
+
+from backend import create_app
+from backend.extensions import db
+from backend.models.video import Video
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("YOUTUBE_API_KEY", raising=False)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "STREAM_LIST_THRESHOLD": 20,
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+    c = app.test_client()
+    token = c.post("/auth/register", json={"name": "a", "email": "a@x.com", "password": "p"}).get_json()["token"]
+    c.headers = {"Authorization": f"Bearer {token}"}
+    source_id = c.post("/sources", json={"type": "youtube_channel", "value": "@chan", "label": "Chan"},
+                       headers=c.headers).get_json()["id"]
+    with app.app_context():
+        db.session.add_all([
+            Video(source_id=source_id, url=f"https://www.youtube.com/watch?v=v{i:010d}", title=f"t{i}")
+            for i in range(450)
+        ])
+        db.session.commit()
+    c.source_id = source_id
+    return c
+
+
+@pytest.mark.parametrize("path", ["/videos", "/sources/{source_id}/videos"])
+def test_list_above_threshold_is_streamed(client, path):
+    for _ in range(3):
+        resp = client.get(path.format(source_id=client.source_id), headers=client.headers)
+        assert resp.status_code == 200
+        assert "Content-Length" not in resp.headers
+        ids = [v["id"] for v in resp.get_json()]
+        assert len(ids) == len(set(ids)) == 450
+        assert ids == sorted(ids, reverse=True)
+
+
+def test_short_list_has_content_length(client):
+    client.application.config["STREAM_LIST_THRESHOLD"] = 1000
+    resp = client.get("/videos", headers=client.headers)
+    assert "Content-Length" in resp.headers
+    assert len(resp.get_json()) == 450
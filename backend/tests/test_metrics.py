@@ -0,0 +1,19 @@
+"""Pipeline gauges read the shared jobs table in queue mode."""
+from backend import create_app, job_queue
+
+
+def test_queue_depth_comes_from_the_jobs_table(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "METRICS_ENABLED": True,
+        "PIPELINE_MODE": "queue",
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+    with app.app_context():
+        job_queue.enqueue(1, "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+        job_queue.enqueue(2, "https://www.youtube.com/watch?v=bbbbbbbbbbb")
+        job_queue.claim("w1")
+    lines = app.test_client().get("/metrics").get_data(as_text=True).splitlines()
+    assert "pipeline_queue_depth 1" in lines
+    assert "pipeline_in_flight 1" in lines
@@ -0,0 +1,50 @@
+"""With PIPELINE_CAPTIONS the pipeline uses caption cues, timings included, instead of transcribing."""
+import pytest
+
+from backend import create_app, segments
+from backend.extensions import db
+from backend.models.video import Video
+from backend.routes import ai
+from backend.segments import Segment
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "VIDEO_DIR": str(tmp_path / "videos"),
+        "PIPELINE_CAPTIONS": True,
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+
+
+def _video(app) -> int:
+    with app.app_context():
+        v = Video(source_id=1, url="https://www.youtube.com/watch?v=aaaaaaaaaaa", title="t")
+        db.session.add(v)
+        db.session.commit()
+        return v.id
+
+
+def test_captions_are_stored_with_their_timings(app, monkeypatch):
+    cues = [Segment(0, 1500, "hello"), Segment(1500, 4000, "world")]
+    monkeypatch.setattr(ai, "fetch_captions_segments", lambda youtube_id: cues)
+    video_id = _video(app)
+    assert ai._pipeline_steps(app, video_id, "https://www.youtube.com/watch?v=aaaaaaaaaaa", None) == "finished"
+    with app.app_context():
+        v = db.session.get(Video, video_id)
+        assert (v.transcribe, v.transcribe_status) == ("hello\nworld", "ready")
+        stored = segments.read_window(video_id, 1000, 2000)
+        assert stored["source"] == "captions"
+        assert stored["segments"] == [c.to_dict() for c in cues]
+
+
+def test_no_captions_falls_back_to_transcription(app, monkeypatch):
+    monkeypatch.setattr(ai, "fetch_captions_segments", lambda youtube_id: [])
+    video_id = _video(app)
+    with app.app_context():
+        v = db.session.get(Video, video_id)
+        assert ai._captions_step(v, "aaaaaaaaaaa", lambda **fields: None) is False
+        assert v.transcribe_status != "ready"
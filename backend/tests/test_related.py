@@ -0,0 +1,51 @@
+"""Re-indexing a video keeps it in the other videos' neighbour lists."""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from backend.related import RelatedIndex  # noqa: E402
+
+
+def test_reindexed_video_stays_a_neighbour(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELATED_TOP_K", "1")
+    index = RelatedIndex(str(tmp_path / "related"))
+    index.add(1, {"title": "rust compiler borrow checker"})
+    index.add(2, {"title": "rust compiler lifetimes"})
+    index.add(3, {"title": "sourdough bread baking"})
+    assert [v for v, _ in index.neighbours(1)] == [2]
+
+    # Less similar than before: it only gets back into 1's list through the slot it held
+    index.add(2, {"title": "rust gardening tips"})
+    assert [v for v, _ in index.neighbours(1)] == [2]
+    assert [v for v, _ in index.neighbours(2)] == [1]
+    assert index.meta()["docs"] == 3
+
+
+def test_dead_rows_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELATED_COMPACT_RATIO", "0.5")
+    index = RelatedIndex(str(tmp_path / "related"))
+    index.add(1, {"title": "rust compiler borrow checker"})
+    index.add(2, {"title": "rust compiler lifetimes"})
+    index.add(3, {"title": "sourdough bread baking"})
+    for _ in range(20):
+        index.add(2, {"title": "rust compiler lifetimes"})
+    meta = index.meta()
+    assert meta["docs"] == 3 and meta["rows"] <= 7  # at most half dead, plus the new row
+    assert [v for v, _ in index.neighbours(1)][:1] == [2]
+    assert [v for v, _ in index.neighbours(2)][:1] == [1]
+    assert [v for v, _ in index.score(3, [1, 2])] == []
+
+
+def test_rebuild_is_seen_by_cached_instances(tmp_path):
+    from backend.related import build
+
+    path = str(tmp_path / "related")
+    cached = RelatedIndex(path)
+    cached.add(1, {"title": "rust compiler borrow checker"})
+    assert cached.neighbours(2) is None
+    docs = [(1, {"title": "rust compiler borrow checker"}), (2, {"title": "rust compiler lifetimes"})]
+    build(path, lambda: iter(docs))
+    assert [v for v, _ in cached.neighbours(2)] == [1]
+    cached.add(3, {"title": "rust lifetimes"})
+    assert RelatedIndex(path).meta()["docs"] == 3
@@ -0,0 +1,28 @@
+"""Tracking a file leaves the caller's session alone and defers eviction to the sweeper."""
+from backend import create_app, storage
+from backend.extensions import db
+from backend.models.stored_artifact import StoredArtifact
+from backend.models.video import Video
+
+
+def test_track_does_not_commit_the_callers_session(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "VIDEO_DIR": str(tmp_path),
+        "STORAGE_MAX_BYTES": 10,
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+    path = tmp_path / "aaaaaaaaaaa.m4a"
+    path.write_bytes(b"x" * 100)
+    storage._over_budget.clear()
+    with app.app_context():
+        db.session.add(Video(source_id=1, url="https://www.youtube.com/watch?v=aaaaaaaaaaa", title="pending"))
+        storage.track(str(path), 1)
+        storage.touch(str(path))
+        assert len(db.session.new) == 1
+        db.session.rollback()
+        assert Video.query.count() == 0
+        assert db.session.get(StoredArtifact, str(path)).size_bytes == 100
+    # Over budget: the file is still there until the sweeper runs
+    assert path.exists() and storage._over_budget.is_set()
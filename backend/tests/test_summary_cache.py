@@ -0,0 +1,53 @@
+"""The summary memo is written on a connection of its own, never through the caller's session."""
+import pytest
+
+from backend import create_app, summary_cache
+from backend.extensions import db
+from backend.models.summary_memo import SummaryMemo
+from backend.models.video import Video
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("YOUTUBE_API_KEY", raising=False)
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+        "ADMIN_EMAILS": "admin@x.com",
+    })
+
+
+def test_memo_leaves_the_callers_session_alone(app):
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return "summary"
+
+    with app.app_context():
+        db.session.add(Video(source_id=1, url="https://www.youtube.com/watch?v=aaaaaaaaaaa", title="pending"))
+        assert summary_cache.memoized("text", "m", "", generate) == "summary"
+        assert summary_cache.memoized("text", "m", "", generate) == "summary"
+        assert len(calls) == 1
+        assert len(db.session.new) == 1
+        db.session.rollback()
+        assert Video.query.count() == 0
+        memo = db.session.get(SummaryMemo, summary_cache.memo_key("text", "m"))
+        assert memo.summary == "summary" and memo.hits == 1
+
+
+def test_summary_cache_stats_is_admin_only(app):
+    c = app.test_client()
+    for email in ("a@x.com", "admin@x.com"):
+        token = c.post("/auth/register", json={"name": "a", "email": email, "password": "p"}).get_json()["token"]
+        resp = c.get("/ai/summary-cache", headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == (200 if email == "admin@x.com" else 403)
+
+
+def test_memo_key_covers_the_map_reduce_prompts(monkeypatch):
+    before = summary_cache.memo_key("text", "m")
+    prompts = summary_cache.SUMMARY_PROMPTS
+    monkeypatch.setattr(summary_cache, "SUMMARY_PROMPTS", prompts[:1] + ("changed chunk prompt",) + prompts[2:])
+    assert summary_cache.memo_key("text", "m") != before
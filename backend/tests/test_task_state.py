@@ -0,0 +1,43 @@
+"""Tasks registered with ``keep_alive`` stay fresh until they leave the active statuses."""
+import time
+
+import pytest
+
+from backend import create_app, task_state
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("TASK_STATE_STALE_SECONDS", "2")
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "STORAGE_SWEEP_SECONDS": 0,
+        "DIGEST_CHECK_SECONDS": 0,
+    })
+
+
+def test_keep_alive_refreshes_active_tasks(app):
+    with app.app_context():
+        assert task_state.claim("pipeline:1")
+        task_state.update("pipeline:2", status="finished")
+        task_state.keep_alive(app, "pipeline:1", "pipeline:2")
+        time.sleep(3)
+        assert task_state.is_active(task_state.get("pipeline:1"))
+        assert not task_state.claim("pipeline:1")
+        assert task_state.touch(["pipeline:1", "pipeline:2"]) == ["pipeline:1"]
+
+        task_state.update("pipeline:1", status="finished")
+        time.sleep(1.5)
+        assert "pipeline:1" not in task_state._alive
+
+
+def test_update_merges_fields(app):
+    with app.app_context():
+        task_state.update("pipeline:3", status="queued", leader=7, flight="youtube:x", result={"a": 1, "b": 2})
+        task_state.update("pipeline:3", progress=40, leader=None, result={"a": 3}, note='it\'s "quoted"')
+        state = task_state.get("pipeline:3")
+        assert state["status"] == "queued" and state["progress"] == 40
+        assert state["leader"] is None and state["flight"] == "youtube:x"
+        assert state["result"] == {"a": 3} and state["note"] == 'it\'s "quoted"'
+        task_state.update("fresh", error="x")
+        assert task_state.get("fresh")["status"] == "idle"
@@ -0,0 +1,97 @@
+"""Concurrent caption probing against stubbed HTTP and Transcript API calls."""
+import threading
+import time
+
+import pytest
+
+from backend import youtube_captions as yc
+from backend.segments import Segment
+
+VTT = ["WEBVTT", "", "00:00:01.000 --> 00:00:02.500", "hello", "", "00:00:02.500 --> 00:00:04.000", "world", ""]
+
+
+class FakeResponse:
+    def __init__(self, status=200, payload=None, lines=()):
+        self.status_code = status
+        self.ok = status < 400
+        self.headers = {}
+        self.encoding = "utf-8"
+        self._payload = payload or {}
+        self._lines = lines
+        self.content = b"{}"
+        self.text = "{}"
+
+    def json(self):
+        return self._payload
+
+    def iter_lines(self, decode_unicode=False):
+        yield from self._lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture()
+def http(monkeypatch):
+    """Records the URLs requested; ``http.routes`` maps a URL fragment to a response factory."""
+    monkeypatch.setenv("YOUTUBE_API_KEY", "k")
+    yc._track_cache.clear()
+    calls = []
+
+    def get(url, params=None, **kw):
+        calls.append((url, dict(params or {})))
+        for fragment, respond in get.routes.items():
+            if fragment in url:
+                return respond(params or {})
+        return FakeResponse(404)
+
+    get.routes = {}
+    get.calls = calls
+    monkeypatch.setattr(yc.http_client, "get", get)
+    return get
+
+
+def _track(name="Main"):
+    return {"items": [{"snippet": {"language": "en", "trackKind": "standard", "name": name}}]}
+
+
+def test_first_success_wins_and_stops_the_others(http, monkeypatch):
+    stopped = threading.Event()
+
+    def slow_transcript_api(video_id, prefer_generated, stop):
+        if stop.wait(5):
+            stopped.set()
+        return [Segment(0, 1000, "from the transcript api")]
+
+    monkeypatch.setattr(yc, "_transcript_api_segments", slow_transcript_api)
+    http.routes["/captions"] = lambda params: FakeResponse(payload=_track())
+    http.routes["timedtext"] = lambda params: FakeResponse(lines=VTT) if params.get("name") else FakeResponse(404)
+
+    started = time.monotonic()
+    segs = yc.fetch_captions_segments("aaaaaaaaaaa", timeout=5)
+    assert [s.text for s in segs] == ["hello", "world"]
+    assert (segs[0].start_ms, segs[1].end_ms) == (1000, 4000)
+    assert stopped.wait(1) and time.monotonic() - started < 2
+
+
+def test_every_probe_failing_returns_nothing(http, monkeypatch):
+    monkeypatch.setattr(yc, "_transcript_api_segments", lambda video_id, prefer_generated, stop: [])
+    http.routes["/captions"] = lambda params: FakeResponse(payload=_track())
+    # timedtext answers 404 with and without the track name
+    assert yc.fetch_captions_segments("aaaaaaaaaaa", timeout=5) == []
+    timedtext = [p for url, p in http.calls if "timedtext" in url]
+    assert sorted(p.get("name", "") for p in timedtext) == ["", "Main"]
+
+
+def test_cached_track_list_skips_the_data_api(http, monkeypatch):
+    monkeypatch.setattr(yc, "_transcript_api_segments", lambda video_id, prefer_generated, stop: [])
+    http.routes["/captions"] = lambda params: FakeResponse(payload=_track(name=""))
+    http.routes["timedtext"] = lambda params: FakeResponse(lines=VTT)
+
+    for _ in range(2):
+        assert [s.text for s in yc.fetch_captions_segments("aaaaaaaaaaa", timeout=5)] == ["hello", "world"]
+    listings = [url for url, _ in http.calls if "/captions" in url]
+    assert len(listings) == 1
@@ -0,0 +1,207 @@
+"""Lightweight span tracing with request IDs.
+
+Every HTTP request gets a request ID (``X-Request-ID`` if the client sent a
+sane one, otherwise a new one) and a trace context held in a contextvar.
+Work handed to other threads keeps the context when the callable is wrapped
+with ``bind`` (the pipeline thread, the transcode pool and the summary map
+step do this), so spans and log lines of a background
+run point back at the request that started it.
+
+When TRACE_FILE is set, finished spans are appended to it as Chrome Trace
+Event "complete" events (JSON array format, closing bracket omitted), which
+``chrome://tracing`` and https://ui.perfetto.dev load directly.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class TraceContext(NamedTuple):
+    trace_id: str
+    request_id: str
+    span_id: Optional[str]
+
+
+_current: "contextvars.ContextVar[Optional[TraceContext]]" = contextvars.ContextVar("trace", default=None)
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def current() -> Optional[TraceContext]:
+    return _current.get()
+
+
+def request_id() -> Optional[str]:
+    ctx = _current.get()
+    return ctx.request_id if ctx else None
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class _Exporter:
+    """Append-only Chrome Trace Event writer shared by all threads."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def configure(self, path: Optional[str]) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self.path = path or None
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), default=str)
+        with self._lock:
+            if not self.path:
+                return
+            if self._fh is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                self._fh = open(self.path, "a", encoding="utf-8")
+                if new:
+                    self._fh.write("[\n")
+            self._fh.write(line + ",\n")
+            self._fh.flush()
+
+
+_exporter = _Exporter()
+
+
+def configure(path: Optional[str]) -> None:
+    """Set (or clear) the trace output file."""
+    _exporter.configure(path)
+
+
+def enabled() -> bool:
+    return bool(_exporter.path)
+
+
+def bind(fn):
+    """Wrap ``fn`` to run in a copy of the caller's context (for threads and executors)."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+class Span:
+    """A timed unit of work; the current span becomes the parent of spans started inside it."""
+
+    def __init__(self, name: str, cat: str = "app", **args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.span_id = _new_id()
+        self._token = None
+        self._start_us = 0
+        self._t0 = 0.0
+
+    def start(self) -> "Span":
+        parent = _current.get()
+        if parent is None:
+            parent = TraceContext(_new_id(), _new_id(), None)
+        self.parent = parent
+        self._token = _current.set(parent._replace(span_id=self.span_id))
+        self._start_us = time.time_ns() // 1000
+        self._t0 = time.perf_counter()
+        return self
+
+    def end(self, **args) -> None:
+        duration_us = int((time.perf_counter() - self._t0) * 1_000_000)
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        if not enabled():
+            return
+        self.args.update(args)
+        _exporter.write({
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": self._start_us,
+            "dur": duration_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {
+                "trace_id": self.parent.trace_id,
+                "request_id": self.parent.request_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id,
+                "thread": threading.current_thread().name,
+                **self.args,
+            },
+        })
+
+
+@contextmanager
+def span(name: str, cat: str = "app", **args):
+    """``with span("ffmpeg", label=...) as s:``; ``s.args`` can be extended inside the block."""
+    s = Span(name, cat, **args).start()
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        s.end(**({"error": error} if error else {}))
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds ``record.request_id`` (``-`` outside a traced context) for log formats."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id() or "-"
+        return True
+
+
+def init_app(app) -> None:
+    from flask import g, request
+
+    configure(app.config.get("TRACE_FILE"))
+
+    request_filter = RequestIdFilter()
+    for handler in logging.getLogger().handlers + app.logger.handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(request_filter)
+
+    @app.before_request
+    def _trace_start():
+        rid = request.headers.get("X-Request-ID", "")
+        if not _REQUEST_ID_RE.match(rid):
+            rid = uuid.uuid4().hex
+        token = _current.set(TraceContext(_new_id(), rid, None))
+        g._trace = (token, Span(f"{request.method} {request.path}", "http", method=request.method).start())
+
+    @app.after_request
+    def _trace_header(resp):
+        rid = request_id()
+        if rid:
+            resp.headers["X-Request-ID"] = rid
+        state = g.get("_trace")
+        if state is not None:
+            state[1].args["status"] = resp.status_code
+        return resp
+
+    @app.teardown_request
+    def _trace_end(exc):
+        state = g.pop("_trace", None)
+        if state is None:
+            return
+        token, root = state
+        root.end(endpoint=request.endpoint)
+        _current.reset(token)
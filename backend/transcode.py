@@ -0,0 +1,146 @@
+"""Bounded pool for ffmpeg transcodes.
+
+Each job is a separate (niced) ffmpeg process, but at most TRANSCODE_WORKERS
+run at once; further jobs wait in the pool's queue. The default worker count
+leaves one core free for the web process. Every job reports the CPU seconds
+its process consumed, so transcode capacity can be planned separately from
+I/O-bound stages.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from backend import accounting, tracing
+
+
+class TranscodeResult(NamedTuple):
+    returncode: int
+    cpu_seconds: float  # user + system time of the ffmpeg process
+    wall_seconds: float
+    queued_seconds: float
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def _default_workers() -> int:
+    try:
+        configured = int(os.environ.get("TRANSCODE_WORKERS", 0))
+    except ValueError:
+        configured = 0
+    if configured > 0:
+        return configured
+    return max(1, available_cores() - 1)
+
+
+def _default_nice() -> int:
+    try:
+        return int(os.environ.get("TRANSCODE_NICE", 10))
+    except ValueError:
+        return 10
+
+
+class TranscodePool:
+    def __init__(self, workers: Optional[int] = None, nice: Optional[int] = None):
+        self.workers = workers or _default_workers()
+        self.nice = _default_nice() if nice is None else nice
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="transcode")
+        self._lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+            "cpu_seconds": 0.0,
+            "wall_seconds": 0.0,
+            "queued_seconds": 0.0,
+        }
+
+    def _command(self, args: List[str]) -> List[str]:
+        cmd = list(args)
+        if self.nice and shutil.which("nice"):
+            cmd = ["nice", "-n", str(self.nice)] + cmd
+        return cmd
+
+    def _execute(self, args: List[str], label: str, submitted: float) -> TranscodeResult:
+        started = time.monotonic()
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+        cpu = 0.0
+        returncode = -1
+        trace = tracing.Span("ffmpeg", "transcode", label=label, queued_ms=round((started - submitted) * 1000, 1)).start()
+        try:
+            proc = subprocess.Popen(
+                self._command(args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            if hasattr(os, "wait4"):
+                # wait4 gives the rusage of this child only (RUSAGE_CHILDREN would mix jobs)
+                _, status, ru = os.wait4(proc.pid, 0)
+                proc.returncode = returncode = os.waitstatus_to_exitcode(status)
+                cpu = ru.ru_utime + ru.ru_stime
+            else:
+                returncode = proc.wait()
+        finally:
+            trace.end(returncode=returncode, cpu_seconds=round(cpu, 3))
+            wall = time.monotonic() - started
+            with self._lock:
+                self._stats["running"] -= 1
+                self._stats["completed" if returncode == 0 else "failed"] += 1
+                self._stats["cpu_seconds"] += cpu
+                self._stats["wall_seconds"] += wall
+                self._stats["queued_seconds"] += started - submitted
+        accounting.charge(ffmpeg_cpu_seconds=cpu)
+        result = TranscodeResult(returncode, cpu, wall, started - submitted)
+        logging.getLogger(__name__).info(
+            "Transcode %s: rc=%s cpu=%.2fs wall=%.2fs queued=%.2fs",
+            label or args[0], returncode, cpu, wall, result.queued_seconds,
+        )
+        return result
+
+    def submit(self, args: List[str], label: str = "") -> "Future[TranscodeResult]":
+        with self._lock:
+            self._stats["queued"] += 1
+        return self._executor.submit(tracing.bind(self._execute), args, label, time.monotonic())
+
+    def run(self, args: List[str], label: str = "") -> TranscodeResult:
+        """Run a job through the pool and wait for it; raises CalledProcessError on failure."""
+        result = self.submit(args, label).result()
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, args)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        out["workers"] = self.workers
+        out["nice"] = self.nice
+        out["cores"] = available_cores()
+        return out
+
+
+_pool: Optional[TranscodePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> TranscodePool:
+    """Process-wide pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TranscodePool()
+        return _pool
+
+
+def run_ffmpeg(args: List[str], label: str = "") -> TranscodeResult:
+    """Run ``ffmpeg <args>`` through the shared pool."""
+    return get_pool().run(["ffmpeg"] + list(args), label=label)
@@ -0,0 +1,115 @@
+"""Incremental transcripts.
+
+The pipeline stores each segment's text in ``transcript_parts`` as soon as
+the segment is transcribed and counts progress on the video row, so the
+beginning of a long transcript is readable while later segments are still
+running. Partial and final transcripts are joined the same way, which keeps
+character offsets from ``read_range`` valid once the video finishes.
+"""
+from typing import Dict, List, Optional
+
+from backend import segments as segment_store
+from backend.extensions import db
+from backend.models.transcript_part import TranscriptPart
+from backend.models.video import Video
+
+SEPARATOR = "\n\n"
+
+
+def join(texts: List[str]) -> str:
+    return SEPARATOR.join(t for t in texts if t)
+
+
+def begin(video: Video, total: int) -> Dict[int, str]:
+    """Reset progress for a run over ``total`` segments (caller commits).
+
+    Parts left by an earlier failed run over the same number of segments are
+    kept and returned as {index: text}, so the run can skip them.
+    """
+    existing = {} if video.transcript_parts_total != total else {
+        p.index: p.text
+        for p in TranscriptPart.query.filter_by(video_id=video.id).all()
+    }
+    if not existing:
+        clear(video.id)
+    video.transcript_parts_total = total
+    video.transcript_parts_done = len(existing)
+    return existing
+
+
+def save_part(video: Video, index: int, text: str,
+              segments: Optional[List[segment_store.Segment]] = None) -> None:
+    """Persist one finished segment (and its timed segments) and bump the progress counter."""
+    db.session.add(TranscriptPart(
+        video_id=video.id, index=index, text=text or "",
+        segments=segment_store.encode(segments) if segments else None,
+    ))
+    video.transcript_parts_done = (video.transcript_parts_done or 0) + 1
+    db.session.commit()
+
+
+def clear(video_id: int) -> None:
+    """Drop stored parts (caller commits)."""
+    TranscriptPart.query.filter_by(video_id=video_id).delete(synchronize_session=False)
+
+
+def timed_segments(video_id: int) -> List[segment_store.Segment]:
+    """Timed segments of all stored parts, in order."""
+    out: List[segment_store.Segment] = []
+    rows = (
+        db.session.query(TranscriptPart.segments)
+        .filter(TranscriptPart.video_id == video_id)
+        .order_by(TranscriptPart.index)
+    )
+    for (blob,) in rows:
+        if blob:
+            out.extend(segment_store.decode(blob))
+    return out
+
+
+def partial_text(video_id: int) -> str:
+    """Joined text of the leading segments that are done (stops at the first gap)."""
+    texts = []
+    rows = (
+        db.session.query(TranscriptPart.index, TranscriptPart.text)
+        .filter(TranscriptPart.video_id == video_id)
+        .order_by(TranscriptPart.index)
+    )
+    for expected, (index, text) in enumerate(rows):
+        if index != expected:
+            break
+        texts.append(text)
+    return join(texts)
+
+
+def progress(video: Video) -> Dict[str, Optional[float]]:
+    total = video.transcript_parts_total or 0
+    if video.transcribe_status == "ready":
+        done = total
+    else:
+        done = min(video.transcript_parts_done or 0, total)
+    return {
+        "done": done,
+        "total": total,
+        "fraction": round(done / total, 4) if total else (1.0 if video.transcribe_status == "ready" else 0.0),
+    }
+
+
+def read_range(video: Video, offset: int = 0, limit: Optional[int] = None) -> dict:
+    """Characters ``[offset, offset + limit)`` of the transcript available so far.
+
+    Poll with ``offset=next_offset`` to receive only new text; ``complete``
+    turns true once the full transcript is saved.
+    """
+    complete = video.transcribe_status == "ready"
+    text = (video.transcribe or "") if complete else partial_text(video.id)
+    offset = max(0, min(offset, len(text)))
+    end = len(text) if limit is None else min(len(text), offset + max(0, limit))
+    return {
+        "text": text[offset:end],
+        "offset": offset,
+        "next_offset": end,
+        "available": len(text),
+        "complete": complete,
+        "progress": progress(video),
+    }
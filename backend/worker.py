@@ -0,0 +1,178 @@
+"""Standalone pipeline worker: ``python -m backend.worker``.
+
+Drains the ``pipeline_jobs`` queue that web processes fill when
+PIPELINE_MODE=queue (see ``backend.job_queue``). Each worker runs up to
+``--concurrency`` pipelines at once (default PIPELINE_WORKERS), polls for work
+every ``--poll`` seconds while idle and extends the leases of its running jobs
+from a heartbeat thread. Start as many as the database and the transcription
+provider can take, on any machine that shares the database (and, for the
+media endpoints and storage budget, VIDEO_DIR/AUDIO_DIR).
+
+SIGTERM or Ctrl-C stops claiming and waits for running jobs to finish; a
+second signal puts them back in the queue and exits.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from backend import job_queue, task_state, tracing
+
+log = logging.getLogger("backend.worker")
+
+
+class Worker:
+    def __init__(self, app, concurrency: int, poll_seconds: float = 1.0, lease: Optional[float] = None):
+        self.app = app
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease = lease or job_queue.lease_seconds()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = threading.Event()
+        self._done = threading.Event()  # set once running jobs finished; ends the heartbeat
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._held: Dict[int, int] = {}  # job id -> video id
+        self.stats = {"completed": 0, "failed": 0, "lost": 0}
+
+    def run(self, once: bool = False) -> Dict[str, int]:
+        """Claim and run jobs until ``stop`` (or, with ``once``, until the queue is empty)."""
+        beat = threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True)
+        beat.start()
+        threads = []
+        log.info("Worker %s started (concurrency=%s, lease=%ss)", self.worker_id, self.concurrency, self.lease)
+        while not self.stopping.is_set():
+            self._slots.acquire()
+            if self.stopping.is_set():
+                self._slots.release()
+                break
+            with self.app.app_context():
+                self._reap()
+                job = job_queue.claim(self.worker_id, self.lease)
+            if job is None:
+                self._slots.release()
+                if once and not self._busy():
+                    break
+                self.stopping.wait(self.poll_seconds)
+                continue
+            with self._lock:
+                self._held[job["id"]] = job["video_id"]
+            t = threading.Thread(target=self._execute, args=(job,), name=f"pipeline-{job['video_id']}", daemon=True)
+            threads = [x for x in threads if x.is_alive()] + [t]
+            t.start()
+        for t in threads:
+            t.join()
+        self._done.set()
+        beat.join()
+        log.info("Worker %s stopped: %s", self.worker_id, self.stats)
+        return dict(self.stats)
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def _busy(self) -> bool:
+        with self._lock:
+            return bool(self._held)
+
+    def _execute(self, job: Dict) -> None:
+        from backend.metrics import PIPELINE_QUEUE_WAIT
+        from backend.routes.ai import _keep_alive, _pipeline_key, _run_full_pipeline
+
+        video_id = job["video_id"]
+        PIPELINE_QUEUE_WAIT.observe(time.time() - job["queued_at"], priority=job["priority"])
+        _keep_alive(self.app, video_id, job["url"])
+        status, error = "failed", None
+        try:
+            if job["attempts"] > 1:
+                log.info("Retrying video_id=%s (attempt %s)", video_id, job["attempts"])
+            if tracing.bind(_run_full_pipeline)(self.app, video_id, job["url"], job["provider"]) == "finished":
+                status = "done"
+            else:
+                with self.app.app_context():
+                    error = (task_state.get(_pipeline_key(video_id)) or {}).get("error")
+        except Exception as e:
+            log.exception("Pipeline run for video_id=%s crashed", video_id)
+            error = str(e)
+        finally:
+            with self._lock:
+                self._held.pop(job["id"], None)
+            try:
+                with self.app.app_context():
+                    kept = job_queue.finish(job["id"], self.worker_id, status, error)
+            except Exception:
+                log.exception("Finishing job %s failed", job["id"])
+                kept = True
+            self.stats["completed" if status == "done" else "failed"] += 1
+            if not kept:
+                self.stats["lost"] += 1
+                log.warning("Lease of video_id=%s was lost while it ran; another worker took it over", video_id)
+            self._slots.release()
+
+    def _heartbeat(self) -> None:
+        interval = max(1.0, self.lease / 3)
+        while not self._done.wait(interval):
+            with self._lock:
+                held = dict(self._held)
+            if not held:
+                continue
+            try:
+                with self.app.app_context():
+                    for job_id, video_id in held.items():
+                        if not job_queue.heartbeat(job_id, self.worker_id, self.lease):
+                            log.warning("Lost the lease of video_id=%s", video_id)
+            except Exception:
+                log.exception("Heartbeat failed")
+
+    def _reap(self) -> None:
+        """Fail jobs whose workers died on every attempt, releasing their pipeline state."""
+        from backend.routes.ai import _finish_flight, _pipeline_key
+
+        for job in job_queue.reap():
+            log.warning("Giving up on video_id=%s after %s attempts", job["video_id"], job_queue.max_attempts())
+            task_state.update(_pipeline_key(job["video_id"]), status="failed", error="worker lost")
+            _finish_flight(self.app, job["video_id"], job["url"], "failed")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run queued pipeline jobs (PIPELINE_MODE=queue)")
+    ap.add_argument("--concurrency", type=int, help="pipelines run at once (default: PIPELINE_WORKERS or 4)")
+    ap.add_argument("--poll", type=float, default=1.0, help="seconds between queue polls while idle")
+    ap.add_argument("--lease", type=float, help="lease length in seconds (default: PIPELINE_LEASE_SECONDS or 120)")
+    ap.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    ap.add_argument("--db", help="SQLite file (default: the app's configured database)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from backend import create_app
+
+    # Sweeper, digests and pending lookups are left to the web processes
+    config = {"PIPELINE_MODE": "queue", "BACKGROUND_TASKS": False}
+    if args.db:
+        config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(args.db)}"
+    app = create_app(config)
+    concurrency = args.concurrency or max(1, int(job_queue._env_float("PIPELINE_WORKERS", 4)))
+    worker = Worker(app, concurrency, poll_seconds=args.poll, lease=args.lease)
+
+    def on_signal(signum, frame):
+        if worker.stopping.is_set():
+            with app.app_context():
+                n = job_queue.release(worker.worker_id)
+            log.warning("Exiting without draining; %s job(s) put back in the queue", n)
+            os._exit(1)
+        log.info("Stopping after the running jobs finish (signal again to exit now)")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    worker.run(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
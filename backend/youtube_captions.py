@@ -1,17 +1,16 @@
+import collections
+import itertools
 import os
 import re
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
-
-import requests
 import logging
 
-from youtube_transcript_api import (
-    YouTubeTranscriptApi,
-    TranscriptsDisabled,
-    NoTranscriptFound,
-    CouldNotRetrieveTranscript,
-)
+from backend import http_client, tracing
+from backend.segments import Segment
 
 
 YOUTUBE_ID_RE = re.compile(
@@ -52,95 +51,174 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+def youtube_api_url(path: str) -> str:
+    """YouTube Data API endpoint; YOUTUBE_API_BASE_URL allows pointing at a stand-in server."""
+    base = os.environ.get("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3").rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def timedtext_url() -> str:
+    return os.environ.get("YOUTUBE_TIMEDTEXT_URL", "https://www.youtube.com/api/timedtext")
+
+
+def watch_url(video_id: str) -> str:
+    """Canonical URL handed to yt-dlp (YOUTUBE_WATCH_URL template, ``{id}`` placeholder)."""
+    template = os.environ.get("YOUTUBE_WATCH_URL", "https://www.youtube.com/watch?v={id}")
+    return template.format(id=video_id)
+
+
 def _langs_from_env() -> List[str]:
     raw = os.environ.get("YOUTUBE_CAPTIONS_LANGS", "en,en-US,en-GB").strip()
     return [p.strip() for p in raw.split(",") if p.strip()]
 
 
-def _strip_vtt_to_text(vtt: str) -> str:
-    lines = []
-    for line in (vtt or "").splitlines():
-        if not line:
-            continue
-        if line.startswith("WEBVTT"):
-            continue
-        if re.match(r"^\d+$", line):
-            continue
-        if re.match(r"^\d{2}:\d{2}:\d{2}\.\d{3} --> ", line):
-            continue
-        if re.match(r"^\d{2}:\d{2}\.\d{3} --> ", line):
+_VTT_TIME_RE = re.compile(r"(?:(\d+):)?(\d{2}):(\d{2})\.(\d{3})")
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def _vtt_ms(stamp: str) -> Optional[int]:
+    m = _VTT_TIME_RE.fullmatch(stamp)
+    if not m:
+        return None
+    h, mnt, sec, ms = m.groups()
+    return ((int(h or 0) * 60 + int(mnt)) * 60 + int(sec)) * 1000 + int(ms)
+
+
+def iter_vtt_cues(lines: Iterable[str]) -> Iterator[Segment]:
+    """Parse WebVTT cues from an iterable of lines (e.g. ``resp.iter_lines()``) one cue at a time.
+
+    Header, NOTE and STYLE blocks and cue identifiers are skipped, inline tags
+    and timestamps (``<c>``, ``<00:00:01.000>``) are dropped, and lines that
+    repeat the previous cue's last line (the rolling display of auto-generated
+    captions) are emitted only once.
+    """
+    start = end = None
+    text: List[str] = []
+    last_line = None
+    for raw in itertools.chain(lines, [""]):
+        line = (raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw).rstrip("\r\n")
+        if line.strip():
+            if start is not None:
+                text.append(line)
+            elif "-->" in line:
+                a, _, b = line.partition("-->")
+                b = b.split()
+                start, end = _vtt_ms(a.strip()), _vtt_ms(b[0]) if b else None
+                if end is None:
+                    start = None
             continue
-        lines.append(line)
-    return "\n".join(lines)
+        # Blank line: end of block
+        if start is not None:
+            fresh = []
+            for t in text:
+                t = _VTT_TAG_RE.sub("", t).strip()
+                if t and t != last_line:
+                    fresh.append(t)
+                    last_line = t
+            if fresh:
+                yield Segment(start, max(start, end), " ".join(fresh))
+        start = end = None
+        text = []
+
+
+def _log_response(label: str, resp, preview: bool = True, **fields) -> None:
+    """Status and size at INFO; the start of the body (CAPTIONS_LOG_BODY_CHARS, default 300) at DEBUG.
+
+    Pass ``preview=False`` for streamed responses, whose body must not be read here.
+    """
+    log = logging.getLogger(__name__)
+    details = ", ".join(f"{k}={v}" for k, v in fields.items())
+    size = len(resp.content) if preview else resp.headers.get("Content-Length", "?")
+    log.info("%s response (%s, status=%s, bytes=%s)", label, details, resp.status_code, size)
+    if preview and log.isEnabledFor(logging.DEBUG):
+        limit = int(os.environ.get("CAPTIONS_LOG_BODY_CHARS", 300))
+        body = resp.text
+        log.debug("%s body: %s%s", label, body[:limit], "..." if len(body) > limit else "")
 
 
-def _download_timedtext(video_id: str, lang: str, asr: bool, name: Optional[str] = None) -> str:
-    """Download timedtext (VTT) and return plain text. If name is provided, try with name first.
+def _timedtext_segments(video_id: str, lang: str, asr: bool, name: Optional[str],
+                        stop: threading.Event) -> List[Segment]:
+    """One timedtext (VTT) download, parsed as it streams in; gives up early once ``stop`` is set.
 
     For manually created tracks with a custom name, timedtext often requires the exact `name` param.
     """
-    def attempt(include_name: bool) -> str:
-        params = {
-            "v": video_id,
-            "lang": lang,
-            "fmt": "vtt",
-        }
-        if asr:
-            params["kind"] = "asr"
-        if include_name and name:
-            params["name"] = name
-        try:
-            resp = requests.get("https://www.youtube.com/api/timedtext", params=params, timeout=15)
-            logging.getLogger(__name__).info(
-                "YouTube timedtext response (lang=%s, asr=%s, name=%s, status=%s):\n%s",
-                lang,
-                asr,
-                name if include_name else "",
-                resp.status_code,
-                resp.text,
-            )
-            if not resp.ok:
-                return ""
-            text = _strip_vtt_to_text(resp.text)
-            return text
-        except requests.RequestException:
-            return ""
+    import requests
 
-    # Try with name first for manual tracks
+    params = {
+        "v": video_id,
+        "lang": lang,
+        "fmt": "vtt",
+    }
+    if asr:
+        params["kind"] = "asr"
     if name:
-        txt = attempt(include_name=True)
-        if txt.strip():
-            return txt
-    # Fallback without name
-    return attempt(include_name=False)
+        params["name"] = name
+    if stop.is_set():
+        return []
+    try:
+        with http_client.get(timedtext_url(), params=params, timeout=15, stream=True) as resp:
+            _log_response("YouTube timedtext", resp, preview=False, lang=lang, asr=asr, name=name or "")
+            if not resp.ok:
+                return []
+            resp.encoding = resp.encoding or "utf-8"
+            segs = []
+            for seg in iter_vtt_cues(resp.iter_lines(decode_unicode=True)):
+                if stop.is_set():
+                    return []  # another probe won; closing drops the connection
+                segs.append(seg)
+            return segs
+    except requests.RequestException:
+        return []
 
 
-def _fetch_via_data_api(video_id: str, prefer_generated: bool) -> str:
-    api_key = os.environ.get("YOUTUBE_API_KEY")
-    if not api_key:
-        return ""
-    langs = _langs_from_env()
+_TRACK_CACHE_SIZE = 1024
+_track_cache: "collections.OrderedDict[str, Tuple[float, List[dict]]]" = collections.OrderedDict()
+_track_cache_lock = threading.Lock()
+
+
+def _track_ttl(empty: bool) -> float:
+    """Seconds a listing stays cached (CAPTIONS_TRACK_TTL, default 3600; empty listings 300)."""
     try:
-        resp = requests.get(
-            "https://www.googleapis.com/youtube/v3/captions",
+        ttl = float(os.environ.get("CAPTIONS_TRACK_TTL", 3600))
+    except ValueError:
+        ttl = 3600.0
+    return min(ttl, 300.0) if empty else ttl
+
+
+def caption_tracks(video_id: str, api_key: str) -> Optional[List[dict]]:
+    """Caption track list of a video from the Data API, cached per video. None if the lookup failed."""
+    now = time.monotonic()
+    with _track_cache_lock:
+        hit = _track_cache.get(video_id)
+        if hit and hit[0] > now:
+            _track_cache.move_to_end(video_id)
+            return hit[1]
+    import requests
+
+    try:
+        resp = http_client.get(
+            youtube_api_url("captions"),
             params={"part": "snippet", "videoId": video_id, "key": api_key, "maxResults": 50},
             timeout=15,
         )
-        logging.getLogger(__name__).info(
-            "YouTube Data API captions list response (video_id=%s, status=%s):\n%s",
-            video_id,
-            resp.status_code,
-            resp.text,
-        )
+        _log_response("YouTube Data API captions list", resp, video_id=video_id)
     except requests.RequestException:
-        return ""
+        return None
     if not resp.ok:
-        return ""
-    j = resp.json() or {}
-    items = j.get("items") or []
-    if not items:
-        return ""
-    # Pick track by language + manual/generated preference
+        return None
+    items = (resp.json() or {}).get("items") or []
+    with _track_cache_lock:
+        _track_cache[video_id] = (now + _track_ttl(not items), items)
+        _track_cache.move_to_end(video_id)
+        while len(_track_cache) > _TRACK_CACHE_SIZE:
+            _track_cache.popitem(last=False)
+    return items
+
+
+def _choose_track(items: List[dict], prefer_generated: bool) -> Optional[dict]:
+    """Pick track by language + manual/generated preference."""
+    langs = _langs_from_env()
+
     def pick(tracks, want_asr: bool):
         # Prefer requested languages order
         for lang in langs:
@@ -157,31 +235,33 @@ def _fetch_via_data_api(video_id: str, prefer_generated: bool) -> str:
 
     manual = [it for it in items if (it.get("snippet", {}).get("trackKind") or "").upper() != "ASR"]
     auto = [it for it in items if (it.get("snippet", {}).get("trackKind") or "").upper() == "ASR"]
-    chosen = None
     if prefer_generated:
-        chosen = pick(auto, True) or pick(manual, False)
-    else:
-        chosen = pick(manual, False) or pick(auto, True)
+        return pick(auto, True) or pick(manual, False)
+    return pick(manual, False) or pick(auto, True)
+
+
+def _data_api_track(video_id: str, prefer_generated: bool) -> Optional[Tuple[str, bool, Optional[str]]]:
+    """``(lang, asr, name)`` of the track to download via timedtext, if the Data API lists one."""
+    api_key = os.environ.get("YOUTUBE_API_KEY")
+    if not api_key:
+        return None
+    chosen = _choose_track(caption_tracks(video_id, api_key) or [], prefer_generated)
     if not chosen:
-        return ""
+        return None
     sn = chosen.get("snippet", {})
-    lang = sn.get("language") or "en"
-    asr = (sn.get("trackKind") or "").upper() == "ASR"
-    name = sn.get("name") or None
-    # Download text via timedtext (does not require OAuth), matching chosen language/kind/name
-    text = _download_timedtext(video_id, lang, asr, name=name)
-    if not text and name:
-        # Final fallback: try without name if named track didn't return content
-        text = _download_timedtext(video_id, lang, asr, name=None)
-    return text
+    return sn.get("language") or "en", (sn.get("trackKind") or "").upper() == "ASR", sn.get("name") or None
 
 
-def fetch_captions_text(video_id: str, prefer_generated: bool = False) -> str:
+def _transcript_api_segments(video_id: str, prefer_generated: bool, stop: threading.Event) -> List[Segment]:
+    # Imported here: the transcript API is only needed on this path
+    from youtube_transcript_api import (
+        YouTubeTranscriptApi,
+        TranscriptsDisabled,
+        NoTranscriptFound,
+        CouldNotRetrieveTranscript,
+    )
+
     langs = _langs_from_env()
-    # First try Data API (track selection using API key), then fall back to transcript API
-    data_api_text = _fetch_via_data_api(video_id, prefer_generated=prefer_generated)
-    if data_api_text:
-        return data_api_text
     try:
         lst = YouTubeTranscriptApi.list_transcripts(video_id)
         transcript = None
@@ -198,15 +278,86 @@ def fetch_captions_text(video_id: str, prefer_generated: bool = False) -> str:
                     transcript = lst.find_generated_transcript(langs)
                 except Exception:
                     pass
+        if stop.is_set():
+            return []
         if transcript is None:
             # Fall back to direct get_transcript
             segments = YouTubeTranscriptApi.get_transcript(video_id, languages=langs)
         else:
             segments = transcript.fetch()
-        # Join text lines, skipping empty ones
-        parts = [seg.get("text", "").strip() for seg in segments]
-        return "\n".join([p for p in parts if p])
+        # Skip empty lines
+        out = []
+        for seg in segments:
+            text = (seg.get("text") or "").strip()
+            if text:
+                start = int(round(float(seg.get("start") or 0) * 1000))
+                out.append(Segment(start, start + int(round(float(seg.get("duration") or 0) * 1000)), text))
+        return out
     except (TranscriptsDisabled, NoTranscriptFound, CouldNotRetrieveTranscript):
-        return ""
+        return []
     except Exception:
-        return ""
+        return []
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(os.environ.get("CAPTIONS_WORKERS", 8)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="captions")
+        return _executor
+
+
+def fetch_captions_segments(video_id: str, prefer_generated: bool = False,
+                            timeout: Optional[float] = None) -> List[Segment]:
+    """Timed caption cues of a video (empty if it has no usable captions).
+
+    The caption sources are probed concurrently instead of one after another:
+    the YouTube Transcript API, and the Data API track listing (cached per
+    video) followed by timedtext downloads with and without the track name.
+    The first non-empty result wins and the other probes stop; the whole
+    lookup gives up after ``timeout`` seconds (CAPTIONS_TIMEOUT, default 15).
+    """
+    if timeout is None:
+        timeout = float(os.environ.get("CAPTIONS_TIMEOUT", 15))
+    ex = _get_executor()
+    stop = threading.Event()
+    pending = {
+        ex.submit(tracing.bind(_data_api_track), video_id, prefer_generated): "track",
+        ex.submit(tracing.bind(_transcript_api_segments), video_id, prefer_generated, stop): "segments",
+    }
+    deadline = time.monotonic() + timeout
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                logging.getLogger(__name__).info("Caption lookup for %s timed out after %.1fs", video_id, timeout)
+                return []
+            for f in done:
+                kind = pending.pop(f)
+                try:
+                    result = f.result()
+                except Exception:
+                    logging.getLogger(__name__).exception("Caption probe failed for %s", video_id)
+                    continue
+                if kind == "track":
+                    if result:
+                        lang, asr, name = result
+                        # Named tracks usually need the name; try with and without it at once
+                        for n in ([name, None] if name else [None]):
+                            pending[ex.submit(tracing.bind(_timedtext_segments), video_id, lang, asr, n, stop)] = "segments"
+                elif result:
+                    return result
+        return []
+    finally:
+        stop.set()
+        for f in pending:
+            f.cancel()
+
+
+def fetch_captions_text(video_id: str, prefer_generated: bool = False) -> str:
+    return "\n".join(s.text for s in fetch_captions_segments(video_id, prefer_generated=prefer_generated))